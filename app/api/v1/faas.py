@@ -1,4 +1,12 @@
-from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily, Histogram
+from prometheus_client.core import GaugeMetricFamily, Histogram
+from prometheus_client import Counter
+from modules._scheduler import ExecutionScheduler, DeadlineExceededError, deadline_from_ms
+from modules._admission import AdmissionController, AdmissionRejectedError
+from modules._blob_cache import BlobCache
+from modules._code_cache import CodeCache
+from modules._worker_process import ResourceLimits
+from modules._result_store import DiskSpill, ResultRecord, ResultStore
+from modules._fast_json import SCAN_THRESHOLD, FastJSONResponse, dumps as dumps_json, loads_large, parse_envelope
 from modules._faas_manager import FaasManager, TaskState
 from modules._faas_parser import FaasParser
 from modules._logger import CognitLogger
@@ -6,13 +14,23 @@ from modules._pyexec import PyExec
 from modules._pyexec import PyExec
 from modules._cexec import CExec
 from models.faas import *
-from . import nano_pb2
 
-from fastapi import APIRouter, HTTPException, Response
-from typing import Any, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from typing import Any, Callable, Iterator, Optional, Tuple, Type
 from threading import Lock
 import time, re
+import operator
+import array
+import asyncio
 import logging
+import hashlib
+import base64
+import os
 import sys
 
 cognit_logger = CognitLogger()
@@ -21,6 +39,34 @@ cognit_logger.set_level(logging.DEBUG)
 faas_manager = FaasManager()
 faas_router = APIRouter()
 faas_parser = FaasParser()
+# Memory-only until main configures the disk tier at start-up
+blob_cache = BlobCache(directory=None)
+code_cache = CodeCache()
+
+def default_result_store() -> ResultStore:
+    """
+    In-memory result store spilling large results to the local disk, if writable.
+    """
+
+    try:
+        spill = DiskSpill()
+    except OSError as e:
+        cognit_logger.warning(f"Result spilling disabled: {e}")
+        spill = None
+
+    return ResultStore(spill=spill)
+
+# Outcomes of finished async executions, fetched through the status endpoint
+result_store = default_result_store()
+
+def set_result_store(store: ResultStore):
+    """
+    Replace the result store, e.g. by a persistent one at start-up.
+    """
+
+    global result_store
+    previous, result_store = result_store, store
+    previous.close()
 
 global app_req_id
 global executor
@@ -28,15 +74,131 @@ global executor_lock  # Thread lock for executor
 
 executor = None
 executor_lock = Lock()
+# Guards the globals exposed by CognitFuncExecCollector when set by async completions
+metrics_lock = Lock()
+# Sync executions wait here for their turn, by priority and deadline
+execution_scheduler = ExecutionScheduler(slots=1)
+
+# Executions accepted per endpoint: running plus queued, the rest get a 429
+SYNC_MAX_QUEUE = 16
+ASYNC_MAX_QUEUE = 64
+sync_admission = AdmissionController("execute-sync", max_concurrency=execution_scheduler.slots, max_queue=SYNC_MAX_QUEUE)
+async_admission = AdmissionController("execute-async", max_concurrency=os.cpu_count() or 1, max_queue=ASYNC_MAX_QUEUE)
+
+def decode_payload(payload: str) -> bytes:
+    """
+    Return the raw bytes of a function or parameter payload, either decoding
+    it from base64 or fetching it from the blob cache if it is a reference.
+    """
+
+    blob = blob_cache.resolve(payload)
+
+    if blob is not None:
+        return blob
+
+    return base64.b64decode(payload)
+
+def exec_params(model: Type[ExecSyncParams] | Type[ExecAsyncParams]) -> Callable:
+    """
+    Dependency parsing the body of an execution request.
+
+    Replaces FastAPI's body parsing, which decodes the whole JSON document with
+    the standard library and validates every parameter: the body is read raw,
+    its large strings sliced out by loads_large, and only the envelope is
+    validated by pydantic.
+    """
+
+    async def parse(request: Request):
+        body = await request.body()
+
+        try:
+            if len(body) < SCAN_THRESHOLD:
+                data = loads_large(body)
+            else:
+                # Keep the event loop free while a large body is scanned
+                data = await run_in_threadpool(loads_large, body)
+            return parse_envelope(model, data, PASSTHROUGH_FIELDS)
+        except ValidationError as e:
+            raise RequestValidationError([ErrorWrapper(e, loc=("body",))])
+        except ValueError as e:
+            raise RequestValidationError([ErrorWrapper(e, loc=("body", getattr(e, "pos", 0)))], body=body)
+
+    return parse
+
+def inline_schema(model: Type[ExecSyncParams] | Type[ExecAsyncParams]) -> dict:
+    """
+    JSON schema of a model with its definitions inlined, to document a request
+    body that FastAPI does not parse itself.
+    """
+
+    schema = model.schema()
+    definitions = schema.pop("definitions", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(definitions[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(value) for value in node]
+        return node
+
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": resolve(schema)}}}}
+
+# Flavour limits of every execution, requests may only lower them
+default_limits = ResourceLimits()
+
+def limits_for(offloaded_func: ExecSyncParams | ExecAsyncParams) -> ResourceLimits:
+    """
+    Resource limits of an execution: the requested ones capped by the flavour ones.
+    """
+
+    return default_limits.capped(
+        cpu_seconds=offloaded_func.cpu_limit_s,
+        memory_bytes=offloaded_func.memory_limit_mb * 1024 * 1024,
+    )
+
+def fc_cache_key(offloaded_func: ExecSyncParams | ExecAsyncParams) -> str:
+    """
+    Key identifying a function across requests. Computed from the payload
+    rather than taken from the client provided fc_hash, which is not verified.
+    """
+
+    return hashlib.sha256(offloaded_func.fc.encode()).hexdigest()
+
+def timeout_from_ms(timeout_ms: int) -> Optional[float]:
+    """
+    Convert a request timeout in milliseconds into seconds, None meaning no timeout.
+    """
+
+    if timeout_ms is None or timeout_ms <= 0:
+        return None
+
+    return timeout_ms / 1000
 
 def deserialize_py_fc(input_fc: ExecSyncParams | ExecAsyncParams) -> Tuple[Any, Any]:
 
-    decoded_fc = faas_parser.deserialize(input_fc.fc)
-    decoded_params = [faas_parser.deserialize(p) for p in input_fc.params]
+    decoded_fc = faas_parser.deserialize_bytes(decode_payload(input_fc.fc))
+    decoded_params = [faas_parser.deserialize_bytes(decode_payload(p)) for p in input_fc.params]
     return decoded_fc, decoded_params
 
+# VM ID read from the OpenNebula context, it does not change while the runtime runs
+vmid_cache = None
+
 def get_vmid():
 
+    global vmid_cache
+
+    if vmid_cache is None:
+        vmid = read_vmid()
+        if vmid is not None and vmid != "-1":
+            vmid_cache = vmid
+        return vmid
+
+    return vmid_cache
+
+def read_vmid():
+
     with open("/var/run/one-context/one_env", "r") as file_one:
         patt = "VMID="
         for l in file_one:
@@ -56,8 +218,8 @@ def get_vmid():
 def deserialize_c_fc(input_fc: ExecSyncParams | ExecAsyncParams) -> Tuple[Any, Any]:
 
     # Function is deserialized
-    decoded_fc = faas_parser.b64_to_str(input_fc.fc)
-    decoded_params = [faas_parser.b64_to_str(param) for param in input_fc.params]
+    decoded_fc = decode_payload(input_fc.fc).decode()
+    decoded_params = [decode_payload(param).decode() for param in input_fc.params]
     return decoded_fc, decoded_params
 
 # Define histograms
@@ -75,9 +237,21 @@ input_size_histogram = Histogram(
     labelnames=['vmid', 'function_outcome']
 )
 
+# Execution counters, exported as sr_func_*_total and added up across the
+# workers of a multi-worker deployment
+func_executed_counter = Counter('sr_func_executed', 'Total number of executed functions', labelnames=['vm_id'])
+func_succeeded_counter = Counter('sr_func_succeeded', 'Total number of succeeded functions', labelnames=['vm_id'])
+func_failed_counter = Counter('sr_func_failed', 'Total number of failed functions', labelnames=['vm_id'])
+
 def update_histogram_metrics(executor, vmid, asyncExecutionSuccess=None):
     """Updates Prometheus metrics immediately after execution."""
     try:
+        func_executed_counter.labels(vm_id=str(vmid)).inc()
+        if executor.get_ret_code() == ExecReturnCode.SUCCESS:
+            func_succeeded_counter.labels(vm_id=str(vmid)).inc()
+        else:
+            func_failed_counter.labels(vm_id=str(vmid)).inc()
+
         if asyncExecutionSuccess not in [True,False]:
             outcome = "success" if executor.get_ret_code() == ExecReturnCode.SUCCESS else "error"
         else:
@@ -103,115 +277,203 @@ def update_histogram_metrics(executor, vmid, asyncExecutionSuccess=None):
     except Exception as e:
         cognit_logger.error(f"Error updating metrics: {e}")
 
+# MyParam field and little-endian packed dtype of NumPy results, by dtype kind and item size.
+# Integers are mapped onto the fixed-width fields so their buffer is sent as is
+PB_DTYPE_FIELDS = {
+    ("b", 1): ("my_bool", "u1"),
+    ("f", 2): ("my_float", "<f4"),
+    ("f", 4): ("my_float", "<f4"),
+    ("f", 8): ("my_double", "<f8"),
+    ("i", 1): ("my_sfixed32", "<i4"),
+    ("i", 2): ("my_sfixed32", "<i4"),
+    ("i", 4): ("my_sfixed32", "<i4"),
+    ("i", 8): ("my_sfixed64", "<i8"),
+    ("u", 1): ("my_fixed32", "<u4"),
+    ("u", 2): ("my_fixed32", "<u4"),
+    ("u", 4): ("my_fixed32", "<u4"),
+    ("u", 8): ("my_fixed64", "<u8"),
+}
+
+def pb_varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def pb_header(field_number: int, length: int) -> bytes:
+    # Key and length of a length-delimited field
+    return pb_varint(field_number << 3 | 2) + pb_varint(length)
+
+def pb_packed(buffer: bytes) -> list:
+    # Body of a My<Type> message: its repeated values field, packed
+    return [pb_header(1, len(buffer)), buffer] if buffer else []
+
+def pb_result_params(item) -> Iterator[Tuple[str, list]]:
+    """
+    Encode a result item as MyParam messages, yielding their oneof field and body parts.
+
+    NumPy arrays and scalars (anything with a numeric dtype and tobytes()) are cast
+    to the wire dtype and sent as one packed buffer, whatever their shape. Lists are
+    typed as a whole, lists of strings or bytes yield a message per element, and
+    lists of other results are encoded element by element.
+    """
+
+    dtype = getattr(item, "dtype", None)
+    if dtype is not None and hasattr(item, "tobytes"):
+        wire = PB_DTYPE_FIELDS.get((dtype.kind, dtype.itemsize))
+        if wire is not None:
+            field, wire_dtype = wire
+            yield field, pb_packed(item.astype(wire_dtype, copy=False).tobytes())
+            return
+        # Strings, objects or complex numbers, encoded as Python values
+        item = item.tolist()
+
+    if isinstance(item, str):
+        yield "my_string", [item.encode()]
+        return
+
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        yield "my_bytes", [bytes(item)]
+        return
+
+    is_list = isinstance(item, (list, tuple))
+    values = item if is_list else [item]
+    # Types found without running Python code per element
+    types = set(map(type, values))
+
+    if types <= {bool}:
+        # Varints of booleans are single 0 or 1 bytes
+        yield "my_bool", pb_packed(bytes(values))
+    elif types <= {int, bool}:
+        from . import nano_pb2
+        yield "my_int64", [nano_pb2.MyInt64(values=values).SerializeToString()]
+    elif types <= {float, int, bool}:
+        buffer = array.array("d", values)
+        if sys.byteorder == "big":
+            buffer.byteswap()
+        yield "my_double", pb_packed(buffer.tobytes())
+    elif types <= {str}:
+        for value in values:
+            yield "my_string", [value.encode()]
+    elif types <= {bytes}:
+        for value in values:
+            yield "my_bytes", [value]
+    elif is_list:
+        for value in values:
+            yield from pb_result_params(value)
+    else:
+        raise TypeError(f"Type not supported: {type(item).__name__}")
+
 def pb_serialize_result(result):
-    
+    """
+    Serialize the result of a Protobuf-encoded function as a FaasResponse, a
+    MyParam message per item. Messages are assembled from their parts and joined
+    once, large buffers are not copied per nesting level.
+    """
+
     if not isinstance(result, (list, tuple)):
         result = [result]
-    
-    faas_response = nano_pb2.FaasResponse()
-    
+
+    # Protobuf is imported on first use, only Protobuf-encoded requests need it
+    from . import nano_pb2
+
+    field_numbers = {field.name: field.number for field in nano_pb2.MyParam.DESCRIPTOR.fields}
+    parts = []
+
     for item in result:
-        cognit_logger.debug(item)
-        # Force list
-        values = item if isinstance(item, list) else [item]
-
-        # Determine type
-        types = {type(v) for v in values}
-        param = faas_response.my_faas_response.add()
-
-        if types <= {bool}:
-            param.my_bool.values.extend(values)
-        elif types <= {float}:
-            param.my_double.values.extend(values)
-        elif types <= {int}:
-            param.my_int64.values.extend(values)
-        elif types <= {str}:
-            if len(values) != 1:
-                raise ValueError(f"No se puede serializar lista de strings de longitud {len(values)}")
-            param.my_string = values[0]
-        elif types <= {bytes}:
-            if len(values) != 1:
-                raise ValueError("Type not supported")
-            param.my_bytes = values[0]
-        else:
-            raise TypeError("Type not supported")
+        for field, body in pb_result_params(item):
+            body_length = sum(map(len, body))
+            param_header = pb_header(field_numbers[field], body_length)
+            # FaasResponse.my_faas_response entry holding the MyParam message
+            parts.append(pb_header(1, len(param_header) + body_length))
+            parts.append(param_header)
+            parts.extend(body)
+
+    return b"".join(parts)
+
+# Decoders of the MyParam oneof fields, returning their values as a new list
+# since the message is reused for the next parameter
+PB_PARAM_DECODERS = {
+    # Slicing copies the repeated container much faster than iterating over it
+    name: (lambda param, values=operator.attrgetter(f"{name}.values"): values(param)[:])
+    for name in (
+        "my_double", "my_float", "my_int32", "my_int64", "my_uint32", "my_uint64", "my_sint32",
+        "my_sint64", "my_fixed32", "my_fixed64", "my_sfixed32", "my_sfixed64", "my_bool",
+    )
+}
+PB_PARAM_DECODERS["my_string"] = lambda param: [param.my_string]
+PB_PARAM_DECODERS["my_bytes"] = lambda param: [param.my_bytes]
+
+def decode_protobuf_param(param) -> Any:
+    """
+    Value of a MyParam message: a scalar, or a list if it carries several values.
+    """
+
+    field = param.WhichOneof("param")
+    decoder = PB_PARAM_DECODERS.get(field)
 
-    serialized_params = faas_response.SerializeToString()     
+    if decoder is None:
+        raise ValueError("Parameter without value")
 
-    return serialized_params
+    values = decoder(param)
+    if not values:
+        raise ValueError(f"Parameter {field} without values")
+
+    return values if len(values) > 1 else values[0]
 
 def deserialize_protobuf_params(params):
     
+    from . import nano_pb2
+
     param = nano_pb2.MyParam()
     args = []
 
     for encoded_param in params:
-        param_decoded = faas_parser.deserialize_pb(encoded_param)
-        param.ParseFromString(param_decoded)
-        
-        if param.WhichOneof('param') == 'my_double':
-            values = param.my_double.values
-        elif param.WhichOneof('param') == 'my_float':
-            values = param.my_float.values
-        elif param.WhichOneof('param') == 'my_int32':
-            values = param.my_int32.values
-        elif param.WhichOneof('param') == 'my_int64':
-            values = param.my_int64.values
-        elif param.WhichOneof('param') == 'my_uint32':
-            values = param.my_uint32.values
-        elif param.WhichOneof('param') == 'my_uint64':
-            values = param.my_uint64.values
-        elif param.WhichOneof('param') == 'my_sint32':
-            values = param.my_sint32.values
-        elif param.WhichOneof('param') == 'my_sint64':
-            values = param.my_sint64.values
-        elif param.WhichOneof('param') == 'my_fixed32':
-            values = param.my_fixed32.values
-        elif param.WhichOneof('param') == 'my_fixed64':
-            values = param.my_fixed64.values
-        elif param.WhichOneof('param') == 'my_sfixed32':
-            values = param.my_sfixed32.values
-        elif param.WhichOneof('param') == 'my_sfixed64':
-            values = param.my_sfixed64.values
-        elif param.WhichOneof('param') == 'my_bool':
-            values = param.my_bool.values
-        elif param.WhichOneof('param') == 'my_string':
-            values = [param.my_string]
-        elif param.WhichOneof('param') == 'my_bytes':
-            values = [param.my_bytes]
-        else:
-            values = []
-
-        # Añadimos valores al vector args
-        args.append(values if len(values) > 1 else values[0])
+        param.ParseFromString(decode_payload(encoded_param))
+        args.append(decode_protobuf_param(param))
         
     return args
 
+def deserialize_protobuf_param_list(encoded_params: str) -> list:
+    """
+    Deserialize every parameter from a single FaasResponse-shaped message, the
+    format results are returned in, instead of one MyParam message each.
+    """
+
+    from . import nano_pb2
+
+    param_list = nano_pb2.FaasResponse()
+    param_list.ParseFromString(decode_payload(encoded_params))
+
+    return [decode_protobuf_param(param) for param in param_list.my_faas_response]
+
 def make_fc_executable(fc_str):
-    # Buscar el nombre de la función con regex
-    match = re.search(r"def\s+(\w+)\s*\(", fc_str)
+    # Compiled once per source, defined in a namespace of its own on every call
+    return code_cache.load(fc_str)
 
-    if match:
-        fc_name = match.group(1)  # Extrae el nombre de la función
-        exec(fc_str, globals())  # Ejecutar el código
-        fc = globals().get(fc_name)
-    
-    return fc
-    
 
 def deserialize_protobuf_fc(input_fc: ExecSyncParams):
     
     # Parse request body to MyFunc object
     cognit_logger.debug("Parsing function data...")
 
+    from . import nano_pb2
+
     my_func = nano_pb2.MyFunc()
-    decoded_fc = faas_parser.deserialize_pb(input_fc.fc)
+    decoded_fc = decode_payload(input_fc.fc)
     my_func.ParseFromString(decoded_fc)
     
     cognit_logger.debug("Function code: ")
     cognit_logger.debug(my_func.fc_code)
     
-    args = deserialize_protobuf_params(input_fc.params)
+    if input_fc.pb_params_list:
+        if len(input_fc.params) != 1:
+            raise ValueError(f"Expected a single parameter list message, got {len(input_fc.params)}")
+        args = deserialize_protobuf_param_list(input_fc.params[0])
+    else:
+        args = deserialize_protobuf_params(input_fc.params)
     cognit_logger.debug("Args: " + str(args))
    
     # Respondemos con el mismo objeto modificado
@@ -271,44 +533,86 @@ class CognitFuncExecCollector(object):
                 func_status = executor.get_status()
                 func_status_gauge.add_metric([off_func.fc_hash, vmid, str(sum(params_prom_label))], func_status)
                 yield func_status_gauge
-
-                # Add counters for executed, succeeded, and failed functions
-                executed_counter = CounterMetricFamily("sr_func_executed_total", "Total number of executed functions", labels=['vm_id'])
-                succeeded_counter = CounterMetricFamily("sr_func_succeeded_total", "Total number of succeeded functions", labels=['vm_id'])
-                failed_counter = CounterMetricFamily("sr_func_failed_total", "Total number of failed functions", labels=['vm_id'])
-
-                executed_counter.add_metric([vmid], executor.get_executed_func_counter())
-                succeeded_counter.add_metric([vmid], executor.get_successed_func_counter())
-                failed_counter.add_metric([vmid], executor.get_failed_func_counter())
-
-                yield executed_counter
-                yield succeeded_counter
-                yield failed_counter
                 
                 
         except Exception as e:
             # Manually call sys.excepthook to log the exception
             sys.excepthook(type(e), e, e.__traceback__)
 
-# POST /v1/faas/execute-sync
-@faas_router.post("/execute-sync")
-async def execute_sync(offloaded_func: ExecSyncParams) -> ExecResponse:
+# POST /v1/faas/blobs/missing
+@faas_router.post("/blobs/missing")
+async def negotiate_blobs(negotiation: BlobNegotiation) -> BlobNegotiationResponse:
     """
-    Execute a synchronous function.
+    Tell which of the given digests are not cached, so the client only uploads those.
+
+    Args:
+        negotiation (BlobNegotiation): Digests the client intends to reference.
+
+    Returns:
+        BlobNegotiationResponse: Digests that must be uploaded before being referenced.
+    """
+
+    return BlobNegotiationResponse(missing=blob_cache.missing(negotiation.digests)).dict()
+
+# PUT /v1/faas/blobs/{digest}
+@faas_router.put("/blobs/{digest}")
+def upload_blob(digest: str, blob: BlobUpload) -> BlobUploadResponse:
+    """
+    Store a payload in the blob cache so it can be referenced as "sha256:<digest>".
+
+    Args:
+        digest (str): SHA-256 digest of the base64 decoded payload.
+        blob (BlobUpload): The base64 encoded payload.
+
+    Returns:
+        BlobUploadResponse: The digest under which the payload was stored.
+    """
+
+    if not BlobCache.is_valid_digest(digest):
+        raise HTTPException(status_code=400, detail="Invalid digest, expected lowercase hex SHA-256")
+
+    try:
+        blob_cache.put(base64.b64decode(blob.data), digest=digest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return BlobUploadResponse(digest=digest).dict()
+
+def run_sync_execution(offloaded_func: ExecSyncParams) -> ExecResponse:
+    """
+    Execute a synchronous function in the calling thread.
+
+    This is the execution engine shared by the HTTP endpoint and the in-process
+    broker consumer. It blocks until the function finishes.
 
     Args:
         offloaded_func (ExecSyncParams): The function and its parameters to execute.
     
     Returns:
         ExecResponse: The result of the function execution.
+
+    Raises:
+        AdmissionRejectedError: If the sync queue is full.
     """
 
+    none_serialized = faas_parser.serialize(None)
+    deadline = deadline_from_ms(offloaded_func.deadline_ms)
+
+    with sync_admission.admitted():
+
+        try:
+            with execution_scheduler.slot(offloaded_func.priority, deadline):
+                return _run_sync_execution(offloaded_func, none_serialized)
+        except DeadlineExceededError as e:
+            cognit_logger.warning(f"Sync execution shed: {e}")
+            return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err=str(e))
+
+def _run_sync_execution(offloaded_func: ExecSyncParams, none_serialized: str) -> ExecResponse:
+
     global executor
     global executor_lock
     global app_req_id
 
-    none_serialized = faas_parser.serialize(None)
-
     with executor_lock:  # Ensure proper locking
         
         executor = None  # Reset executor before assignment
@@ -323,14 +627,19 @@ async def execute_sync(offloaded_func: ExecSyncParams) -> ExecResponse:
             except Exception as e:
 
                 cognit_logger.error(f"Error deserializing sync PY function: {e}")
-                return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err=f"Error deserializing sync PY function: {e}").dict()
+                return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err=f"Error deserializing sync PY function: {e}")
 
             if not callable(fc):
 
                 cognit_logger.error("Function is not callable")
-                return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err="Not callable function").dict()
+                return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err="Not callable function")
 
-            executor = PyExec(fc=fc, params=params)
+            executor = PyExec(
+                fc=fc,
+                params=params,
+                timeout=timeout_from_ms(offloaded_func.timeout_ms),
+                limits=limits_for(offloaded_func),
+            )
             cognit_logger.debug("PyExec created successfully for PY function")
 
         elif offloaded_func.lang == "C":
@@ -343,23 +652,28 @@ async def execute_sync(offloaded_func: ExecSyncParams) -> ExecResponse:
             except Exception as e:
 
                 cognit_logger.error(f"Error deserializing sync C function: {e}")
-                return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err=f"Error deserializing sync C function: {e}").dict()
+                return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err=f"Error deserializing sync C function: {e}")
         
             if not callable(fc):
 
                 cognit_logger.error("Function is not callable")
-                return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err="Not callable function").dict()
+                return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err="Not callable function")
             
-            executor = PyExec(fc=fc, params=params)
+            executor = PyExec(
+                fc=fc,
+                params=params,
+                timeout=timeout_from_ms(offloaded_func.timeout_ms),
+                limits=limits_for(offloaded_func),
+            )
             cognit_logger.debug("PyExec created successfully for C function")
 
         else:
             cognit_logger.error(f"Unsupported language: {offloaded_func.lang}")
-            return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err="Unsupported language. Supported languages: PY, C").dict()
+            return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err="Unsupported language. Supported languages: PY, C")
 
         if not executor:
             cognit_logger.error("Executor is None after assignment")
-            return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err="Internal Server Error: Executor is None").dict()
+            return ExecResponse(res=none_serialized, ret_code=ExecReturnCode.ERROR, err="Internal Server Error: Executor is None")
 
         global off_func
         off_func = offloaded_func
@@ -394,11 +708,90 @@ async def execute_sync(offloaded_func: ExecSyncParams) -> ExecResponse:
         result = ExecResponse(res=b64_res, ret_code=executor.get_ret_code(), err=executor.get_err())
         cognit_logger.debug(f"Execution result: {result}")
 
-        return result.dict()
+        return result
+
+# POST /v1/faas/execute-sync
+@faas_router.post("/execute-sync", response_class=FastJSONResponse, openapi_extra=inline_schema(ExecSyncParams))
+def execute_sync(offloaded_func: ExecSyncParams = Depends(exec_params(ExecSyncParams))) -> ExecResponse:
+    """
+    Execute a synchronous function.
+
+    Declared as a plain function so FastAPI runs it in its thread pool and the
+    event loop stays free while the offloaded function runs.
+
+    Args:
+        offloaded_func (ExecSyncParams): The function and its parameters to execute.
+    
+    Returns:
+        ExecResponse: The result of the function execution.
+    """
+
+    try:
+        # Encoded once, the base64 result is not walked by jsonable_encoder
+        return FastJSONResponse(run_sync_execution(offloaded_func))
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def build_exec_response(executor) -> ExecResponse:
+    """
+    Build the response of a finished asynchronous execution from its executor.
+    """
+
+    if executor.lang == "PY":
+        res = faas_parser.serialize(executor.res)
+    elif executor.lang == "C":
+        res = faas_parser.any_to_b64(executor.res)
+
+    return ExecResponse(ret_code=executor.get_ret_code(), res=res, err=executor.get_err())
+
+def record_async_execution(finished):
+    """
+    Expose a finished async execution through the Prometheus metrics.
+    """
+
+    global executor, metrics_lock
+    global async_start_time
+    global async_end_time
+
+    # Not executor_lock, held by sync executions for as long as they run
+    with metrics_lock:
+        executor = finished
+        async_start_time = finished.start_pyexec_time
+        async_end_time = finished.end_pyexec_time
+
+    try:
+        # The outcome follows the return code, as for sync executions
+        update_histogram_metrics(finished, get_vmid())
+    except Exception as e:
+        cognit_logger.error(f"Error updating metrics: {e}")
+
+def submit_async_execution(offloaded_func: ExecAsyncParams, on_done: Optional[Callable[[ExecResponse], None]] = None) -> str:
+    """
+    Deserialize an asynchronous execution request and submit it to the task manager.
+
+    Args:
+        offloaded_func (ExecAsyncParams): The function and its parameters to execute.
+        on_done (Callable, optional): Called with the ExecResponse once the task finishes,
+            from a task manager thread.
+
+    Returns:
+        str: UUID of the submitted task.
+
+    Raises:
+        AdmissionRejectedError: If the async queue is full.
+        HTTPException: If the request can not be deserialized.
+    """
+
+    async_admission.admit()
+
+    try:
+        return _submit_async_execution(offloaded_func, on_done)
+    except BaseException:
+        async_admission.release()
+        raise
+
+def _submit_async_execution(offloaded_func: ExecAsyncParams, on_done: Optional[Callable[[ExecResponse], None]]) -> str:
 
-# POST /v1/faas/execute-async
-@faas_router.post("/execute-async")
-async def execute_async(offloaded_func: ExecAsyncParams, response: Response):
     global executor, executor_lock
     with executor_lock:
         # Validate and deserialize the request based on the language
@@ -410,14 +803,26 @@ async def execute_async(offloaded_func: ExecAsyncParams, response: Response):
             if not callable(fc):
                 raise HTTPException(status_code=400, detail=" Not callable function")
 
-            executor = PyExec(fc=fc, params=params)
-            
+            # Isolated in a worker process so it can be cancelled while running
+            executor = PyExec(
+                fc=fc,
+                params=params,
+                timeout=timeout_from_ms(offloaded_func.timeout_ms),
+                isolated=True,
+                limits=limits_for(offloaded_func),
+            )
+
         elif offloaded_func.lang == "C":
             try:
                 fc, params = deserialize_c_fc(offloaded_func)
             except Exception as e:
                 raise HTTPException(status_code=400, detail="Error deserializing async C function. More details; {0}".format(e))
-            executor = CExec(fc=fc, params=params)
+            executor = CExec(
+                fc=fc,
+                params=params,
+                timeout=timeout_from_ms(offloaded_func.timeout_ms),
+                limits=limits_for(offloaded_func),
+            )
         else:
             raise HTTPException(
                 status_code=400, detail="Unsupported language. Supported languages: PY, C"
@@ -428,65 +833,303 @@ async def execute_async(offloaded_func: ExecAsyncParams, response: Response):
         global off_func
         off_func = offloaded_func
 
-        task_id = faas_manager.add_task(executor=executor)
+        def on_task_done(future):
+            async_admission.release()
+            finished = None
+            try:
+                finished = future.result()
+                exec_response = build_exec_response(finished)
+                status = AsyncExecStatus.READY
+            except Exception as e:
+                exec_response = ExecResponse(res=faas_parser.serialize(None), ret_code=ExecReturnCode.ERROR, err=f"Error executing async function: {e}")
+                status = AsyncExecStatus.FAILED
+
+            try:
+                result_store.put(future.task_uuid, exec_response, status)
+                # The outcome is served from the result store from now on
+                faas_manager.release_task(future.task_uuid)
+            except Exception as e:
+                cognit_logger.error(f"Unable to store result of task {future.task_uuid}: {e}")
+
+            if on_done is not None:
+                on_done(exec_response)
+
+            # Once the result is stored and published, metrics must not delay it
+            if finished is not None:
+                record_async_execution(finished)
+
+        task_id = faas_manager.add_task(
+            executor=executor,
+            on_done=on_task_done,
+            priority=offloaded_func.priority,
+            deadline=deadline_from_ms(offloaded_func.deadline_ms),
+            fc_hash=fc_cache_key(offloaded_func),
+        )
         
         if 'params' in locals():
             global params_prom_label
             params_prom_label = [params[i].__sizeof__() for i in range(len(params))]
             params_prom_label.insert(0,params.__sizeof__())
 
-        return AsyncExecResponse(
-            status=AsyncExecStatus.WORKING,
-            res=None,
-            exec_id=AsyncExecId(faas_task_uuid=task_id),
-        ).dict()
+        return task_id
 
+# POST /v1/faas/execute-async
+@faas_router.post("/execute-async", response_class=FastJSONResponse, openapi_extra=inline_schema(ExecAsyncParams))
+def execute_async(response: Response, offloaded_func: ExecAsyncParams = Depends(exec_params(ExecAsyncParams))):
+
+    try:
+        task_id = submit_async_execution(offloaded_func)
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    return FastJSONResponse(AsyncExecResponse(
+        status=AsyncExecStatus.WORKING,
+        res=None,
+        exec_id=AsyncExecId(faas_task_uuid=task_id),
+    ))
+
+
+# Longest time a status request may wait for its task, and keep-alive period of event streams
+MAX_STATUS_WAIT = 60.0
+EVENTS_KEEPALIVE = 15.0
+
+def parse_wait(wait: str) -> float:
+    """
+    Parse a long-poll duration such as "30s", "500ms" or "30" (seconds),
+    capped to MAX_STATUS_WAIT.
+    """
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(ms|s)?\s*", wait)
+
+    if match is None:
+        raise HTTPException(status_code=400, detail=f"Invalid wait duration: {wait}")
+
+    seconds = float(match.group(1))
+    if match.group(2) == "ms":
+        seconds /= 1000
+
+    return min(seconds, MAX_STATUS_WAIT)
+
+# Seconds between checks of the result store for tasks of another worker process
+SHARED_POLL_INTERVAL = 0.2
+
+def is_remote_task(faas_task_uuid: str) -> bool:
+    """
+    Tell whether the task is in flight in another worker process.
+    """
+
+    shared_tasks = faas_manager.shared_tasks
+
+    return shared_tasks is not None and result_store.get(faas_task_uuid) is None and shared_tasks.contains(faas_task_uuid)
+
+async def wait_for_task(faas_task_uuid: str, timeout: float):
+    """
+    Wait, without holding a thread, until the task finishes or the timeout expires.
+    """
+
+    future = faas_manager.get_task_future(faas_task_uuid)
+
+    if future is None:
+        # Only known to the worker process running it, poll for its outcome
+        deadline = time.monotonic() + timeout
+        while await run_in_threadpool(is_remote_task, faas_task_uuid) and time.monotonic() < deadline:
+            await asyncio.sleep(min(SHARED_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+        return
+
+    if future.done():
+        return
+
+    try:
+        # Shielded, cancelling the wrapper on timeout would cancel a queued task
+        await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+    except asyncio.TimeoutError:
+        pass
+    except Exception:
+        # Failed tasks are reported by their status
+        pass
+
+# Placeholder of a spilled result in a status response, replaced while streaming it
+SPILLED_RES = "__SPILLED_RESULT__"
+
+def build_status_response(faas_task_uuid: str) -> Optional[AsyncExecResponse]:
+    """
+    Build the status of an asynchronous execution, None if the task is unknown.
+
+    Finished executions are answered from the result store. A spilled result
+    is replaced by SPILLED_RES, see iter_status_json().
+    """
+
+    record = result_store.get(faas_task_uuid)
+    progress = faas_manager.get_task_progress(faas_task_uuid)
+
+    if record is not None:
+        return AsyncExecResponse(
+            status=record.status,
+            res=record.to_exec_response(res=SPILLED_RES),
+            exec_id=AsyncExecId(faas_task_uuid=faas_task_uuid),
+            progress=progress,
+        )
 
-# GET /v1/faas/{faas_uuid}/status
-@faas_router.get("/{faas_task_uuid}/status")
-async def get_faas_uuid_status(faas_task_uuid: str):
     task = faas_manager.get_task_status(task_uuid=faas_task_uuid)
 
+    if task is None and faas_manager.shared_tasks is not None:
+        progress = faas_manager.shared_tasks.get_progress(faas_task_uuid)
+        if progress is not None:
+            # Running in another worker process
+            task = TaskState.WORKING, None
+
     if task is None:
+        return None
+
+    status, finished = task
+
+    if status == TaskState.OK:
+        # Finished, but the result could not be stored
+        return AsyncExecResponse(
+            status=AsyncExecStatus.READY,
+            res=build_exec_response(finished),
+            exec_id=AsyncExecId(faas_task_uuid=faas_task_uuid),
+            progress=progress,
+        )
+
+    # Polls of running tasks are answered without locking or metrics
+    return AsyncExecResponse(
+        status=AsyncExecStatus.WORKING if status == TaskState.WORKING else AsyncExecStatus.FAILED,
+        res=None,
+        exec_id=AsyncExecId(faas_task_uuid=faas_task_uuid),
+        progress=progress,
+    )
+
+def is_spilled(response: AsyncExecResponse) -> bool:
+    return response.res is not None and response.res.res == SPILLED_RES
+
+def iter_status_json(response: AsyncExecResponse) -> Iterator[bytes]:
+    """
+    Serialize a status response to JSON, streaming a spilled result from the
+    result store instead of loading it in memory.
+    """
+
+    body = dumps_json(response)
+
+    if not is_spilled(response):
+        yield body
+        return
+
+    record = result_store.get(response.exec_id.faas_task_uuid)
+    prefix, suffix = body.split(f'"{SPILLED_RES}"'.encode())
+
+    yield prefix + b'"'
+    # Base64 needs no JSON escaping
+    yield from result_store.iter_res(record)
+    yield b'"' + suffix
+
+# GET /v1/faas/{faas_uuid}/status
+@faas_router.get("/{faas_task_uuid}/status", response_class=FastJSONResponse)
+async def get_faas_uuid_status(faas_task_uuid: str, wait: Optional[str] = None):
+    """
+    Get the status of an asynchronous execution.
+
+    Args:
+        faas_task_uuid (str): UUID of the task.
+        wait (str, optional): Long-poll duration (e.g. "30s"). The request is
+            answered as soon as the task finishes, or with its current status
+            once the duration expires.
+
+    Returns:
+        AsyncExecResponse: The status, and the result if the task finished.
+    """
+
+    if wait is not None:
+        await wait_for_task(faas_task_uuid, parse_wait(wait))
+
+    response = await run_in_threadpool(build_status_response, faas_task_uuid)
+
+    if response is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if is_spilled(response):
+        return StreamingResponse(iter_status_json(response), media_type="application/json")
+
+    return FastJSONResponse(response)
+
+# GET /v1/faas/{faas_uuid}/events
+@faas_router.get("/{faas_task_uuid}/events")
+async def get_faas_uuid_events(faas_task_uuid: str):
+    """
+    Stream the status of an asynchronous execution as Server-Sent Events.
+
+    A "status" event is sent right away and another one when the task
+    finishes, after which the stream is closed. Comments keep the connection
+    alive in between.
+
+    Args:
+        faas_task_uuid (str): UUID of the task.
+    """
+
+    response = await run_in_threadpool(build_status_response, faas_task_uuid)
+
+    if response is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    def status_event(response: AsyncExecResponse) -> Iterator[bytes]:
+        yield b"event: status\ndata: "
+        yield from iter_status_json(response)
+        yield b"\n\n"
+
+    async def events():
+        nonlocal response
+        async for chunk in iterate_in_threadpool(status_event(response)):
+            yield chunk
+
+        while response.status == AsyncExecStatus.WORKING:
+            await wait_for_task(faas_task_uuid, EVENTS_KEEPALIVE)
+
+            response = await run_in_threadpool(build_status_response, faas_task_uuid)
+            if response is not None and response.status == AsyncExecStatus.WORKING:
+                yield ": keep-alive\n\n"
+                continue
+
+            if response is None:
+                # Neither finished nor in flight any longer, e.g. its result expired
+                return
+
+            async for chunk in iterate_in_threadpool(status_event(response)):
+                yield chunk
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# DELETE /v1/faas/{faas_uuid}
+@faas_router.delete("/{faas_task_uuid}")
+def cancel_faas_task(faas_task_uuid: str):
+    """
+    Cancel an asynchronous execution, releasing its capacity.
+
+    Args:
+        faas_task_uuid (str): UUID of the task to cancel.
+
+    Returns:
+        AsyncCancelResponse: Whether the task was cancelled. Its status then
+            reports READY with the CANCELLED return code.
+    """
+
+    cancelled = faas_manager.cancel_task(task_uuid=faas_task_uuid)
+
+    if cancelled is None and result_store.get(faas_task_uuid) is not None:
+        # Already finished, its outcome was moved to the result store
+        cancelled = False
+
+    if cancelled is None and faas_manager.shared_tasks is not None:
+        if faas_manager.shared_tasks.request_cancel(faas_task_uuid):
+            # Cancelled by the worker process running it, which polls the requests
+            cancelled = True
+        elif faas_manager.shared_tasks.contains(faas_task_uuid):
+            # Finished in another worker process, its result is being stored
+            cancelled = False
+
+    if cancelled is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    
-    global executor, executor_lock
-    with executor_lock:
-        status, executor = task
-
-        if status == TaskState.OK:
-            if executor.lang == "PY":
-                exec_response = ExecResponse(
-                    ret_code=ExecReturnCode.SUCCESS, res=faas_parser.serialize(executor.res)
-                )
-            elif executor.lang == "C":
-                exec_response = ExecResponse(
-                    ret_code=ExecReturnCode.SUCCESS, res=faas_parser.any_to_b64(executor.res)
-                )
-
-            # Define async metrics global variables
-            global async_start_time
-            global async_end_time
-            async_start_time = executor.start_pyexec_time
-            async_end_time = executor.end_pyexec_time
-            response = AsyncExecResponse(
-                status=AsyncExecStatus.READY,
-                res=exec_response,
-                exec_id=AsyncExecId(faas_task_uuid=faas_task_uuid),
-            )
-        elif status == TaskState.FAILED:
-            response = AsyncExecResponse(
-                status=AsyncExecStatus.FAILED,
-                res=None,
-                exec_id=AsyncExecId(faas_task_uuid=faas_task_uuid),
-            )
-        else:
-            response = AsyncExecResponse(
-                status=AsyncExecStatus.WORKING,
-                res=None,
-                exec_id=AsyncExecId(faas_task_uuid=faas_task_uuid),
-            )
-        if status != AsyncExecStatus.WORKING:
-            update_histogram_metrics(executor, get_vmid(), status==TaskState.OK)
 
-        return response.dict()
+    return AsyncCancelResponse(
+        exec_id=AsyncExecId(faas_task_uuid=faas_task_uuid),
+        cancelled=cancelled,
+    ).dict()
@@ -1,7 +1,18 @@
-from api.v1.faas import faas_router, CognitFuncExecCollector, execution_time_histogram, input_size_histogram
+from api.v1.faas import faas_router, CognitFuncExecCollector, execution_time_histogram, input_size_histogram, run_sync_execution, submit_async_execution
+from api.v1.faas import func_executed_counter, func_succeeded_counter, func_failed_counter
+from api.v1.faas import sync_admission, async_admission, default_limits, faas_manager, set_result_store, blob_cache, code_cache
+from modules._result_store import DiskSpill, MinioSpill, ResultStore, SqliteResultStore
+from modules._admission import admission_in_flight_gauge, admission_queue_depth_gauge, admission_rejected_counter
 from ipaddress import ip_address as ipadd, IPv4Address, IPv6Address
 from prometheus_client import start_http_server, CollectorRegistry
-from modules._rabbitmq_client import RabbitMQClient
+from modules._s3_client_factory import s3_pool_size_gauge, s3_in_flight_gauge, s3_pool_saturated_counter
+from modules._code_cache import code_cache_hits_counter, code_cache_misses_counter, code_cache_evictions_counter, code_cache_entries_gauge
+from modules._task_registry import SharedTaskRegistry
+from modules._blob_cache import BlobCache
+from modules._faas_manager import FaasManager
+from modules._readiness import Readiness
+from modules._worker_process import WorkerProcess
+from modules._warmup import WarmUp
 from modules._logger import CognitLogger
 
 from starlette.responses import JSONResponse
@@ -10,7 +21,9 @@ from fastapi import FastAPI, Request
 import traceback
 import threading
 import argparse
-import requests
+import json
+import sys
+import os
 import uvicorn
 import socket
 
@@ -24,8 +37,20 @@ LOGGING_CONFIG["loggers"]["uvicorn.access"]["handlers"] = ["default"]
 SR_PORT = 8000
 PROM_PORT = 9100
 
+# Multi-worker mode: metrics files of the workers, and the arguments they configure themselves from
+PROMETHEUS_MULTIPROC_DIR = "/tmp/cognit-sr-metrics"
+WORKER_ARGV_ENV = "COGNIT_SR_WORKER_ARGV"
+
 app = FastAPI(title="Serverless Runtime")
 
+# Start-up steps and health checks behind /readyz and /healthz
+readiness = Readiness()
+readiness.expect("startup")
+readiness.add_check("pool", faas_manager.health, liveness=True)
+
+warm_up_hook = WarmUp()
+readiness.add_check("warmup", lambda: warm_up_hook.health(blob_cache))
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -43,6 +68,27 @@ async def root():
     return "Main routes: \
             POST -> /v1/faas/execute-sync "
 
+@app.get("/healthz")
+def healthz():
+    """
+    Liveness probe: 503 if the runtime can no longer run functions and must be restarted.
+    """
+
+    status = readiness.liveness()
+
+    return JSONResponse(status_code=200 if status["alive"] else 503, content=status)
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness probe: 200 once the runtime is warm and its worker pool, broker
+    connection and caches are healthy, 503 otherwise.
+    """
+
+    status = readiness.status()
+
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 app.include_router(faas_router, prefix="/v1/faas")
 
 def is_prometheus_running() -> bool:
@@ -54,6 +100,9 @@ def is_prometheus_running() -> bool:
         bool: True if Prometheus is running, False otherwise.
     """
 
+    # Imported here, only the start-up check uses it
+    import requests
+
     try:
         # Check if Prometheus is running by performing a curl to localhost:{PROM_PORT}
         response = requests.get(f"http://localhost:{PROM_PORT}", timeout=5)
@@ -109,7 +158,14 @@ def get_local_ip() -> str:
         return "127.0.0.1"  # Default to IPv4
 
 # Initialize Prometheus and check if it's running
-def initialize_prometheus():
+def initialize_prometheus(multiprocess: bool = False):
+    """
+    Start the Prometheus exporter.
+
+    Args:
+        multiprocess (bool): Export the metrics that the uvicorn workers write to
+            PROMETHEUS_MULTIPROC_DIR instead of those of this process.
+    """
 
     global r
 
@@ -117,12 +173,45 @@ def initialize_prometheus():
 
     # Create Prometheus registry
     r = CollectorRegistry()
+
+    if multiprocess:
+        # The per-process COGNIT collector (last execution, function status) has no multi-worker equivalent
+        from prometheus_client.multiprocess import MultiProcessCollector
+        MultiProcessCollector(r)
+        start_prometheus_server(r)
+        return
+
     r.register(execution_time_histogram)
     r.register(input_size_histogram)
+
+    # Register function execution counters
+    r.register(func_executed_counter)
+    r.register(func_succeeded_counter)
+    r.register(func_failed_counter)
+
+    # Register admission control metrics
+    r.register(admission_in_flight_gauge)
+    r.register(admission_queue_depth_gauge)
+    r.register(admission_rejected_counter)
+
+    # Register shared S3 connection pool metrics
+    r.register(s3_pool_size_gauge)
+    r.register(s3_in_flight_gauge)
+    r.register(s3_pool_saturated_counter)
+
+    # Register compiled function cache metrics
+    r.register(code_cache_hits_counter)
+    r.register(code_cache_misses_counter)
+    r.register(code_cache_evictions_counter)
+    r.register(code_cache_entries_gauge)
     
     # Register COGNIT collector within the registry
     r.register(CognitFuncExecCollector())
 
+    start_prometheus_server(r)
+
+def start_prometheus_server(r: CollectorRegistry):
+
     local_ip = get_local_ip()
     # cognit_logger.debug(f"[PROM] local_ip: {local_ip}")
     ip_version = ipadd(local_ip)
@@ -136,32 +225,230 @@ def initialize_prometheus():
         # Start Prometheus HTTP server on the desired port, for instance 9100
         start_http_server(PROM_PORT, addr='::', registry=r)
 
-    # Check if Prometheus is running
-    is_prometheus_running()
+    # Check if Prometheus is running, without holding up the start-up
+    threading.Thread(target=is_prometheus_running, name="prometheus-check", daemon=True).start()
+
+def warm_up():
+    """
+    Start the heavy subsystems that are otherwise initialized on first use.
+    """
+
+    # Decoders of Protobuf-encoded requests
+    from api.v1 import nano_pb2
 
-# As uvicorn does not execute the code inside `if __name__ == "__main__":`, 
-# prometheus initialization must be put outside of the block: 
-initialize_prometheus()
+    warm_up_hook.run(faas_manager, blob_cache)
 
-# Uvicorn startup (only when running this script directly)
-if __name__ == "__main__":
+# Runs under uvicorn whether or not it executes the `if __name__ == "__main__":`
+# block, and not when the module is merely imported (tests, worker processes)
+@app.on_event("startup")
+def on_startup():
+    # Workers of a multi-worker deployment are exported by the main process
+    if WORKER_ARGV_ENV not in os.environ:
+        try:
+            initialize_prometheus()
+        except OSError as e:
+            cognit_logger.error(f"Unable to start Prometheus exporter on port {PROM_PORT}: {e}")
+
+    readiness.run_in_background("warmup", warm_up)
+    readiness.complete("startup")
+
+@app.on_event("shutdown")
+def on_shutdown():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Drop the live gauges of this worker from the aggregated metrics
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(os.getpid())
+
+def build_parser() -> argparse.ArgumentParser:
+
+    # Imported here, the broker clients are not needed to import the app
+    from modules._async_rabbitmq_client import AsyncRabbitMQClient
 
     # Create parser
     parser = argparse.ArgumentParser(description="Arguments for main.py")
 
     # Definir argumentos
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Host address")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Uvicorn worker processes; more than 1 needs --result-store sqlite")
+    parser.add_argument("--task-db-path", type=str, default=SharedTaskRegistry.TASK_DB_PATH,
+                        help="SQLite database where the workers share the async tasks in flight")
+    parser.add_argument("--prometheus-multiproc-dir", type=str, default=PROMETHEUS_MULTIPROC_DIR,
+                        help="Directory where the workers write their metrics")
     parser.add_argument("--flavour", type=str, required=True, help="Service flavour")
     parser.add_argument("--broker", type=str, required=True, help="RabbitMQ broker address")
     parser.add_argument("--port", type=int, default=8000, help="Server port")
+    parser.add_argument("--broker-mode", type=str, choices=["thread", "asyncio"], default="thread",
+                        help="Consume the broker from a dedicated thread or inside the server event loop")
+    parser.add_argument("--broker-max-in-flight", type=int, default=AsyncRabbitMQClient.MAX_IN_FLIGHT,
+                        help="Messages processed concurrently in asyncio broker mode")
+
+    parser.add_argument("--sync-max-queue", type=int, default=sync_admission.max_queue,
+                        help="Sync executions allowed to wait before new ones are rejected with 429")
+    parser.add_argument("--async-pool", type=str, choices=FaasManager.POOL_TYPES, default=faas_manager.pool,
+                        help="Run async executions on a pool of threads or of processes")
+    parser.add_argument("--async-workers", type=int, default=faas_manager.max_workers,
+                        help="Async executions run at the same time")
+    parser.add_argument("--dask-workers", type=int, default=None,
+                        help="Worker processes of the local Dask cluster used by --async-pool dask (defaults to --async-workers)")
+    parser.add_argument("--dask-threads-per-worker", type=int, default=1,
+                        help="Async executions run at the same time by each Dask worker")
+    parser.add_argument("--dask-memory-limit", type=str, default="auto",
+                        help="Memory of each Dask worker (e.g. 2GB) before spilling to disk")
+    parser.add_argument("--dask-spill-dir", type=str, default=None,
+                        help="Directory where Dask workers spill to disk")
+    parser.add_argument("--async-max-concurrency", type=int, default=None,
+                        help="Async executions expected to run at the same time (defaults to --async-workers)")
+    parser.add_argument("--async-max-queue", type=int, default=async_admission.max_queue,
+                        help="Async executions allowed to wait before new ones are rejected with 429")
+
+    parser.add_argument("--exec-cpu-limit", type=int, default=0,
+                        help="CPU seconds a function may consume before being killed (0 for no limit)")
+    parser.add_argument("--exec-memory-limit-mb", type=int, default=0,
+                        help="Memory in MiB a function may allocate (0 for no limit)")
+    parser.add_argument("--result-store", type=str, choices=["memory", "sqlite"], default="memory",
+                        help="Where async results are kept: in memory, or in SQLite to survive restarts")
+    parser.add_argument("--result-store-path", type=str, default=SqliteResultStore.RESULT_DB_PATH,
+                        help="SQLite database of the async results")
+    parser.add_argument("--result-spill-dir", type=str, default=DiskSpill.SPILL_PATH,
+                        help="Directory where large async results are spilled")
+    parser.add_argument("--result-spill-threshold", type=int, default=ResultStore.SPILL_THRESHOLD,
+                        help="Size in bytes from which async results are spilled instead of kept inline")
+    parser.add_argument("--result-spill-minio-endpoint", type=str, default=None,
+                        help="Spill large async results to this MinIO endpoint instead of the local disk "
+                             "(credentials from MINIO_ACCESS_KEY and MINIO_SECRET_KEY)")
+    parser.add_argument("--result-spill-minio-bucket", type=str, default="cognit-results",
+                        help="MinIO bucket of the spilled async results")
+    parser.add_argument("--warmup-imports", type=str, default=",".join(WarmUp.DEFAULT_MODULES),
+                        help="Comma-separated modules imported in the server and pool workers at start-up")
+    parser.add_argument("--worker-start-method", type=str, choices=WorkerProcess.START_METHODS, default=WorkerProcess.START_METHOD,
+                        help="How worker processes are started: forked from the server, or from a zygote "
+                             "(forkserver) that preloads the --warmup-imports modules")
+    parser.add_argument("--warmup-functions", type=str, default=None,
+                        help="JSON file with the functions ({\"lang\", \"fc\"} objects) declared at start-up")
+    parser.add_argument("--blob-cache-dir", type=str, default=BlobCache.BLOB_PATH,
+                        help="Directory of the disk tier of the blob cache")
+    parser.add_argument("--code-cache-entries", type=int, default=code_cache.max_entries,
+                        help="Compiled Python sources of Protobuf requests kept in the code cache")
+
+    return parser
+
+def configure(args: argparse.Namespace):
+    """
+    Configure the runtime from its command line arguments, in the server
+    process or in each worker process of a multi-worker deployment.
+    """
 
-    # Parse arguments
-    args = parser.parse_args()
+    # Imported here, the broker clients are not needed to import the app
+    from modules._async_rabbitmq_client import AsyncRabbitMQClient
+    from modules._rabbitmq_client import RabbitMQClient
+
+    sync_admission.configure(max_queue=args.sync_max_queue)
+    faas_manager.configure(pool=args.async_pool, max_workers=args.async_workers)
+    if args.async_pool == "dask":
+        faas_manager.configure_dask(
+            n_workers=args.dask_workers or args.async_workers,
+            threads_per_worker=args.dask_threads_per_worker,
+            memory_limit=args.dask_memory_limit,
+            local_directory=args.dask_spill_dir,
+        )
+    async_admission.configure(max_concurrency=args.async_max_concurrency or faas_manager.max_workers, max_queue=args.async_max_queue)
+    default_limits.configure(cpu_seconds=args.exec_cpu_limit, memory_bytes=args.exec_memory_limit_mb * 1024 * 1024)
+    code_cache.configure(max_entries=args.code_cache_entries)
+    blob_cache.configure(directory=args.blob_cache_dir)
+
+    warm_up_hook.configure(
+        modules=[module for module in args.warmup_imports.split(",") if module],
+        functions_path=args.warmup_functions,
+    )
+    WorkerProcess.configure(start_method=args.worker_start_method, preload=warm_up_hook.modules)
+
+    if args.result_spill_minio_endpoint:
+        from modules._minio_client import MinioClient
+        minio_client = MinioClient(
+            args.result_spill_minio_endpoint,
+            os.environ.get("MINIO_ACCESS_KEY"),
+            os.environ.get("MINIO_SECRET_KEY"),
+        )
+        result_spill = MinioSpill(minio_client, args.result_spill_minio_bucket)
+    else:
+        result_spill = DiskSpill(args.result_spill_dir)
+    if args.result_store == "sqlite":
+        set_result_store(SqliteResultStore(args.result_store_path, spill=result_spill, spill_threshold=args.result_spill_threshold))
+    else:
+        set_result_store(ResultStore(spill=result_spill, spill_threshold=args.result_spill_threshold))
     
-    cognit_logger.info(f"Starting RabbitMQ client in queue: {args.flavour}...")
-    rabbitmq_client = RabbitMQClient(host=args.broker, queue=args.flavour)
-    client_process = threading.Thread(target=rabbitmq_client.run, daemon=True)
-    client_process.start()
+    cognit_logger.info(f"Starting RabbitMQ client in queue: {args.flavour} ({args.broker_mode} mode)...")
+    if args.broker_mode == "asyncio":
+        rabbitmq_client = AsyncRabbitMQClient(
+            host=args.broker,
+            queue=args.flavour,
+            execute=run_sync_execution,
+            max_in_flight=args.broker_max_in_flight,
+            submit_async=submit_async_execution
+        )
+        app.add_event_handler("startup", rabbitmq_client.start)
+        app.add_event_handler("shutdown", rabbitmq_client.stop)
+    else:
+        rabbitmq_client = RabbitMQClient(host=args.broker, queue=args.flavour, submit_async=submit_async_execution)
+        client_process = threading.Thread(target=rabbitmq_client.run, daemon=True)
+        client_process.start()
+
+    readiness.add_check(
+        "broker",
+        lambda: (rabbitmq_client.is_connected(), f"queue {args.flavour} {'connected' if rabbitmq_client.is_connected() else 'disconnected'}"),
+    )
+
+    if args.workers > 1:
+        # Async tasks of every worker can be looked up and cancelled from any of them
+        shared_tasks = SharedTaskRegistry(args.task_db_path)
+        faas_manager.configure_shared_state(shared_tasks)
+        shared_tasks.watch_cancel_requests(lambda task_uuid: faas_manager.cancel_task(task_uuid=task_uuid))
+
+def serve_workers(args: argparse.Namespace, argv: list):
+    """
+    Run the API in several uvicorn worker processes. Each one imports this
+    module and configures itself from the same arguments, shares async task
+    state through SQLite and writes its metrics for the Prometheus exporter
+    of this process.
+    """
+
+    os.makedirs(args.prometheus_multiproc_dir, exist_ok=True)
+    # Metrics of the workers of a previous run
+    for name in os.listdir(args.prometheus_multiproc_dir):
+        if name.endswith(".db"):
+            os.remove(os.path.join(args.prometheus_multiproc_dir, name))
+
+    # Read by the workers when they import prometheus_client and this module
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = args.prometheus_multiproc_dir
+    os.environ[WORKER_ARGV_ENV] = json.dumps(argv)
+
+    try:
+        initialize_prometheus(multiprocess=True)
+    except OSError as e:
+        cognit_logger.error(f"Unable to start Prometheus exporter on port {PROM_PORT}: {e}")
+
+    cognit_logger.info(f"Starting Uvicorn server in {args.host}:{args.port} with {args.workers} workers...")
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+# Worker process of a multi-worker deployment, importing the app by name
+if __name__ == "main" and WORKER_ARGV_ENV in os.environ:
+    configure(build_parser().parse_args(json.loads(os.environ[WORKER_ARGV_ENV])))
+
+# Uvicorn startup (only when running this script directly)
+if __name__ == "__main__":
+
+    parser = build_parser()
+    argv = sys.argv[1:]
+    args = parser.parse_args(argv)
+
+    if args.workers > 1 and args.result_store != "sqlite":
+        parser.error("--workers > 1 needs --result-store sqlite, so async results are shared by the workers")
+
+    if args.workers > 1:
+        serve_workers(args, argv)
+    else:
+        configure(args)
 
-    cognit_logger.info(f"Starting Uvicorn server in {args.host}:{args.port}...")
-    uvicorn.run(app, host=args.host, port=args.port)
\ No newline at end of file
+        cognit_logger.info(f"Starting Uvicorn server in {args.host}:{args.port}...")
+        uvicorn.run(app, host=args.host, port=args.port)
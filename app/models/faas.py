@@ -4,6 +4,13 @@ from typing import Any, Optional
 from pydantic import BaseModel, Field
 
 
+class ExecPriority(str, Enum):
+    CRITICAL = "CRITICAL"
+    HIGH = "HIGH"
+    NORMAL = "NORMAL"
+    BATCH = "BATCH"
+
+
 class ExecSyncParams(BaseModel):
     lang: str = Field(
         default="",
@@ -11,7 +18,7 @@ class ExecSyncParams(BaseModel):
     )
     fc: str = Field(
         default="",
-        description="Function to be offloaded",
+        description="Function to be offloaded, or a 'sha256:<digest>' reference to a cached blob",
     )
     fc_hash: str = Field(
         default="",
@@ -19,12 +26,41 @@ class ExecSyncParams(BaseModel):
     )
     params: list[str] = Field(
         default="",
-        description="List containing the serialized parameters by each device runtime transfered to the offloaded function",
+        description="List containing the serialized parameters by each device runtime transfered to the offloaded function. "
+                    "Any entry can be a 'sha256:<digest>' reference to a blob previously uploaded to the blob cache",
     )
     app_req_id: int = Field(
         default=0,
         description="Requirement ID taht belongs to current function",
     )
+    pb_params_list: bool = Field(
+        default=False,
+        description="Protobuf-encoded (C) functions only: params holds a single FaasResponse message carrying every parameter, "
+                    "instead of one MyParam message each",
+    )
+    priority: ExecPriority = Field(
+        default=ExecPriority.NORMAL,
+        description="Priority class of the execution, higher classes are dispatched first",
+    )
+    deadline_ms: int = Field(
+        default=0,
+        description="Maximum time in milliseconds the execution may wait to be dispatched before being shed (0 for no deadline)",
+    )
+    timeout_ms: int = Field(
+        default=0,
+        description="Maximum time in milliseconds the function may run before being killed (0 for no timeout)",
+    )
+    cpu_limit_s: int = Field(
+        default=0,
+        description="CPU time in seconds the function may consume, capped by the flavour limit (0 for the flavour limit)",
+    )
+    memory_limit_mb: int = Field(
+        default=0,
+        description="Memory in MiB the function may allocate, capped by the flavour limit (0 for the flavour limit)",
+    )
+
+# Large fields of the execution requests, handed through without element-wise validation
+PASSTHROUGH_FIELDS = ("fc", "params")
 
 class ExecutionMode(str, Enum):
     SYNC = "sync"
@@ -38,7 +74,7 @@ class ExecAsyncParams(BaseModel):
     )
     fc: str = Field(
         default="",
-        description="Function to be offloaded",
+        description="Function to be offloaded, or a 'sha256:<digest>' reference to a cached blob",
     )
     fc_hash: str = Field(
         default="",
@@ -46,7 +82,28 @@ class ExecAsyncParams(BaseModel):
     )
     params: list[str] = Field(
         default="",
-        description="List containing the serialized parameters by each device runtime transfered to the offloaded function",
+        description="List containing the serialized parameters by each device runtime transfered to the offloaded function. "
+                    "Any entry can be a 'sha256:<digest>' reference to a blob previously uploaded to the blob cache",
+    )
+    priority: ExecPriority = Field(
+        default=ExecPriority.NORMAL,
+        description="Priority class of the execution, higher classes are dispatched first",
+    )
+    deadline_ms: int = Field(
+        default=0,
+        description="Maximum time in milliseconds the execution may wait to be dispatched before being shed (0 for no deadline)",
+    )
+    timeout_ms: int = Field(
+        default=0,
+        description="Maximum time in milliseconds the function may run before being killed (0 for no timeout)",
+    )
+    cpu_limit_s: int = Field(
+        default=0,
+        description="CPU time in seconds the function may consume, capped by the flavour limit (0 for the flavour limit)",
+    )
+    memory_limit_mb: int = Field(
+        default=0,
+        description="Memory in MiB the function may allocate, capped by the flavour limit (0 for the flavour limit)",
     )
 
 
@@ -64,6 +121,9 @@ class FaasUuidStatus(BaseModel):
 class ExecReturnCode(Enum):
     SUCCESS = 0
     ERROR = -1
+    TIMEOUT = -2
+    CANCELLED = -3
+    RESOURCE_LIMIT = -4
 
 
 class ExecResponse(BaseModel):
@@ -94,6 +154,31 @@ class AsyncExecStatus(Enum):
     FAILED = "FAILED"
 
 
+class AsyncExecState(Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    FINISHED = "FINISHED"
+
+
+class AsyncExecProgress(BaseModel):
+    state: AsyncExecState = Field(
+        default=AsyncExecState.QUEUED,
+        description="Whether the task waits for a worker, runs or has finished",
+    )
+    time_in_state_s: float = Field(
+        default=0.0,
+        description="Seconds the task has been in its current state",
+    )
+    queued_s: float = Field(
+        default=0.0,
+        description="Seconds the task waited for a worker, so far if still queued",
+    )
+    running_s: float = Field(
+        default=0.0,
+        description="Seconds the task ran, so far if still running",
+    )
+
+
 class AsyncExecResponse(BaseModel):
     status: AsyncExecStatus = Field(
         default=AsyncExecStatus.WORKING,
@@ -107,6 +192,49 @@ class AsyncExecResponse(BaseModel):
         default=AsyncExecId(faas_task_uuid="000-000-000"),
         description="UUID of the offloaded function processing task",
     )
+    progress: Optional[AsyncExecProgress] = Field(
+        default=None,
+        description="Queueing and running times of the offloaded function processing task",
+    )
+
+
+class AsyncCancelResponse(BaseModel):
+    exec_id: AsyncExecId = Field(
+        default=AsyncExecId(faas_task_uuid="000-000-000"),
+        description="UUID of the offloaded function processing task",
+    )
+    cancelled: bool = Field(
+        default=False,
+        description="Whether the task was cancelled, false if it had already finished",
+    )
+
+
+class BlobNegotiation(BaseModel):
+    digests: list[str] = Field(
+        default=[],
+        description="SHA-256 digests of the payloads the client intends to reference",
+    )
+
+
+class BlobNegotiationResponse(BaseModel):
+    missing: list[str] = Field(
+        default=[],
+        description="Digests that are not cached in the Serverless Runtime and must be uploaded",
+    )
+
+
+class BlobUpload(BaseModel):
+    data: str = Field(
+        default="",
+        description="Base64 encoded payload to be stored in the blob cache",
+    )
+
+
+class BlobUploadResponse(BaseModel):
+    digest: str = Field(
+        default="",
+        description="SHA-256 digest under which the payload was stored",
+    )
 
 
 class Param(BaseModel):
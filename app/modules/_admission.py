@@ -0,0 +1,163 @@
+from prometheus_client import Counter, Gauge
+from modules._logger import CognitLogger
+
+from contextlib import contextmanager
+from threading import Lock
+import math
+import time
+
+cognit_logger = CognitLogger()
+
+# Gauges are summed over the live workers in multi-worker mode
+admission_in_flight_gauge = Gauge(
+    'sr_admission_in_flight',
+    'Executions admitted and not finished yet, running or queued',
+    labelnames=['endpoint'],
+    multiprocess_mode='livesum'
+)
+
+admission_queue_depth_gauge = Gauge(
+    'sr_admission_queue_depth',
+    'Admitted executions waiting for a free execution slot',
+    labelnames=['endpoint'],
+    multiprocess_mode='livesum'
+)
+
+admission_rejected_counter = Counter(
+    'sr_admission_rejected_total',
+    'Executions rejected because the concurrency and queue limits were reached',
+    labelnames=['endpoint']
+)
+
+class AdmissionRejectedError(Exception):
+    """
+    Raised when an execution is rejected by admission control.
+    """
+
+    def __init__(self, endpoint: str, retry_after: int):
+        super().__init__(f"Serverless Runtime saturated on {endpoint}, retry after {retry_after}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Bounds the executions accepted by an endpoint to its concurrency plus a
+    queue depth, rejecting the rest right away instead of letting them queue
+    until the client times out.
+
+    The Retry-After estimate divides the work ahead of a new request by the
+    observed service rate, an exponentially weighted average of the time
+    between completions while the endpoint is busy.
+    """
+
+    MAX_RETRY_AFTER = 60
+    EWMA_WEIGHT = 0.2
+
+    def __init__(self, endpoint: str, max_concurrency: int, max_queue: int):
+        """
+        Args:
+            endpoint (str): Name used in logs and metric labels.
+            max_concurrency (int): Executions that run at the same time.
+            max_queue (int): Executions allowed to wait for a free slot.
+        """
+
+        self.endpoint = endpoint
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.rejected = 0
+
+        self._lock = Lock()
+        self._busy_since = 0.0
+        self._departure_interval = None
+
+        admission_in_flight_gauge.labels(endpoint=endpoint).set(0)
+        admission_queue_depth_gauge.labels(endpoint=endpoint).set(0)
+
+    def configure(self, max_concurrency: int = None, max_queue: int = None):
+        with self._lock:
+            if max_concurrency is not None:
+                self.max_concurrency = max_concurrency
+            if max_queue is not None:
+                self.max_queue = max_queue
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.max_concurrency)
+
+    def service_rate(self) -> float:
+        """
+        Observed completions per second while busy, 0 if unknown yet.
+        """
+
+        interval = self._departure_interval
+        if not interval:
+            return 0.0
+        return 1 / interval
+
+    def retry_after(self) -> int:
+        """
+        Seconds until a rejected request could expect a free queue position.
+        """
+
+        rate = self.service_rate()
+        if rate == 0:
+            return 1
+        ahead = self.queue_depth + 1
+        return max(1, min(self.MAX_RETRY_AFTER, math.ceil(ahead / rate)))
+
+    def admit(self):
+        """
+        Account for a new execution.
+
+        Raises:
+            AdmissionRejectedError: If the concurrency and queue limits are reached.
+        """
+
+        with self._lock:
+            if self.in_flight >= self.max_concurrency + self.max_queue:
+                self.rejected += 1
+                retry_after = self.retry_after()
+                admission_rejected_counter.labels(endpoint=self.endpoint).inc()
+                cognit_logger.warning(f"Rejected execution on {self.endpoint}: {self.in_flight} in flight, retry after {retry_after}s")
+                raise AdmissionRejectedError(self.endpoint, retry_after)
+
+            if self.in_flight == 0:
+                # Start of a busy period, idle time is not service time
+                self._busy_since = time.monotonic()
+            self.in_flight += 1
+            self._update_gauges()
+
+    def release(self):
+        """
+        Account for a finished execution.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            interval = now - self._busy_since
+            self._busy_since = now
+
+            if self._departure_interval is None:
+                self._departure_interval = interval
+            else:
+                self._departure_interval += self.EWMA_WEIGHT * (interval - self._departure_interval)
+
+            self.in_flight -= 1
+            self._update_gauges()
+
+    @contextmanager
+    def admitted(self):
+        """
+        Context manager admitting an execution for the duration of the block.
+        """
+
+        self.admit()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _update_gauges(self):
+        admission_in_flight_gauge.labels(endpoint=self.endpoint).set(self.in_flight)
+        admission_queue_depth_gauge.labels(endpoint=self.endpoint).set(self.queue_depth)
@@ -0,0 +1,172 @@
+from modules._lru_store import MemoryLRUStore, DiskLRUStore
+from modules._logger import CognitLogger
+
+from typing import Iterable, Optional
+import hashlib
+import re
+
+cognit_logger = CognitLogger()
+
+class BlobNotFoundError(LookupError):
+    """
+    Raised when a payload references a blob that is not cached.
+    """
+
+    def __init__(self, digest: str):
+        super().__init__(f"Blob {digest} not found in cache, upload it first")
+        self.digest = digest
+
+class BlobCache:
+    """
+    Content-addressed cache of function and parameter payloads.
+
+    Blobs are the raw (base64 decoded) payload bytes and are addressed by the
+    hex SHA-256 digest of those bytes. Clients refer to a cached blob by sending
+    "sha256:<digest>" instead of the base64 payload. Since ':' is not part of the
+    base64 alphabet, references can not be confused with inline payloads.
+
+    Recently used blobs are kept in memory; every blob is also written to a disk
+    tier so it survives memory eviction and restarts.
+    """
+
+    REF_PREFIX = "sha256:"
+    BLOB_PATH = "/var/lib/cognit/blobs"
+    MEMORY_MAX_BYTES = 256 * 1024 * 1024
+    DISK_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+    _DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+    def __init__(
+        self,
+        directory: Optional[str] = BLOB_PATH,
+        memory_max_bytes: int = MEMORY_MAX_BYTES,
+        disk_max_bytes: int = DISK_MAX_BYTES,
+    ):
+        """
+        Args:
+            directory (str, optional): Directory of the disk tier, None for a memory-only cache.
+            memory_max_bytes (int): Byte budget of the memory tier.
+            disk_max_bytes (int): Byte budget of the disk tier.
+        """
+
+        self.memory = MemoryLRUStore(memory_max_bytes)
+        self.disk: Optional[DiskLRUStore] = None
+
+        if directory is not None:
+            self.configure(directory, disk_max_bytes)
+
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, directory: str, disk_max_bytes: int = DISK_MAX_BYTES):
+        """
+        Set up the disk tier, creating its directory if needed.
+        """
+
+        try:
+            self.disk = DiskLRUStore(directory, disk_max_bytes)
+        except OSError as e:
+            cognit_logger.warning(f"Blob cache disk tier disabled: {e}")
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @classmethod
+    def is_valid_digest(cls, digest: str) -> bool:
+        return cls._DIGEST_RE.match(digest) is not None
+
+    @classmethod
+    def is_ref(cls, payload: str) -> bool:
+        return payload.startswith(cls.REF_PREFIX)
+
+    @classmethod
+    def ref_to_digest(cls, ref: str) -> str:
+        return ref[len(cls.REF_PREFIX):]
+
+    def contains(self, digest: str) -> bool:
+        if not self.is_valid_digest(digest):
+            return False
+        return digest in self.memory or (self.disk is not None and digest in self.disk)
+
+    def missing(self, digests: Iterable[str]) -> list[str]:
+        """
+        Return the digests, in request order, that are not cached.
+        """
+
+        return [d for d in dict.fromkeys(digests) if not self.contains(d)]
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """
+        Return the blob for the digest or None if it is not cached.
+        Blobs found on disk are promoted to the memory tier.
+        """
+
+        if not self.is_valid_digest(digest):
+            return None
+
+        data = self.memory.get(digest)
+
+        if data is None and self.disk is not None:
+            data = self.disk.read(digest)
+            if data is not None:
+                self.memory.put(digest, data)
+
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return data
+
+    def resolve(self, payload: str) -> Optional[bytes]:
+        """
+        Return the blob referenced by a "sha256:<digest>" payload, or None if
+        the payload is not a reference.
+
+        Raises:
+            BlobNotFoundError: If the payload is a reference to a blob not cached.
+        """
+
+        if not self.is_ref(payload):
+            return None
+
+        digest = self.ref_to_digest(payload)
+        data = self.get(digest)
+
+        if data is None:
+            raise BlobNotFoundError(digest)
+
+        return data
+
+    def put(self, data: bytes, digest: Optional[str] = None) -> str:
+        """
+        Store a blob.
+
+        Args:
+            data (bytes): Raw blob content.
+            digest (str, optional): Digest announced by the client, checked against the content.
+
+        Returns:
+            str: Digest of the stored blob.
+
+        Raises:
+            ValueError: If the announced digest does not match the content.
+        """
+
+        computed = self.digest(data)
+
+        if digest is not None and digest != computed:
+            raise ValueError(f"Digest mismatch: expected {digest}, got {computed}")
+
+        self.memory.put(computed, data)
+
+        if self.disk is not None and computed not in self.disk:
+            try:
+                self.disk.put(computed, data)
+            except OSError as e:
+                cognit_logger.warning(f"Unable to write blob {computed} to disk: {e}")
+
+        cognit_logger.debug(f"Stored blob {computed} ({len(data)} bytes)")
+
+        return computed
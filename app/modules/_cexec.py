@@ -1,5 +1,6 @@
 from modules._logger import CognitLogger
 from modules._executor import *
+from modules._worker_process import ResourceLimits
 from models.faas import *
 
 from typing import Any, Optional
@@ -20,11 +21,13 @@ class FuncStruct:
 
 class CExec(Executor):
 
-    def __init__(self, fc: str, params: list[str]):
+    def __init__(self, fc: str, params: list[str], timeout: Optional[float] = None, limits: Optional[ResourceLimits] = None):
 
         self.lang = "C"
         self.fc = fc
         self.params_b64 = params
+        self.timeout = timeout
+        self.limits = limits
         self.params: list[Param]
         self.process_manager: Any
 
@@ -44,7 +47,8 @@ class CExec(Executor):
         # Execution times
         self.start_pyexec_time = 0.0
         self.end_pyexec_time = 0.1
-        self.process: subprocess.Popen
+        self.process: Optional[subprocess.Popen] = None
+        self.killed = False
 
     def raw_params_to_param_type(self):
         self.params = []
@@ -236,10 +240,34 @@ class CExec(Executor):
 
             cognit_logger.debug(f"cling_code: {cling_code}")
 
-            self.process = subprocess.Popen(
-                [clingPath], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
-            )
-            output, error = self.process.communicate(input=cling_code)
+            self.process = subprocess.Popen([clingPath], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            if self.limits:
+                # Set on the child once spawned, as preexec_fn is unsafe in a threaded server.
+                # The function only runs once written to Cling's stdin, so never unlimited.
+                # Cling starts from a fresh address space, the memory limit is absolute.
+                try:
+                    self.limits.apply(relative=False, pid=self.process.pid)
+                except OSError:
+                    self.process.kill()
+                    self.process.wait()
+                    raise
+            if self.cancelled:
+                self.kill()
+
+            try:
+                output, error = self.process.communicate(input=cling_code, timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                cognit_logger.error(f"C function timed out after {self.timeout}s, killing Cling")
+                self.kill()
+                self.process.communicate()
+                return self._fail(ExecReturnCode.TIMEOUT, f"Execution timed out after {self.timeout}s")
+
+            if self.cancelled:
+                return self._fail(ExecReturnCode.CANCELLED, "Execution cancelled")
+
+            breach = self.limits.breach(self.process.returncode, self.killed) if self.limits else None
+            if breach:
+                return self._fail(ExecReturnCode.RESOURCE_LIMIT, breach)
 
             listResult = output.split()
 
@@ -262,18 +290,46 @@ class CExec(Executor):
             cognit_logger.info(f"Run C fuction: {self.fc}")
             cognit_logger.info(f"Result: {self.res}")
             self.end_pyexec_time = time.time()
+            self.ret_code = ExecReturnCode.SUCCESS
+            self.err = None
             return self
         
         except Exception as e:
 
             cognit_logger.error(f"Error while running C function: {e}")
-            self.res = None
-            self.end_pyexec_time = time.time()
-            self.err = "Error executing C function: " + str(e)
-            self.ret_code = ExecReturnCode.ERROR
+            return self._fail(ExecReturnCode.ERROR, "Error executing C function: " + str(e))
+
+    def _fail(self, ret_code: ExecReturnCode, err: str):
+
+        self.res = None
+        self.end_pyexec_time = time.time()
+        self.err = err
+        self.ret_code = ret_code
+
+        return self
+
+    def cancel(self):
+        """
+        Cancel the execution, killing the Cling subprocess if it is running.
+        """
+
+        super().cancel()
+        self.kill()
+
+    def kill(self):
+        if self.process is not None and self.process.poll() is None:
+            cognit_logger.warning(f"Killing Cling process {self.process.pid}")
+            self.killed = True
+            self.process.kill()
 
     def get_result(self):
 
         cognit_logger.debug("Get C result func")
         cognit_logger.info(f"Result: {self.res}")
         return self.res
+
+    def get_err(self):
+        return self.err
+
+    def get_ret_code(self):
+        return self.ret_code
@@ -0,0 +1,109 @@
+from prometheus_client import Counter, Gauge
+from modules._logger import CognitLogger
+
+from collections import OrderedDict
+from types import CodeType
+from typing import Callable, Tuple
+from threading import Lock
+import builtins
+import hashlib
+import re
+
+cognit_logger = CognitLogger()
+
+code_cache_hits_counter = Counter(
+    'sr_code_cache_hits',
+    'Function sources found compiled in the code cache'
+)
+
+code_cache_misses_counter = Counter(
+    'sr_code_cache_misses',
+    'Function sources compiled because they were not in the code cache'
+)
+
+code_cache_evictions_counter = Counter(
+    'sr_code_cache_evictions',
+    'Compiled functions evicted from the code cache'
+)
+
+code_cache_entries_gauge = Gauge(
+    'sr_code_cache_entries',
+    'Compiled functions held in the code cache',
+    multiprocess_mode='livesum'
+)
+
+class CodeCache:
+    """
+    Compiled Python function sources, as delivered in the fc_code of Protobuf requests.
+
+    Code objects are kept by SHA-256 of the source with LRU eviction, so repeated
+    calls of a function skip the regex lookup and compile(). Every load executes
+    the code object in a fresh namespace of its own: functions never see or
+    overwrite the runtime's globals, nor state left by a previous call.
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        """
+        Args:
+            max_entries (int): Maximum number of compiled functions kept.
+        """
+
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[CodeType, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def configure(self, max_entries: int):
+        with self._lock:
+            self.max_entries = max_entries
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, source: str) -> Callable:
+        """
+        Return the first function defined by a source, defined in a new namespace.
+
+        Raises:
+            ValueError: If the source defines no function.
+            SyntaxError: If the source does not compile.
+        """
+
+        digest = hashlib.sha256(source.encode()).hexdigest()
+        code, fc_name = self._compiled(digest, source)
+
+        namespace = {"__builtins__": builtins, "__name__": f"faas_{digest[:16]}"}
+        exec(code, namespace)
+
+        return namespace[fc_name]
+
+    def _compiled(self, digest: str, source: str) -> Tuple[CodeType, str]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                code_cache_hits_counter.inc()
+                return entry
+
+        match = re.search(r"def\s+(\w+)\s*\(", source)
+        if match is None:
+            raise ValueError("No function definition found in the function code")
+
+        entry = (compile(source, f"<faas {digest[:16]}>", "exec"), match.group(1))
+        code_cache_misses_counter.inc()
+
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            self._evict()
+
+        return entry
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            _, (_, fc_name) = self._entries.popitem(last=False)
+            code_cache_evictions_counter.inc()
+            cognit_logger.debug(f"Evicted compiled function {fc_name} from the code cache")
+        code_cache_entries_gauge.set(len(self._entries))
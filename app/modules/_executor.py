@@ -1,11 +1,30 @@
 from modules._logger import CognitLogger
+from models.faas import ExecReturnCode
 
 cognit_logger = CognitLogger()
 
 
 class Executor:
+    cancelled = False
+    fc_hash = ""
+
     def run(self):
         cognit_logger.debug("Run base fuction")
 
     def get_result(self):
         cognit_logger.debug("Get base result func")
+
+    def cancel(self):
+        """
+        Ask the execution to stop. Executors that can kill a running function override this.
+        """
+        self.cancelled = True
+
+    def reject(self, err: str, ret_code: ExecReturnCode = ExecReturnCode.ERROR):
+        """
+        Mark the execution as failed without running it.
+        """
+        self.res = None
+        self.ret_code = ret_code
+        self.err = err
+        return self
@@ -1,10 +1,23 @@
+import copy
+import heapq
+import importlib
+import itertools
+import math
+import os
+import time
 import uuid
+from concurrent.futures import Executor as PoolExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from collections import OrderedDict
 from enum import Enum
-from typing import Any, Dict, Optional, Tuple
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
 
-from dask.distributed import Client, Future
-from fastapi import HTTPException
+import cloudpickle
+from modules._scheduler import PRIORITY_RANK
 from modules._executor import Executor
+from modules._worker_process import WorkerProcess
+from modules._task_registry import SharedTaskRegistry
+from models.faas import AsyncExecProgress, AsyncExecState, ExecPriority, ExecReturnCode
 from modules._logger import CognitLogger
 
 TaskId = str
@@ -18,50 +31,488 @@ class TaskState(Enum):
     FAILED = "FAILED"
 
 
+def run_before_deadline(executor: Executor, deadline: Optional[float]) -> Executor:
+    """
+    Run the executor, or shed it if it was cancelled or its dispatch deadline already passed.
+    """
+    if executor.cancelled:
+        return executor.reject("Execution cancelled", ExecReturnCode.CANCELLED)
+    if deadline is not None and time.monotonic() >= deadline:
+        cognit_logger.warning("Async task shed: deadline exceeded before dispatch")
+        return executor.reject("Deadline exceeded before dispatch")
+    return executor.run()
+
+
+# Executors by task, looked up by the running task so that cancelling the
+# executor kept by the manager reaches the one being run
+_task_executors: Dict[TaskId, Executor] = {}
+
+
+def run_task(task_uuid: TaskId, deadline: Optional[float]) -> Executor:
+    return run_before_deadline(_task_executors[task_uuid], deadline)
+
+
+def run_dask_task(executor: Executor, fc: Callable, deadline: Optional[float]) -> Executor:
+    """
+    Run a task in a Dask worker. The function is shipped apart from the
+    executor, as a scattered value shared by every task of the same function.
+    """
+    executor.fc = fc
+    executor = run_before_deadline(executor, deadline)
+    # Only the outcome travels back
+    executor.fc = None
+    return executor
+
+
+def import_modules(modules: Tuple[str, ...]) -> list:
+    """
+    Import modules ahead of the functions that use them, returning the ones
+    that could not be imported.
+    """
+
+    missing = []
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            missing.append(module)
+    return missing
+
+def run_pickled_task(pickled_executor: bytes, deadline: Optional[float]) -> bytes:
+    """
+    Run a task in a pool process. Executors hold dynamically deserialized
+    functions, which only cloudpickle can ship to and back from the process.
+    """
+    executor = cloudpickle.loads(pickled_executor)
+    return cloudpickle.dumps(run_before_deadline(executor, deadline))
+
+
 class FaasManager:
-    def __init__(self):
-        # Dictionary with the proccesses (uuid, task_id)
+    """
+    Runs asynchronous executions on a pool of worker threads or processes.
+
+    Tasks wait in a queue ordered by priority class and, within a class, by
+    deadline, and are handed to the pool as workers become free. The pool is
+    created on the first task, so importing the manager costs nothing.
+
+    Thread workers share the server process; a Python function is still
+    killable as it runs in its own worker process (see PyExec). Process
+    workers run pure Python code in parallel, but a running task can not be
+    cancelled as its executor lives in another process.
+
+    The "dask" pool runs tasks on a local Dask cluster of worker processes,
+    with memory limits and spilling to disk. Each function is scattered to the
+    cluster once and reused by the following tasks with the same hash.
+    """
+
+    POOL_TYPES = ("thread", "process", "dask")
+    # Functions kept scattered on the Dask cluster
+    SCATTER_CACHE_SIZE = 128
+
+    def __init__(self, pool: str = "thread", max_workers: Optional[int] = None):
+        """
+        Args:
+            pool (str): "thread" or "process" worker pool.
+            max_workers (int, optional): Tasks run at the same time, the CPU count by default.
+        """
+
+        # Dictionary with the tasks (uuid, future)
         self.task_map: Dict[TaskId, Future] = {}
-        #  dask.config.set(scheduler="threads")
-        self.client = Client(processes=False)
+        # time.monotonic() of submission, start and end of each task
+        self.task_times: Dict[TaskId, list] = {}
+        # Executors of the tasks, to cancel them while queued or running
+        self.executor_map: Dict[TaskId, Executor] = _task_executors
+        self.pool = pool
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.running = 0
+        # Lifecycle of the tasks shared with the other worker processes, if any
+        self.shared_tasks: Optional[SharedTaskRegistry] = None
+
+        self._pool_executor: Optional[PoolExecutor] = None
+        self._dask_cluster = None
+        self._dask_options = {"n_workers": self.max_workers, "threads_per_worker": 1, "memory_limit": "auto"}
+        self._scattered_fcs: OrderedDict = OrderedDict()
+        self._waiting: list = []
+        self._seq = itertools.count()
+        self._lock = Lock()
+
+        self._check_pool_type(pool)
+
+    def configure(self, pool: Optional[str] = None, max_workers: Optional[int] = None):
+        """
+        Change the worker pool. Tasks already running finish on the previous one.
+        """
+
+        with self._lock:
+            if pool is not None:
+                self._check_pool_type(pool)
+                self.pool = pool
+            if max_workers is not None:
+                self.max_workers = max_workers
+
+            self._close_pool(wait=False)
+
+    def configure_dask(
+        self,
+        n_workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        memory_limit: Optional[str] = None,
+        local_directory: Optional[str] = None,
+    ):
+        """
+        Set up the local Dask cluster used by the "dask" pool.
 
-    def add_task(self, executor: Executor) -> TaskId:
+        Args:
+            n_workers (int, optional): Worker processes of the cluster.
+            threads_per_worker (int, optional): Tasks run at the same time by each worker.
+            memory_limit (str, optional): Memory of each worker (e.g. "2GB"), beyond
+                which its data is spilled to disk and, ultimately, the worker restarted.
+            local_directory (str, optional): Directory where workers spill to disk.
+        """
+
+        options = {
+            "n_workers": n_workers,
+            "threads_per_worker": threads_per_worker,
+            "memory_limit": memory_limit,
+            "local_directory": local_directory,
+        }
+
+        with self._lock:
+            self._dask_options.update({key: value for key, value in options.items() if value is not None})
+            if self.pool == "dask":
+                self.max_workers = self._dask_options["n_workers"] * self._dask_options["threads_per_worker"]
+            self._close_pool(wait=False)
+
+    def start(self):
+        """
+        Start the worker pool now instead of on the first task, e.g. to keep
+        the start of a Dask cluster off the first request.
+        """
+
+        with self._lock:
+            self._get_pool()
+
+    def warm_up(self, modules: Tuple[str, ...] = ()) -> list:
+        """
+        Start the pool, spawn all its workers and import the given modules in
+        them, so the first tasks do not pay for it.
+
+        Returns:
+            list: Modules that could not be imported.
+        """
+
+        with self._lock:
+            pool = self._get_pool()
+
+        # Worker processes forked later (isolated executions) inherit them
+        missing = import_modules(modules)
+
+        if self.pool == "process":
+            # One task per worker makes the pool spawn all of them
+            wait([pool.submit(import_modules, modules) for _ in range(self.max_workers)])
+        elif self.pool == "dask":
+            pool.run(import_modules, modules)
+
+        return missing
+
+    def health(self) -> Tuple[bool, str]:
+        """
+        Tell whether the worker pool can run tasks.
+        """
+
+        with self._lock:
+            pool = self._pool_executor
+
+        if pool is None:
+            return True, f"{self.pool} pool not started"
+        if self.pool == "dask":
+            return pool.status == "running", f"dask client {pool.status}"
+        if getattr(pool, "_broken", False):
+            return False, f"{self.pool} pool broken"
+        if getattr(pool, "_shutdown", False) or getattr(pool, "_shutdown_thread", False):
+            return False, f"{self.pool} pool shut down"
+
+        return True, f"{self.pool} pool running {self.running}/{self.max_workers} tasks"
+
+    def configure_shared_state(self, shared_tasks: Optional[SharedTaskRegistry]):
+        """
+        Record the lifecycle of the tasks in a registry shared by the worker
+        processes of a multi-worker deployment.
+        """
+
+        self.shared_tasks = shared_tasks
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            self._close_pool(wait=wait)
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._waiting)
+
+    def add_task(
+        self,
+        executor: Executor,
+        on_done: Optional[Callable[[Future], None]] = None,
+        priority: ExecPriority = ExecPriority.NORMAL,
+        deadline: Optional[float] = None,
+        fc_hash: str = "",
+    ) -> TaskId:
         task_uuid = str(uuid.uuid1())
-        task: Future = self.client.submit(executor.run)
+        task: Future = Future()
+        # Lets completion callbacks tell which task finished
+        task.task_uuid = task_uuid
+
+        # Identifies the function when it is shipped to a Dask cluster
+        executor.fc_hash = fc_hash
+        self.executor_map[task_uuid] = executor
         self.task_map[task_uuid] = task
+        self.task_times[task_uuid] = [time.monotonic(), None, None]
+        self._share("add", task_uuid, self.task_times[task_uuid][0])
+
+        # Called with the finished future from a pool thread
+        if on_done is not None:
+            task.add_done_callback(on_done)
+
+        with self._lock:
+            rank = PRIORITY_RANK[priority]
+            order = deadline if deadline is not None else math.inf
+            heapq.heappush(self._waiting, (rank, order, next(self._seq), task_uuid, deadline))
+
+        self._dispatch()
 
         return task_uuid
 
-    # Return a tuple with the status and the result as Any
+    def cancel_task(self, task_uuid: TaskId) -> Optional[bool]:
+        """
+        Cancel a task. A queued task finishes without running and a running
+        one is killed if its executor supports it; either way the task ends
+        with the CANCELLED return code.
+
+        Returns:
+            Optional[bool]: None if the task is unknown, False if it already
+                finished or runs in another process.
+        """
+        if task_uuid not in self.task_map:
+            return None
+        task = self.task_map[task_uuid]
+        if task.done():
+            return False
+        if self.pool != "thread" and task.running():
+            cognit_logger.warning(f"Task {task_uuid} runs in another process and can not be cancelled")
+            return False
+        cognit_logger.info(f"Cancelling task {task_uuid}")
+        self.executor_map[task_uuid].cancel()
+        return True
+
+    def release_task(self, task_uuid: TaskId):
+        """
+        Forget a finished task whose outcome was saved elsewhere, so neither its
+        executor and result nor its progress times stay in memory.
+        """
+        self.task_map.pop(task_uuid, None)
+        self.executor_map.pop(task_uuid, None)
+        self.task_times.pop(task_uuid, None)
+        self._share("remove", task_uuid)
+
+    def get_task_future(self, task_uuid: TaskId) -> Optional[Future]:
+        """
+        Return the future of a task, completed when the task finishes.
+        """
+        return self.task_map.get(task_uuid)
+
+    def get_task_progress(self, task_uuid: TaskId) -> Optional[AsyncExecProgress]:
+        """
+        Return where a task is in its lifecycle, without waiting on it.
+        """
+        times = self.task_times.get(task_uuid)
+        if times is None:
+            return None
+
+        now = time.monotonic()
+        submitted, started, finished = times
+
+        if started is None:
+            return AsyncExecProgress(state=AsyncExecState.QUEUED, time_in_state_s=now - submitted, queued_s=now - submitted)
+
+        queued_s = started - submitted
+
+        if finished is None:
+            return AsyncExecProgress(state=AsyncExecState.RUNNING, time_in_state_s=now - started, queued_s=queued_s, running_s=now - started)
+
+        return AsyncExecProgress(
+            state=AsyncExecState.FINISHED,
+            time_in_state_s=now - finished,
+            queued_s=queued_s,
+            running_s=finished - started,
+        )
+
+    # Return a tuple with the status and the result as Any.
+    # Never blocks: exceptions are only retrieved from finished tasks
     def get_task_status(self, task_uuid: TaskId) -> Optional[Tuple[TaskState, Any]]:
-        if task_uuid in self.task_map:
-            if self.task_map[task_uuid].status == "pending":
-                if self.task_map[task_uuid].exception() is not None:
-                    cognit_logger.info(
-                        "Status: {}; Error: {}".format(
-                            self.task_map[task_uuid].status,
-                            self.task_map[task_uuid].exception(),
-                        )
-                    )
-                return TaskState.WORKING, None
-            elif self.task_map[task_uuid].status == "finished":
-                if self.task_map[task_uuid].exception() is not None:
-                    cognit_logger.info(
-                        "Status: {}; Error: {}".format(
-                            self.task_map[task_uuid].status,
-                            self.task_map[task_uuid].exception(),
-                        )
-                    )
-                task_executor = self.task_map[task_uuid].result()
-                return TaskState.OK, task_executor
+        if task_uuid not in self.task_map:
+            return None
+
+        task = self.task_map[task_uuid]
+
+        if not task.done():
+            return TaskState.WORKING, None
+
+        if task.exception() is not None:
+            cognit_logger.info("Task {} failed; Error: {}".format(task_uuid, task.exception()))
+            return TaskState.FAILED, None
+
+        return TaskState.OK, task.result()
+
+    def _dispatch(self):
+        """
+        Hand queued tasks to the pool while it has free workers.
+        """
+
+        with self._lock:
+            dispatched = []
+            while self._waiting and self.running < self.max_workers:
+                _, _, _, task_uuid, deadline = heapq.heappop(self._waiting)
+                self.running += 1
+                dispatched.append((task_uuid, deadline))
+            pool = self._get_pool() if dispatched else None
+
+        # Submitted without the lock, a finished pool future runs its callback right away
+        for task_uuid, deadline in dispatched:
+            self._start(pool, task_uuid, deadline)
+
+    def _get_pool(self) -> PoolExecutor:
+        if self._pool_executor is None:
+            cognit_logger.info(f"Starting {self.pool} pool with {self.max_workers} workers")
+            if self.pool == "dask":
+                self._pool_executor = self._start_dask_cluster()
+            elif self.pool == "process":
+                self._pool_executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=WorkerProcess.get_context(),
+                )
+            else:
+                self._pool_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="faas-task")
+        return self._pool_executor
+
+    def _start_dask_cluster(self):
+        # Optional dependency, only needed by the "dask" pool
+        from dask.distributed import Client, LocalCluster
+        import dask
+
+        options = {key: value for key, value in self._dask_options.items() if value is not None}
+        cognit_logger.info(f"Starting local Dask cluster: {options}")
+        # Isolated executions fork a killable process per call, which daemonic workers may not do
+        with dask.config.set({"distributed.worker.daemon": False}):
+            self._dask_cluster = LocalCluster(processes=True, **options)
+        return Client(self._dask_cluster)
+
+    def _close_pool(self, wait: bool):
+        if self._pool_executor is None:
+            return
+
+        if self._dask_cluster is not None:
+            self._scattered_fcs.clear()
+            self._pool_executor.close()
+            self._dask_cluster.close()
+            self._dask_cluster = None
+        else:
+            self._pool_executor.shutdown(wait=wait)
+
+        self._pool_executor = None
+
+    def _scatter_fc(self, client, executor: Executor):
+        """
+        Return the cluster-side copy of the executor's function, scattering it
+        the first time its hash is seen.
+        """
+
+        with self._lock:
+            scattered = self._scattered_fcs.get(executor.fc_hash)
+            if scattered is not None:
+                self._scattered_fcs.move_to_end(executor.fc_hash)
+                return scattered
+
+        scattered = client.scatter(executor.fc, hash=False)
+
+        with self._lock:
+            self._scattered_fcs[executor.fc_hash] = scattered
+            while len(self._scattered_fcs) > self.SCATTER_CACHE_SIZE:
+                # Dropping the last reference releases the data on the cluster
+                self._scattered_fcs.popitem(last=False)
+
+        return scattered
+
+    def _submit_to_dask(self, client, task_uuid: TaskId, deadline: Optional[float]):
+        executor = self.executor_map[task_uuid]
+
+        if not executor.fc_hash or not callable(getattr(executor, "fc", None)):
+            # Unknown functions and C source code are shipped along with the executor
+            return client.submit(run_before_deadline, executor, deadline, pure=False)
+
+        fc = self._scatter_fc(client, executor)
+        shipped = copy.copy(executor)
+        shipped.fc = None
+        return client.submit(run_dask_task, shipped, fc, deadline, pure=False)
+
+    def _start(self, pool: PoolExecutor, task_uuid: TaskId, deadline: Optional[float]):
+        task = self.task_map[task_uuid]
+        task.set_running_or_notify_cancel()
+        self.task_times[task_uuid][1] = time.monotonic()
+        self._share("started", task_uuid, self.task_times[task_uuid][1])
+
+        try:
+            if isinstance(pool, ThreadPoolExecutor):
+                pool_future = pool.submit(run_task, task_uuid, deadline)
+            elif isinstance(pool, ProcessPoolExecutor):
+                pickled_executor = cloudpickle.dumps(self.executor_map[task_uuid])
+                pool_future = pool.submit(run_pickled_task, pickled_executor, deadline)
             else:
-                if self.task_map[task_uuid].exception() is not None:
-                    cognit_logger.info(
-                        "Status: {}; Error: {}".format(
-                            self.task_map[task_uuid].status,
-                            self.task_map[task_uuid].exception(),
-                        )
-                    )
-                return TaskState.FAILED, None
+                pool_future = self._submit_to_dask(pool, task_uuid, deadline)
+
+        except Exception as e:
+            cognit_logger.error(f"Unable to start task {task_uuid}: {e}")
+            self._finish(task_uuid, None, e)
+            return
+
+        pool_future.add_done_callback(lambda f: self._on_pool_done(task_uuid, f))
+
+    def _on_pool_done(self, task_uuid: TaskId, pool_future: Future):
+        try:
+            result = pool_future.result()
+            if isinstance(result, bytes):
+                result = cloudpickle.loads(result)
+        except BaseException as e:
+            self._finish(task_uuid, None, e)
         else:
-            return None
+            self._finish(task_uuid, result, None)
+
+    def _finish(self, task_uuid: TaskId, result: Any, error: Optional[BaseException]):
+        with self._lock:
+            self.running -= 1
+
+        # Free the worker before running the completion callbacks
+        self._dispatch()
+
+        self.task_times[task_uuid][2] = time.monotonic()
+        self._share("finished", task_uuid, self.task_times[task_uuid][2])
+
+        task = self.task_map[task_uuid]
+        if error is not None:
+            task.set_exception(error)
+        else:
+            task.set_result(result)
+
+    def _share(self, event: str, task_uuid: TaskId, *args):
+        if self.shared_tasks is None:
+            return
+        try:
+            getattr(self.shared_tasks, event)(task_uuid, *args)
+        except Exception as e:
+            cognit_logger.error(f"Unable to share {event} of task {task_uuid}: {e}")
+
+    @classmethod
+    def _check_pool_type(cls, pool: str):
+        if pool not in cls.POOL_TYPES:
+            raise ValueError(f"Unsupported pool type {pool}, expected one of {cls.POOL_TYPES}")
@@ -36,6 +36,10 @@ class FaasParser:
         # Cloudpickle it
         return cloudpickle.loads(b64_bytes)
 
+    def deserialize_bytes(self, input: bytes) -> Any:
+        # Cloudpickle it from already decoded bytes
+        return cloudpickle.loads(input)
+
     def b64_to_str(self, input: str) -> Any:
         # Decode it from base64
         decoded_str = base64.b64decode(input).decode()
@@ -0,0 +1,199 @@
+from starlette.responses import Response
+from pydantic import BaseModel, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import ListError, StrError
+from pydantic.fields import SHAPE_LIST
+
+from typing import Any, Tuple, Type
+from enum import Enum
+import json
+
+try:
+    # Optional, several times faster than the standard library on large strings
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize plain data (dicts, lists, strings, numbers, enums) to JSON bytes.
+    """
+
+    if isinstance(obj, BaseModel):
+        obj = obj.dict()
+
+    if orjson is not None:
+        return orjson.dumps(obj)
+
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+# Documents from which strings are sliced out of the raw bytes instead of decoded
+SCAN_THRESHOLD = 64 * 1024
+
+_WHITESPACE = b" \t\n\r"
+_SCALAR_END = b",]}" + _WHITESPACE
+
+class _Fallback(Exception):
+    pass
+
+def loads_large(data: bytes) -> Any:
+    """
+    Deserialize a JSON document carrying large strings, such as an execution request.
+
+    Strings without escapes (base64 never has any) are delimited with bytes.find
+    and decoded straight from the buffer, several times faster than a JSON
+    decoder checking them character by character. Small documents and
+    documents using escapes are deserialized by loads().
+    """
+
+    if len(data) < SCAN_THRESHOLD:
+        return loads(data)
+
+    try:
+        value, end = _scan_value(data, memoryview(data), _skip_whitespace(data, 0))
+        if _skip_whitespace(data, end) != len(data):
+            raise _Fallback
+        return value
+    except (_Fallback, IndexError, ValueError):
+        # loads() also raises the error of an invalid document
+        return loads(data)
+
+def _skip_whitespace(data: bytes, i: int) -> int:
+    while i < len(data) and data[i] in _WHITESPACE:
+        i += 1
+    return i
+
+def _scan_value(data: bytes, view: memoryview, i: int) -> Tuple[Any, int]:
+    """
+    Deserialize the value starting at data[i], returning it and the index following it.
+    """
+
+    c = data[i]
+
+    if c == 0x22: # "
+        end = data.find(b'"', i + 1)
+        if end < 0 or data.find(b"\\", i + 1, end) >= 0:
+            raise _Fallback
+        return str(view[i + 1:end], "utf-8"), end + 1
+
+    if c == 0x7b: # {
+        obj = {}
+        i = _skip_whitespace(data, i + 1)
+        if data[i] == 0x7d:
+            return obj, i + 1
+        while True:
+            if data[i] != 0x22:
+                raise _Fallback
+            key, i = _scan_value(data, view, i)
+            i = _skip_whitespace(data, i)
+            if data[i] != 0x3a: # :
+                raise _Fallback
+            obj[key], i = _scan_value(data, view, _skip_whitespace(data, i + 1))
+            i = _skip_whitespace(data, i)
+            if data[i] == 0x7d:
+                return obj, i + 1
+            if data[i] != 0x2c: # ,
+                raise _Fallback
+            i = _skip_whitespace(data, i + 1)
+
+    if c == 0x5b: # [
+        array = []
+        i = _skip_whitespace(data, i + 1)
+        if data[i] == 0x5d:
+            return array, i + 1
+        while True:
+            item, i = _scan_value(data, view, i)
+            array.append(item)
+            i = _skip_whitespace(data, i)
+            if data[i] == 0x5d:
+                return array, i + 1
+            if data[i] != 0x2c:
+                raise _Fallback
+            i = _skip_whitespace(data, i + 1)
+
+    # Number, true, false or null
+    end = i
+    while end < len(data) and data[end] not in _SCALAR_END:
+        end += 1
+    return loads(data[i:end]), end
+
+def parse_envelope(model: Type[BaseModel], data: Any, passthrough: Tuple[str, ...]) -> BaseModel:
+    """
+    Validate a deserialized request against a model, except for its large fields.
+
+    The fields in `passthrough`, of type str or list[str], are only checked to
+    hold strings and are handed through as deserialized, instead of pydantic
+    validating and copying every element.
+
+    Raises:
+        ValidationError: If the envelope or a passthrough field is invalid.
+    """
+
+    if not isinstance(data, dict):
+        return model.parse_obj(data)
+
+    instance = model.parse_obj({name: value for name, value in data.items() if name not in passthrough})
+    errors = []
+
+    for name in passthrough:
+        if name not in data:
+            continue
+
+        value = data[name]
+
+        if model.__fields__[name].shape == SHAPE_LIST:
+            if not isinstance(value, list):
+                errors.append(ErrorWrapper(ListError(), loc=(name,)))
+                continue
+            errors.extend(ErrorWrapper(StrError(), loc=(name, i)) for i, item in enumerate(value) if type(item) is not str)
+        elif type(value) is not str:
+            errors.append(ErrorWrapper(StrError(), loc=(name,)))
+
+        setattr(instance, name, value)
+
+    if errors:
+        raise ValidationError(errors, model)
+
+    return instance
+
+def result_message(response: BaseModel | bytes, status_code: int) -> bytes:
+    """
+    Body of a result published to the broker: {"code": ..., "message": <ExecResponse>}.
+
+    Args:
+        response (ExecResponse | bytes): The result, or its JSON as returned by the API.
+        status_code (int): HTTP-like status code of the execution.
+    """
+
+    message = response if isinstance(response, bytes) else dumps(response)
+
+    return b'{"code":' + str(int(status_code)).encode() + b',"message":' + message + b'}'
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded in one pass, with orjson if available.
+
+    Returning it from an endpoint skips FastAPI's response validation and
+    jsonable_encoder, which walk the whole content before the standard
+    library encodes it again. The content must already be valid: a model,
+    plain data, or pre-serialized JSON bytes.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+
+        return dumps(content)
@@ -0,0 +1,249 @@
+from modules._logger import CognitLogger
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Optional
+import os
+
+cognit_logger = CognitLogger()
+
+class MemoryLRUStore:
+    """
+    In-memory key/bytes store bounded by a byte budget with LRU eviction.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes (int): Maximum number of bytes held in memory.
+        """
+
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, name: str) -> Optional[bytes]:
+        """
+        Return the stored bytes and mark them as most recently used.
+        """
+
+        with self._lock:
+            data = self._items.get(name)
+            if data is not None:
+                self._items.move_to_end(name)
+            return data
+
+    def put(self, name: str, data: bytes) -> bool:
+        """
+        Store the bytes, evicting least recently used entries if needed.
+
+        Returns:
+            bool: False if the entry alone exceeds the byte budget and was not stored.
+        """
+
+        size = len(data)
+
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            old = self._items.pop(name, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            self._items[name] = data
+            self.total_bytes += size
+            self._evict()
+
+        return True
+
+    def discard(self, name: str):
+        with self._lock:
+            old = self._items.pop(name, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._items:
+            _, evicted = self._items.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+
+class DiskLRUStore:
+    """
+    Directory backed key/file store bounded by a byte budget with LRU eviction.
+
+    Entries are files named after their key, so keys must be safe file names.
+    Files left in the directory by a previous run are indexed at start-up,
+    oldest modification time first.
+    """
+
+    TMP_SUFFIX = ".tmp"
+
+    def __init__(self, directory: str, max_bytes: int, on_remove: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            directory (str): Directory where the entries are stored.
+            max_bytes (int): Maximum number of bytes kept on disk.
+            on_remove (Callable, optional): Called with the key of every entry
+                evicted or discarded, under the store's lock.
+        """
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.on_remove = on_remove
+        self.total_bytes = 0
+        self._items: OrderedDict[str, int] = OrderedDict()
+        self._lock = Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(self.TMP_SUFFIX):
+                # Leftover of an interrupted write
+                os.remove(entry.path)
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self._items[name] = size
+            self.total_bytes += size
+
+        with self._lock:
+            self._evict()
+
+        cognit_logger.debug(f"Indexed {len(self._items)} entries ({self.total_bytes} bytes) in {self.directory}")
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def tmp_path(self, name: str) -> str:
+        """
+        Path where an entry can be written before being committed.
+        """
+
+        return self.path(name) + f".{os.getpid()}.{id(self)}" + self.TMP_SUFFIX
+
+    def get_path(self, name: str) -> Optional[str]:
+        """
+        Return the file path of an entry and mark it as most recently used.
+        """
+
+        with self._lock:
+            if name not in self._items:
+                return None
+            self._items.move_to_end(name)
+
+        path = self.path(name)
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Removed behind our back
+            self.discard(name)
+            return None
+
+        return path
+
+    def read(self, name: str) -> Optional[bytes]:
+        path = self.get_path(name)
+
+        if path is None:
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            self.discard(name)
+            return None
+
+    def put(self, name: str, data: bytes) -> bool:
+        """
+        Write the bytes as a new entry.
+
+        Returns:
+            bool: False if the entry alone exceeds the byte budget and was not stored.
+        """
+
+        if len(data) > self.max_bytes:
+            return False
+
+        tmp_path = self.tmp_path(name)
+
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        return self.commit(name, tmp_path)
+
+    def commit(self, name: str, tmp_path: str) -> bool:
+        """
+        Atomically move an already written file into the store.
+
+        Returns:
+            bool: False if the file alone exceeds the byte budget and was discarded.
+        """
+
+        size = os.path.getsize(tmp_path)
+
+        if size > self.max_bytes:
+            os.remove(tmp_path)
+            return False
+
+        with self._lock:
+            os.replace(tmp_path, self.path(name))
+            old = self._items.pop(name, None)
+            if old is not None:
+                self.total_bytes -= old
+            self._items[name] = size
+            self.total_bytes += size
+            self._evict()
+
+        return True
+
+    def discard(self, name: str):
+        with self._lock:
+            self._remove(name)
+
+    def _remove(self, name: str):
+        size = self._items.pop(name, None)
+
+        if size is None:
+            return
+
+        self.total_bytes -= size
+
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+        if self.on_remove is not None:
+            self.on_remove(name)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._items:
+            oldest = next(iter(self._items))
+            cognit_logger.debug(f"Evicting {oldest} from {self.directory}")
+            self._remove(oldest)
@@ -0,0 +1,237 @@
+from modules._lru_store import DiskLRUStore
+from modules._logger import CognitLogger
+
+from botocore.exceptions import ClientError
+from concurrent.futures import Future
+from threading import Lock
+from typing import Optional, Union
+from contextlib import closing
+import hashlib
+import shutil
+import os
+
+cognit_logger = CognitLogger()
+
+class MinioObjectCache:
+    """
+    Disk-backed read-through cache for MinIO objects.
+
+    Cached copies are revalidated against the object store with a conditional
+    GET (If-None-Match with the cached ETag), so a warm hit costs one round-trip
+    without payload. The cache is bounded by a byte budget with LRU eviction, and
+    concurrent fetches of the same object are collapsed into a single download.
+    Each ETag is kept in a file of its own next to the objects, tied to the inode
+    of the object file, so caches sharing the directory never trust an ETag
+    written for another copy.
+    """
+
+    CACHE_PATH = "/var/lib/cognit/minio-cache"
+    MAX_BYTES = 2 * 1024 * 1024 * 1024
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, directory: str = CACHE_PATH, max_bytes: int = MAX_BYTES):
+        """
+        :param directory: Directory where cached objects are stored.
+        :param max_bytes: Maximum number of bytes kept in the cache.
+        """
+        self.etags_directory = os.path.join(directory, "etags")
+        os.makedirs(self.etags_directory, exist_ok=True)
+        self.store = DiskLRUStore(os.path.join(directory, "objects"), max_bytes, on_remove=self._forget_etag)
+        self._lock = Lock()
+        self._in_flight: dict[str, Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+
+    def etag(self, name: str) -> Optional[str]:
+        """
+        Return the ETag of a cached entry, or None if unknown or written for another copy.
+        """
+        try:
+            with open(self._etag_path(name), "r") as f:
+                inode, etag = f.read().split(" ", 1)
+            if os.stat(self.store.path(name)).st_ino != int(inode):
+                return None
+        except (OSError, ValueError):
+            return None
+        return etag
+
+
+    def _etag_path(self, name: str) -> str:
+        return os.path.join(self.etags_directory, name)
+
+
+    def _save_etag(self, name: str, tmp_path: str, etag: str):
+        # The object file keeps the inode of its temporary file once committed
+        etag_tmp_path = self._etag_path(name) + f".{os.getpid()}.{id(self)}.tmp"
+        with open(etag_tmp_path, "w") as f:
+            f.write(f"{os.stat(tmp_path).st_ino} {etag}")
+        os.replace(etag_tmp_path, self._etag_path(name))
+
+
+    def _forget_etag(self, name: str):
+        try:
+            os.remove(self._etag_path(name))
+        except FileNotFoundError:
+            pass
+
+
+    @staticmethod
+    def entry_name(bucket: str, key: str) -> str:
+        return hashlib.sha256(f"{bucket}/{key}".encode()).hexdigest()
+
+
+    def fetch(self, s3_client, bucket: str, key: str) -> Optional[str]:
+        """
+        Return the path of an up-to-date local copy of the object.
+
+        :param s3_client: boto3 S3 client used on cache misses and revalidation.
+        :param bucket: Name of the bucket.
+        :param key: Object key (path) in the bucket.
+        :return: Path of the cached file, or None if the object does not fit in the cache.
+        """
+        found = self._lookup(s3_client, bucket, key)
+
+        if isinstance(found, dict):
+            found["Body"].close()
+            return None
+
+        return found
+
+
+    def _lookup(self, s3_client, bucket: str, key: str) -> Union[str, dict, None]:
+        """
+        Like fetch(), but an object that does not fit in the cache is returned as
+        its open GetObject response, so the caller reads it without a second GET.
+        Callers sharing the fetch of such an object get None.
+        """
+        name = self.entry_name(bucket, key)
+
+        with self._lock:
+            flight = self._in_flight.get(name)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._in_flight[name] = flight
+
+        if not leader:
+            # Somebody else is already fetching this object, share its result
+            return flight.result()
+
+        try:
+            found = self._fetch(s3_client, bucket, key, name)
+            flight.set_result(None if isinstance(found, dict) else found)
+            return found
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[name]
+
+
+    def _fetch(self, s3_client, bucket: str, key: str, name: str) -> Union[str, dict, None]:
+        path = self.store.get_path(name)
+        etag = self.etag(name) if path is not None else None
+        request = {"Bucket": bucket, "Key": key}
+
+        if path is not None and etag is not None:
+            request["IfNoneMatch"] = etag
+
+        try:
+            resp = s3_client.get_object(**request)
+        except ClientError as e:
+            status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if status == 304 and path is not None:
+                self.hits += 1
+                cognit_logger.debug(f"Cache hit for {bucket}/{key}")
+                return path
+            raise
+
+        self.misses += 1
+        body = resp["Body"]
+
+        if resp.get("ContentLength", 0) > self.store.max_bytes:
+            cognit_logger.debug(f"{bucket}/{key} exceeds the cache size, not caching it")
+            return resp
+
+        tmp_path = self.store.tmp_path(name)
+
+        try:
+            with open(tmp_path, "wb") as f:
+                shutil.copyfileobj(body, f, self.CHUNK_SIZE)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        try:
+            if resp.get("ETag"):
+                self._save_etag(name, tmp_path, resp["ETag"])
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        if not self.store.commit(name, tmp_path):
+            return None
+
+        cognit_logger.debug(f"Cached {bucket}/{key} ({os.path.getsize(self.store.path(name))} bytes)")
+
+        return self.store.path(name)
+
+
+    def read(self, s3_client, bucket: str, key: str) -> Optional[bytes]:
+        """
+        Return the object content through the cache, or None if it must be downloaded directly.
+        """
+        found = self._lookup(s3_client, bucket, key)
+
+        if isinstance(found, dict):
+            # Too large for the cache, read from the response already open
+            with closing(found["Body"]) as body:
+                return body.read()
+
+        if found is None:
+            return None
+
+        path = found
+
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Evicted between fetch and read, fetch it again
+            self.store.discard(self.entry_name(bucket, key))
+            return self.read(s3_client, bucket, key)
+
+
+    def copy_to(self, s3_client, bucket: str, key: str, download_path: str) -> bool:
+        """
+        Copy the object through the cache to download_path.
+
+        :return: False if the object must be downloaded directly.
+        """
+        found = self._lookup(s3_client, bucket, key)
+
+        if isinstance(found, dict):
+            # Too large for the cache, stream the response already open
+            with closing(found["Body"]) as body, open(download_path, "wb") as f:
+                shutil.copyfileobj(body, f, self.CHUNK_SIZE)
+            return True
+
+        if found is None:
+            return False
+
+        path = found
+
+        try:
+            shutil.copyfile(path, download_path)
+        except FileNotFoundError:
+            if os.path.exists(path):
+                raise
+            # Evicted between fetch and copy, fetch it again
+            self.store.discard(self.entry_name(bucket, key))
+            return self.copy_to(s3_client, bucket, key, download_path)
+
+        return True
@@ -1,7 +1,8 @@
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
+from modules._s3_client_factory import S3ClientFactory
+from modules._minio_cache import MinioObjectCache
 from modules._logger import CognitLogger
-import boto3
-from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import (
     ClientError,
     EndpointConnectionError,
@@ -9,33 +10,68 @@ from botocore.exceptions import (
     ReadTimeoutError,
 )
 
-import os # For "download_files_with_prefix" method, can be deleted if method will not be used.
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+import functools
+import threading
+import time
+import os
 
 cognit_logger = CognitLogger()
 
 class MinioClient:
-    def __init__(self, endpoint_url, access_key, secret_key):
+    DOWNLOAD_WORKERS = 8
+    DOWNLOAD_RETRIES = 3
+    DOWNLOAD_RETRY_BACKOFF = 0.5
+    MULTIPART_THRESHOLD = 16 * 1024 * 1024
+    MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+    MAX_CONCURRENCY = 8
+    STREAM_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        endpoint_url,
+        access_key,
+        secret_key,
+        cache: MinioObjectCache = None,
+        multipart_threshold=MULTIPART_THRESHOLD,
+        multipart_chunksize=MULTIPART_CHUNKSIZE,
+        max_concurrency=MAX_CONCURRENCY,
+        max_pool_connections=S3ClientFactory.MAX_POOL_CONNECTIONS,
+        connect_timeout=S3ClientFactory.CONNECT_TIMEOUT,
+        read_timeout=S3ClientFactory.READ_TIMEOUT
+        ):
         """
         Initialize the MinIO client.
 
         :param endpoint_url: URL of the MinIO server (e.g., http://localhost:9000).
         :param access_key: Access key for authentication.
         :param secret_key: Secret key for authentication.
+        :param cache (Optional): Local read-through cache used by the download methods.
+        :param multipart_threshold (Optional): Size from which transfers are split in parts.
+        :param multipart_chunksize (Optional): Size of each part of a split transfer.
+        :param max_concurrency (Optional): Number of parts transferred in parallel.
+        :param max_pool_connections (Optional): Size of the HTTP connection pool shared with other clients of the endpoint.
+        :param connect_timeout (Optional): Seconds to establish the TCP connection.
+        :param read_timeout (Optional): Seconds to wait for a byte of response.
         """
+        self.cache = cache
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+            use_threads=True
+        )
         try:
             cognit_logger.debug("Initializing MinIO client...")
-            timeout_config = Config(
-                connect_timeout=5,      # seconds to establish the TCP connection
-                read_timeout=10,        # seconds to wait for a byte of response
-                retries={"mode": "standard"}  # better default retry/backoff behavior
-            )
-            self.s3_client = boto3.client(
-                's3',
-                endpoint_url=endpoint_url,
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                config=timeout_config
+            # Clients of the same endpoint share one boto3 client and its connection pool
+            self.s3_client = S3ClientFactory.get_client(
+                endpoint_url,
+                access_key,
+                secret_key,
+                max_pool_connections=max_pool_connections,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout
             )
             cognit_logger.debug("MinIO client initialized successfully.")
         except (NoCredentialsError, PartialCredentialsError) as e:
@@ -123,17 +159,30 @@ class MinioClient:
             
     
     ### OBJECT level methods (object == everything inside a bucket (files and folders))
-    def list_objects(self, bucket_name):
+    def iter_objects(self, bucket_name, prefix=""):
+        """
+        Iterate over the keys of a bucket, page by page, filtered server-side by prefix.
+
+        :param bucket_name: Name of the bucket.
+        :param prefix (Optional): Only keys starting with this prefix are listed.
+        :return: Generator of object names.
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+
+
+    def list_objects(self, bucket_name, prefix=""):
         """
         List all objects in a bucket.
 
         :param bucket_name: Name of the bucket.
+        :param prefix (Optional): Only keys starting with this prefix are listed.
         :return: List of object names.
         """
         try:
-            response = self.s3_client.list_objects_v2(Bucket=bucket_name)
-            objects = [obj['Key'] for obj in response.get('Contents', [])]
-            return objects
+            return list(self.iter_objects(bucket_name, prefix))
         except ClientError as e:
             cognit_logger.error(f"Failed to list objects: {e}")
             return []
@@ -145,17 +194,20 @@ class MinioClient:
 
         :param bucket: Name of the bucket where the object will be uploaded.
         :param objectPath: Path (key) in the bucket where the object will be stored.
-        :param data: The data to be uploaded, provided as bytes.
+        :param data: The data to be uploaded, provided as bytes or as a readable binary file object.
+            Payloads above the multipart threshold are uploaded in parallel parts.
         :param extraArgs (Optional): Additional arguments for the upload, such as metadata or ACL settings.
         :return: A success message string if the upload is successful, or the exception message if it fails.
         """
         try:
-            buffer = BytesIO(data)
+            # BytesIO shares the buffer of a bytes object instead of copying it
+            buffer = data if hasattr(data, "read") else BytesIO(data)
             self.s3_client.upload_fileobj(
                 Fileobj=buffer,
                 Bucket=bucket,
                 Key=objectPath,
-                ExtraArgs=extraArgs
+                ExtraArgs=extraArgs,
+                Config=self.transfer_config
             )
             cognit_logger.info(f"Uploaded {objectPath} to {bucket} successfully.")
             return f"Uploaded {objectPath} to {bucket} successfully."
@@ -177,18 +229,30 @@ class MinioClient:
         :return:
             - str:  download_path, if input path was passed and it succeeded.
             - bytes: raw object data, if input path was not passed and it succeeded.
+              Objects above the multipart threshold are fetched with parallel ranged
+              GETs into a single preallocated bytearray.
             - str: An error message if the download fails.
         """
         try:
+            if self.cache is not None:
+                if download_path:
+                    if self.cache.copy_to(self.s3_client, bucket, key, download_path):
+                        cognit_logger.info(f"Downloaded {bucket}/{key} to {download_path} through cache")
+                        return download_path
+                else:
+                    data = self.cache.read(self.s3_client, bucket, key)
+                    if data is not None:
+                        cognit_logger.info(f"Downloaded {bucket}/{key} as bytes ({len(data)} bytes) through cache")
+                        return data
+
             if download_path:
-                # Saves directly to Device Runtime disk
-                self.s3_client.download_file(bucket, key, download_path)
+                # Saves directly to Device Runtime disk, large objects in parallel parts
+                self.s3_client.download_file(bucket, key, download_path, Config=self.transfer_config)
                 cognit_logger.info(f"Downloaded {bucket}/{key} to {download_path}")
                 return download_path
             else:
                 # Fetch into memory
-                resp = self.s3_client.get_object(Bucket=bucket, Key=key)
-                data = resp['Body'].read()
+                data = self._download_to_memory(bucket, key)
                 cognit_logger.info(f"Downloaded {bucket}/{key} as bytes ({len(data)} bytes)")
                 return data
 
@@ -197,6 +261,98 @@ class MinioClient:
             return e
 
 
+    def _download_to_memory(self, bucket: str, key: str):
+        """
+        Fetch an object into memory. The first GET covers up to the multipart
+        threshold and tells the total size, so small objects take a single
+        request. The remainder of larger objects is fetched with parallel ranged
+        GETs pinned to the ETag of the first one, into a preallocated bytearray.
+        """
+        threshold = self.transfer_config.multipart_threshold
+        try:
+            resp = self.s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{threshold - 1}")
+        except ClientError as e:
+            # Empty objects have no satisfiable range
+            if e.response.get('Error', {}).get('Code') != 'InvalidRange':
+                raise
+            resp = self.s3_client.get_object(Bucket=bucket, Key=key)
+
+        # Servers ignoring the range answer with the whole object and no Content-Range
+        content_range = resp.get('ContentRange')
+        size = int(content_range.rsplit('/', 1)[1]) if content_range else resp['ContentLength']
+        first = resp['ContentLength']
+        if first >= size:
+            return resp['Body'].read()
+
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        self._read_range(resp['Body'], view, 0, first, bucket, key)
+        self._download_ranges(bucket, key, view, first, resp['ETag'])
+
+        return buffer
+
+
+    def _download_ranges(self, bucket: str, key: str, view: memoryview, start: int, etag: str):
+        """
+        Fetch the object from start on with parallel ranged GETs, each part written
+        in place into view. IfMatch fails the parts if the object changed meanwhile.
+        """
+        size = len(view)
+        part_size = self.transfer_config.multipart_chunksize
+
+        def fetch_range(offset):
+            end = min(offset + part_size, size)
+            resp = self.s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={offset}-{end - 1}", IfMatch=etag)
+            self._read_range(resp['Body'], view, offset, end, bucket, key)
+
+        with ThreadPoolExecutor(max_workers=self.transfer_config.max_request_concurrency) as pool:
+            # Consume the results so the first failing part is raised
+            list(pool.map(fetch_range, range(start, size, part_size)))
+
+
+    def _read_range(self, body, view: memoryview, start: int, end: int, bucket: str, key: str):
+        offset = start
+        for chunk in body.iter_chunks(self.STREAM_CHUNK_SIZE):
+            view[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+        if offset != end:
+            raise IOError(f"Short read for {bucket}/{key} range {start}-{end - 1}")
+
+
+    def iter_object(self, bucket: str, key: str, chunk_size: int = STREAM_CHUNK_SIZE):
+        """
+        Stream an object without holding it whole in memory.
+
+        :param bucket: Name of the bucket.
+        :param key: Object key (path) in the bucket.
+        :param chunk_size (Optional): Size of the yielded chunks.
+        :return: Generator of bytes chunks.
+        """
+        resp = self.s3_client.get_object(Bucket=bucket, Key=key)
+        try:
+            yield from resp['Body'].iter_chunks(chunk_size)
+        finally:
+            resp['Body'].close()
+
+
+    def upload_file_from_sr_disk(self, bucket_name, file_path, object_name, extraArgs=None):
+        """
+        Upload a file from the SR disk, in parallel parts if it is above the multipart threshold.
+
+        :param bucket_name: Name of the bucket.
+        :param file_path: Local path of the file to upload.
+        :param object_name: Path (key) in the bucket where the object will be stored.
+        :param extraArgs (Optional): Additional arguments for the upload, such as metadata or ACL settings.
+        """
+        try:
+            self.s3_client.upload_file(
+                file_path, bucket_name, object_name, ExtraArgs=extraArgs, Config=self.transfer_config
+            )
+            cognit_logger.info(f"File '{file_path}' uploaded to '{bucket_name}/{object_name}'.")
+        except ClientError as e:
+            cognit_logger.error(f"Failed to upload file: {e}")
+
+
     def delete_object(self, bucket_name, object_name):
         """
         Delete an object from a bucket.
@@ -249,6 +405,35 @@ class MinioClient:
 
 
     # Methods to download to the Serverless Runtime's local disk
+    def _download_file(self, bucket_name, object_name, download_path):
+        """
+        Download a file to the SR disk, raising on failure.
+        """
+        # Create the directory structure if it doesn't exist
+        directory = os.path.dirname(download_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if self.cache is None or not self.cache.copy_to(self.s3_client, bucket_name, object_name, download_path):
+            self.s3_client.download_file(bucket_name, object_name, download_path, Config=self.transfer_config)
+
+
+    def _download_file_with_retries(self, bucket_name, object_name, download_path, retries):
+        """
+        Download a file to the SR disk, retrying with exponential backoff.
+        """
+        for attempt in range(retries + 1):
+            try:
+                self._download_file(bucket_name, object_name, download_path)
+                return download_path
+            except (ClientError, EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError, OSError) as e:
+                if attempt == retries:
+                    raise
+                delay = self.DOWNLOAD_RETRY_BACKOFF * (2 ** attempt)
+                cognit_logger.warning(f"Download of '{object_name}' failed ({e}), retrying in {delay}s...")
+                time.sleep(delay)
+
+
     def download_file_to_sr_disk(self, bucket_name, object_name, download_path):
         """
         Download a file from a bucket to the SR disk.
@@ -258,14 +443,7 @@ class MinioClient:
         :param download_path: Local path to save the downloaded file.
         """
         try:
-            # Extract the directory path from the file path
-            directory = os.path.dirname(download_path)
-
-            # Create the directory structure if it doesn't exist
-            os.makedirs(directory, exist_ok=True)
-            
-            # Download the file
-            self.s3_client.download_file(bucket_name, object_name, download_path)
+            self._download_file(bucket_name, object_name, download_path)
             cognit_logger.info(f"File '{object_name}' downloaded to '{download_path}'.")
         except ClientError as e:
             cognit_logger.error(f"Failed to download file: {e}")
@@ -276,7 +454,10 @@ class MinioClient:
         bucket_name,
         prefix,
         target_local_directory,
-        preserve_nested_structure=False
+        preserve_nested_structure=False,
+        max_workers=None,
+        retries=None,
+        progress_callback=None
         ):
         """
         Download all files from a bucket with a specific prefix to a target_local_directory.
@@ -308,49 +489,71 @@ class MinioClient:
                         └── record2.txt
             `
 
+        Objects are listed page by page and downloaded concurrently while the
+        listing goes on, each object being retried on its own if it fails.
 
         :param bucket_name: Name of the bucket.
         :param prefix: Prefix to filter objects (e.g., "project1" or "project1/data").
         :param target_local_directory: Local directory to store the downloaded files.
         :param preserve_nested_structure: If True, preserves the nested folder structure; otherwise, flattens the structure.
+        :param max_workers (Optional): Number of concurrent downloads. Defaults to DOWNLOAD_WORKERS.
+        :param retries (Optional): Retries per object before giving up on it. Defaults to DOWNLOAD_RETRIES.
+        :param progress_callback (Optional): Called as progress_callback(done, listed, object_name) after each download.
+        :return: List of local paths of the downloaded files.
         """
+        max_workers = max_workers or self.DOWNLOAD_WORKERS
+        retries = self.DOWNLOAD_RETRIES if retries is None else retries
+        downloaded = []
+        failed = []
+
         try:
             # Create the directory if it doesn't exist
             os.makedirs(target_local_directory, exist_ok=True)
 
-            # List all objects in the bucket with the specified prefix
-            objects = self.list_objects(bucket_name)
-            if not objects:
-                cognit_logger.info(f"No files found in bucket '{bucket_name}' with prefix '{prefix}'.")
-                return
-
-            # Filter objects that match the prefix
-            filtered_objects = [obj for obj in objects if obj.startswith(prefix)]
-
-            if not filtered_objects:
+            # Bound the number of pending downloads so huge listings are not queued all at once
+            slots = threading.BoundedSemaphore(2 * max_workers)
+            progress_lock = threading.Lock()
+            listed = 0
+
+            def on_done(object_name, future):
+                slots.release()
+                with progress_lock:
+                    try:
+                        downloaded.append(future.result())
+                    except Exception as e:
+                        cognit_logger.error(f"Failed to download '{object_name}': {e}")
+                        failed.append(object_name)
+                    if progress_callback is not None:
+                        progress_callback(len(downloaded) + len(failed), listed, object_name)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for object_name in self.iter_objects(bucket_name, prefix):
+                    # Skip folder placeholders
+                    if object_name.endswith("/"):
+                        continue
+
+                    if preserve_nested_structure:
+                        # Preserve the full folder structure
+                        local_file_path = os.path.join(target_local_directory, object_name)
+                    else:
+                        # Flatten the structure: Use only the file name or relative path
+                        relative_path = os.path.relpath(object_name, prefix)
+                        local_file_path = os.path.join(target_local_directory, relative_path)
+
+                    slots.acquire()
+                    listed += 1
+                    future = pool.submit(
+                        self._download_file_with_retries, bucket_name, object_name, local_file_path, retries
+                    )
+                    future.add_done_callback(functools.partial(on_done, object_name))
+
+            if listed == 0:
                 cognit_logger.info(f"No files found with prefix '{prefix}' in bucket '{bucket_name}'.")
-                return
-
-            # Download each object
-            for object_name in filtered_objects:
-                if preserve_nested_structure:
-                    # Preserve the full folder structure
-                    local_file_path = os.path.join(target_local_directory, object_name)
-                else:
-                    # Flatten the structure: Use only the file name or relative path
-                    relative_path = os.path.relpath(object_name, prefix)
-                    local_file_path = os.path.join(target_local_directory, relative_path)
-
-                # Create directories if the object has a folder structure
-                os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-
-                # Download the object
-                self.download_file(bucket_name, object_name, local_file_path)
-                cognit_logger.info(f"Downloaded '{object_name}' to '{local_file_path}'.")
-
-            cognit_logger.info(f"All objects with prefix '{prefix}' from bucket '{bucket_name}' downloaded to '{target_local_directory}'.")
+            elif failed:
+                cognit_logger.error(f"{len(failed)} of {listed} objects with prefix '{prefix}' could not be downloaded: {failed}")
+            else:
+                cognit_logger.info(f"All {listed} objects with prefix '{prefix}' from bucket '{bucket_name}' downloaded to '{target_local_directory}'.")
         except Exception as e:
             cognit_logger.error(f"Failed to download objects with prefix '{prefix}' from bucket '{bucket_name}': {e}")
-            
 
-    
\ No newline at end of file
+        return downloaded
@@ -1,5 +1,6 @@
 from modules._logger import CognitLogger
 from modules._executor import *
+from modules._worker_process import ResourceLimits, WorkerProcess, WorkerTimeoutError, WorkerCancelledError, WorkerLimitExceededError
 from models.faas import *
 
 from typing import Any, Callable, Optional
@@ -13,27 +14,47 @@ class PyExec(Executor):
         "RUNNING": 1,
         "IDLE": 0
     }
-    
+
     executed_func_counter = 0
     successed_func_counter = 0
     failed_func_counter = 0
-    
+
     _lock = Lock()
 
-    def __init__(self, fc: Callable, params: list[str]):
+    def __init__(
+        self,
+        fc: Callable,
+        params: list[str],
+        timeout: Optional[float] = None,
+        isolated: bool = False,
+        limits: Optional[ResourceLimits] = None,
+    ):
+        """
+        Args:
+            fc (Callable): Function to execute.
+            params (list): Positional parameters of the function.
+            timeout (float, optional): Seconds after which the function is killed.
+            isolated (bool): Run the function in a worker process even without
+                timeout or limits, so it can be cancelled while running.
+            limits (ResourceLimits, optional): CPU time and memory limits of the worker process.
+        """
 
         self.lang = "PY"
         self.fc = fc
         self.params = params
+        self.timeout = timeout
+        self.limits = limits
+        self.isolated = isolated or timeout is not None or bool(limits)
+        self.worker: Optional[WorkerProcess] = None
         self.res: Optional[float]
         self.err: str
         self.ret_code: ExecReturnCode
         self.process_manager: Any
         self.start_pyexec_time = 0.0
         self.end_pyexec_time = 0.1
-        
+
         self.status = None
-        
+
     def increase_counter(self, counter_name: str):
         """Thread-safe increment for class-level counters."""
         with self._lock:
@@ -42,7 +63,8 @@ class PyExec(Executor):
     def run(self):
         """
         Run the Python function with the provided parameters.
-        This method executes the function `fc` with the parameters `params`.
+        This method executes the function `fc` with the parameters `params`,
+        in a killable worker process if the execution is isolated.
         """
 
         try:
@@ -52,9 +74,9 @@ class PyExec(Executor):
 
             self.start_pyexec_time = time.time()
             self.status = self.STATUS_DICT.get("RUNNING", 1)
-            
+
             cognit_logger.info("Starting the task ...")
-            self.res = self.fc(*self.params)
+            self.res = self._call()
 
             cognit_logger.info("Done task...")
             self.end_pyexec_time = time.time()
@@ -64,41 +86,79 @@ class PyExec(Executor):
             self.increase_counter("successed_func_counter")
             self.err = None
             self.status = self.STATUS_DICT.get("IDLE", 0)
-            
+
             return self
-        
+
+        except WorkerTimeoutError as e:
+            return self._fail(ExecReturnCode.TIMEOUT, str(e))
+
+        except WorkerCancelledError as e:
+            return self._fail(ExecReturnCode.CANCELLED, str(e))
+
+        except WorkerLimitExceededError as e:
+            return self._fail(ExecReturnCode.RESOURCE_LIMIT, str(e))
+
         except Exception as e:
+            return self._fail(ExecReturnCode.ERROR, "Error executing function: " + str(e))
 
-            cognit_logger.error(e)
+    def _call(self) -> Any:
+        if not self.isolated:
+            return self.fc(*self.params)
 
-            # Increment the class-level failed counter
-            self.increase_counter("failed_func_counter")
-            self.status = self.STATUS_DICT.get("IDLE", 0)
-            self.res = None
-            self.end_pyexec_time = time.time()
-            self.ret_code = ExecReturnCode.ERROR
-            self.err = "Error executing function: " + str(e)
+        self.worker = WorkerProcess(self.fc, self.params, self.limits)
+        if self.cancelled:
+            self.worker.cancel()
+        return self.worker.run(self.timeout)
+
+    def _fail(self, ret_code: ExecReturnCode, err: str):
+
+        cognit_logger.error(err)
+
+        # Increment the class-level failed counter
+        self.increase_counter("failed_func_counter")
+        self.status = self.STATUS_DICT.get("IDLE", 0)
+        self.res = None
+        self.end_pyexec_time = time.time()
+        self.ret_code = ret_code
+        self.err = err
+
+        return self
+
+    def __getstate__(self):
+        # The worker process handle is not picklable, nor of use in another process
+        state = self.__dict__.copy()
+        state["worker"] = None
+        return state
+
+    def cancel(self):
+        """
+        Cancel the execution, killing its worker process if it is running.
+        """
+
+        super().cancel()
+        if self.worker is not None:
+            self.worker.cancel()
 
     def get_result(self):
         return self.res
 
     def get_err(self):
         return self.err
-    
+
     def get_ret_code(self):
         return self.ret_code
-    
+
     def get_status(self):
         return self.status
-    
+
     @classmethod
     def get_executed_func_counter(cls):
         return cls.executed_func_counter
-    
+
     @classmethod
     def get_successed_func_counter(cls):
         return cls.successed_func_counter
-    
+
     @classmethod
     def get_failed_func_counter(cls):
         return cls.failed_func_counter
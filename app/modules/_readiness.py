@@ -0,0 +1,129 @@
+from modules._logger import CognitLogger
+
+from typing import Callable, Dict, Tuple
+from threading import Lock, Thread
+import time
+
+cognit_logger = CognitLogger()
+
+class Readiness:
+    """
+    Tracks the start-up steps the Serverless Runtime waits for before it is
+    ready to serve. Slow steps run in the background, so the process accepts
+    connections (and answers probes) while it warms up.
+
+    Once started, readiness also depends on health checks of the subsystems
+    (worker pool, broker connection, caches). Checks flagged as liveness ones
+    decide whether the process is alive at all.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.ready_at = None
+        self._pending: Dict[str, float] = {}
+        self._done: Dict[str, float] = {}
+        self._failed: Dict[str, str] = {}
+        self._checks: Dict[str, Tuple[Callable[[], Tuple[bool, str]], bool]] = {}
+        self._lock = Lock()
+
+    def add_check(self, name: str, check: Callable[[], Tuple[bool, str]], liveness: bool = False):
+        """
+        Register a health check.
+
+        Args:
+            name (str): Name of the checked subsystem.
+            check (Callable): Returns whether the subsystem is healthy and a detail message.
+            liveness (bool): Also make the process report as not alive when it fails.
+        """
+
+        with self._lock:
+            self._checks[name] = (check, liveness)
+
+    def expect(self, step: str):
+        """
+        Register a step that must complete before the runtime is ready.
+        """
+
+        with self._lock:
+            self._pending[step] = time.monotonic()
+            self.ready_at = None
+
+    def complete(self, step: str):
+        with self._lock:
+            started_at = self._pending.pop(step, time.monotonic())
+            self._done[step] = time.monotonic() - started_at
+            if not self._pending and not self._failed and self.ready_at is None:
+                self.ready_at = time.monotonic()
+                cognit_logger.info(f"Serverless Runtime ready after {self.ready_at - self.started_at:.2f}s")
+
+    def fail(self, step: str, err: str):
+        with self._lock:
+            self._pending.pop(step, None)
+            self._failed[step] = err
+        cognit_logger.error(f"Start-up step {step} failed: {err}")
+
+    def run_in_background(self, step: str, fc: Callable[[], None]) -> Thread:
+        """
+        Run a start-up step in a daemon thread, marking it complete or failed.
+        """
+
+        self.expect(step)
+
+        def target():
+            try:
+                fc()
+            except Exception as e:
+                self.fail(step, str(e))
+            else:
+                self.complete(step)
+
+        thread = Thread(target=target, name=f"startup-{step}", daemon=True)
+        thread.start()
+
+        return thread
+
+    def is_ready(self) -> bool:
+        return self.status()["ready"]
+
+    def status(self) -> dict:
+        """
+        Readiness of the runtime: start-up completed and every check passing.
+        """
+
+        with self._lock:
+            started = self.ready_at is not None
+            status = {
+                "pending": sorted(self._pending),
+                "failed": dict(self._failed),
+                "steps_s": {step: round(elapsed, 3) for step, elapsed in self._done.items()},
+                "startup_s": round((self.ready_at or time.monotonic()) - self.started_at, 3),
+            }
+            checks = dict(self._checks)
+
+        status["checks"] = self._run_checks(checks)
+        status["ready"] = started and all(check["ok"] for check in status["checks"].values())
+
+        return status
+
+    def liveness(self) -> dict:
+        """
+        Liveness of the runtime: every liveness check passing.
+        """
+
+        with self._lock:
+            checks = {name: check for name, check in self._checks.items() if check[1]}
+
+        results = self._run_checks(checks)
+
+        return {"alive": all(check["ok"] for check in results.values()), "checks": results}
+
+    @staticmethod
+    def _run_checks(checks: dict) -> dict:
+        results = {}
+        for name, (check, _) in checks.items():
+            try:
+                ok, detail = check()
+            except Exception as e:
+                ok, detail = False, f"Check failed: {e}"
+            results[name] = {"ok": ok, "detail": detail}
+        return results
@@ -0,0 +1,284 @@
+from models.faas import AsyncExecStatus, ExecResponse, ExecReturnCode
+from modules._logger import CognitLogger
+
+from typing import Dict, Iterator, Optional
+from threading import Lock
+import sqlite3
+import time
+import os
+
+cognit_logger = CognitLogger()
+
+class ResultRecord:
+    """
+    Outcome of a finished asynchronous execution.
+
+    The serialized result is either held in `res` or, when it is larger than
+    the spill threshold, kept by the spill storage and `spilled` is set.
+    """
+
+    def __init__(
+        self,
+        task_uuid: str,
+        status: AsyncExecStatus,
+        ret_code: ExecReturnCode,
+        err: Optional[str],
+        res: Optional[str],
+        size: int,
+        spilled: bool = False,
+        created_at: Optional[float] = None,
+    ):
+        self.task_uuid = task_uuid
+        self.status = status
+        self.ret_code = ret_code
+        self.err = err
+        self.res = res
+        self.size = size
+        self.spilled = spilled
+        self.created_at = created_at if created_at is not None else time.time()
+
+    def to_exec_response(self, res: Optional[str] = None) -> ExecResponse:
+        return ExecResponse(ret_code=self.ret_code, res=res if self.spilled else self.res, err=self.err)
+
+class DiskSpill:
+    """
+    Keeps spilled results as files of a local directory.
+    """
+
+    SPILL_PATH = "/var/lib/cognit/results/spill"
+
+    def __init__(self, directory: str = SPILL_PATH):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def write(self, name: str, data: bytes):
+        tmp_path = self.path(name) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        # Readers never see a partially written result
+        os.replace(tmp_path, self.path(name))
+
+    def iter_chunks(self, name: str, chunk_size: int) -> Iterator[bytes]:
+        with open(self.path(name), "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def delete(self, name: str):
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+class MinioSpill:
+    """
+    Keeps spilled results as objects of a MinIO bucket.
+    """
+
+    def __init__(self, minio_client, bucket: str, prefix: str = "sr-results/"):
+        """
+        Args:
+            minio_client (MinioClient): Client of the MinIO server.
+            bucket (str): Bucket of the spilled results, which must exist.
+            prefix (str): Key prefix of the spilled results.
+        """
+
+        self.minio_client = minio_client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def write(self, name: str, data: bytes):
+        outcome = self.minio_client.upload_object(self.bucket, self.prefix + name, data)
+        if not isinstance(outcome, str):
+            raise OSError(f"Unable to spill result to MinIO: {outcome}")
+
+    def iter_chunks(self, name: str, chunk_size: int) -> Iterator[bytes]:
+        yield from self.minio_client.iter_object(self.bucket, self.prefix + name, chunk_size)
+
+    def delete(self, name: str):
+        self.minio_client.delete_object(self.bucket, self.prefix + name)
+
+class ResultStore:
+    """
+    Keeps the results of finished asynchronous executions until they expire.
+
+    Records are held in memory. Results larger than the spill threshold are
+    handed to the spill storage (local disk or MinIO) and streamed back from
+    there, so they do not pin memory until they are fetched.
+    """
+
+    SPILL_THRESHOLD = 1024 * 1024
+    RESULT_TTL = 24 * 60 * 60
+    CHUNK_SIZE = 64 * 1024
+    PURGE_INTERVAL = 60
+
+    def __init__(self, spill=None, spill_threshold: int = SPILL_THRESHOLD, ttl: float = RESULT_TTL):
+        """
+        Args:
+            spill (DiskSpill | MinioSpill, optional): Storage of large results. Without it every result is kept inline.
+            spill_threshold (int): Size in bytes from which results are spilled.
+            ttl (float): Seconds a result is kept after the execution finished.
+        """
+
+        self.spill = spill
+        self.spill_threshold = spill_threshold
+        self.ttl = ttl
+        self._records: Dict[str, ResultRecord] = {}
+        self._lock = Lock()
+        self._last_purge = time.monotonic()
+
+    def put(self, task_uuid: str, exec_response: ExecResponse, status: AsyncExecStatus = AsyncExecStatus.READY) -> ResultRecord:
+        """
+        Store the outcome of a finished execution.
+        """
+
+        res = exec_response.res
+        size = len(res) if res is not None else 0
+        record = ResultRecord(task_uuid, status, exec_response.ret_code, exec_response.err, res, size)
+
+        if self.spill is not None and size >= self.spill_threshold:
+            try:
+                self.spill.write(self.spill_name(task_uuid), res.encode("ascii"))
+                record.res = None
+                record.spilled = True
+            except OSError as e:
+                cognit_logger.warning(f"Unable to spill result of {task_uuid}, keeping it in memory: {e}")
+
+        self._save(record)
+        self._purge_if_due()
+
+        return record
+
+    def get(self, task_uuid: str) -> Optional[ResultRecord]:
+        with self._lock:
+            return self._records.get(task_uuid)
+
+    def iter_res(self, record: ResultRecord, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Stream the serialized result of a record.
+        """
+
+        if not record.spilled:
+            if record.res is not None:
+                yield record.res.encode("ascii")
+            return
+
+        yield from self.spill.iter_chunks(self.spill_name(record.task_uuid), chunk_size)
+
+    def load_res(self, record: ResultRecord) -> Optional[str]:
+        if not record.spilled:
+            return record.res
+        return b"".join(self.iter_res(record)).decode("ascii")
+
+    def delete(self, task_uuid: str):
+        record = self._remove(task_uuid)
+        if record is not None and record.spilled:
+            try:
+                self.spill.delete(self.spill_name(task_uuid))
+            except Exception as e:
+                cognit_logger.warning(f"Unable to delete spilled result of {task_uuid}: {e}")
+
+    def purge_expired(self):
+        for task_uuid in self._expired(time.time() - self.ttl):
+            self.delete(task_uuid)
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def spill_name(task_uuid: str) -> str:
+        return f"{task_uuid}.res"
+
+    def _purge_if_due(self):
+        now = time.monotonic()
+        if now - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        self.purge_expired()
+
+    # ------------------- Record storage ------------------- #
+
+    def _save(self, record: ResultRecord):
+        with self._lock:
+            self._records[record.task_uuid] = record
+
+    def _remove(self, task_uuid: str) -> Optional[ResultRecord]:
+        with self._lock:
+            return self._records.pop(task_uuid, None)
+
+    def _expired(self, before: float) -> list:
+        with self._lock:
+            return [task_uuid for task_uuid, record in self._records.items() if record.created_at < before]
+
+class SqliteResultStore(ResultStore):
+    """
+    Result store whose records live in a SQLite database, so results survive
+    restarts of the Serverless Runtime.
+    """
+
+    RESULT_DB_PATH = "/var/lib/cognit/results/results.db"
+
+    def __init__(self, path: str = RESULT_DB_PATH, spill=None, spill_threshold: int = ResultStore.SPILL_THRESHOLD, ttl: float = ResultStore.RESULT_TTL):
+        """
+        Args:
+            path (str): Path of the SQLite database.
+            spill (DiskSpill | MinioSpill, optional): Storage of large results.
+            spill_threshold (int): Size in bytes from which results are spilled.
+            ttl (float): Seconds a result is kept after the execution finished.
+        """
+
+        super().__init__(spill, spill_threshold, ttl)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "task_uuid TEXT PRIMARY KEY, status TEXT, ret_code INTEGER, err TEXT, "
+            "res TEXT, size INTEGER, spilled INTEGER, created_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at)")
+        self._db.commit()
+
+    def get(self, task_uuid: str) -> Optional[ResultRecord]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT task_uuid, status, ret_code, err, res, size, spilled, created_at FROM results WHERE task_uuid = ?",
+                (task_uuid,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        task_uuid, status, ret_code, err, res, size, spilled, created_at = row
+        return ResultRecord(task_uuid, AsyncExecStatus(status), ExecReturnCode(ret_code), err, res, size, bool(spilled), created_at)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _save(self, record: ResultRecord):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.task_uuid, record.status.value, record.ret_code.value, record.err,
+                    record.res, record.size, int(record.spilled), record.created_at,
+                ),
+            )
+            self._db.commit()
+
+    def _remove(self, task_uuid: str) -> Optional[ResultRecord]:
+        record = self.get(task_uuid)
+        with self._lock:
+            self._db.execute("DELETE FROM results WHERE task_uuid = ?", (task_uuid,))
+            self._db.commit()
+        return record
+
+    def _expired(self, before: float) -> list:
+        with self._lock:
+            rows = self._db.execute("SELECT task_uuid FROM results WHERE created_at < ?", (before,)).fetchall()
+        return [row[0] for row in rows]
@@ -0,0 +1,239 @@
+from prometheus_client import Counter, Gauge
+from modules._logger import CognitLogger
+
+from threading import Lock
+import hashlib
+import weakref
+import os
+
+cognit_logger = CognitLogger()
+
+s3_pool_size_gauge = Gauge(
+    'sr_s3_pool_max_connections',
+    'Size of the HTTP connection pool of the shared S3 client',
+    labelnames=['endpoint', 'pool'],
+    multiprocess_mode='max'
+)
+
+s3_in_flight_gauge = Gauge(
+    'sr_s3_requests_in_flight',
+    'S3 API calls currently in flight on the shared client, response bodies being read included',
+    labelnames=['endpoint', 'pool'],
+    multiprocess_mode='livesum'
+)
+
+s3_pool_saturated_counter = Counter(
+    'sr_s3_pool_saturated_total',
+    'S3 API calls started while every pooled connection was already in use',
+    labelnames=['endpoint', 'pool']
+)
+
+class _TrackedStream:
+    """
+    Raw stream of a response body that calls on_done once the transfer is
+    over: read to the end, closed, failed or dropped.
+    """
+
+    def __init__(self, raw, on_done):
+        self._raw = raw
+        # Also run if the body is garbage collected unread
+        self._done = weakref.finalize(self, on_done)
+
+    def read(self, amt=None):
+        try:
+            chunk = self._raw.read(amt)
+        except BaseException:
+            self._done()
+            raise
+        if amt is None or (not chunk and amt > 0):
+            self._done()
+        return chunk
+
+    def readinto(self, b):
+        try:
+            amount_read = self._raw.readinto(b)
+        except BaseException:
+            self._done()
+            raise
+        if amount_read == 0 and len(b) > 0:
+            self._done()
+        return amount_read
+
+    def close(self):
+        try:
+            self._raw.close()
+        finally:
+            self._done()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+class S3ClientFactory:
+    """
+    Process-wide factory of boto3 S3 clients.
+
+    boto3 clients are thread-safe, so every MinioClient targeting the same
+    endpoint with the same credentials shares one client and therefore one
+    HTTP connection pool, instead of opening its own. Calls in flight are
+    tracked per client through botocore events to expose pool saturation,
+    labelled with the endpoint and a pool id derived from the access key and
+    the connection settings. A call holds its connection, and is counted,
+    until its response body, if any, is read to the end or closed.
+    """
+
+    MAX_POOL_CONNECTIONS = 32
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 10
+    TCP_KEEPALIVE = True
+
+    _clients: dict = {}
+    _in_flight: dict = {}
+    _lock = Lock()
+
+    @classmethod
+    def get_client(
+        cls,
+        endpoint_url: str,
+        access_key: str,
+        secret_key: str,
+        max_pool_connections: int = MAX_POOL_CONNECTIONS,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        tcp_keepalive: bool = TCP_KEEPALIVE,
+    ):
+        """
+        Return the shared client for the endpoint and credentials, creating it on first use.
+
+        Args:
+            endpoint_url (str): URL of the MinIO server.
+            access_key (str): Access key for authentication.
+            secret_key (str): Secret key for authentication.
+            max_pool_connections (int): Maximum number of pooled HTTP connections.
+            connect_timeout (float): Seconds to establish the TCP connection.
+            read_timeout (float): Seconds to wait for a byte of response.
+            tcp_keepalive (bool): Enable TCP keep-alive on pooled connections.
+
+        Returns:
+            The boto3 S3 client.
+        """
+
+        key = cls._key(endpoint_url, access_key, secret_key, max_pool_connections, connect_timeout, read_timeout, tcp_keepalive)
+
+        with cls._lock:
+            client = cls._clients.get(key)
+            if client is not None:
+                return client
+
+            # Imported on first use, boto3 adds a noticeable delay to start-up
+            import boto3
+            from botocore.config import Config
+
+            config = Config(
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+                retries={"mode": "standard"},
+                max_pool_connections=max_pool_connections,
+                tcp_keepalive=tcp_keepalive
+            )
+            client = boto3.client(
+                's3',
+                endpoint_url=endpoint_url,
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                config=config
+            )
+            cls._register_pool_metrics(client, key, max_pool_connections)
+            cls._clients[key] = client
+
+        cognit_logger.debug(f"Created shared S3 client for {endpoint_url} (pool size {max_pool_connections})")
+
+        return client
+
+    @staticmethod
+    def _key(endpoint_url, access_key, secret_key, max_pool_connections, connect_timeout, read_timeout, tcp_keepalive) -> tuple:
+        return (str(endpoint_url), access_key, secret_key, max_pool_connections, connect_timeout, read_timeout, tcp_keepalive)
+
+    @staticmethod
+    def _pool_id(key: tuple) -> str:
+        # Stable across workers and restarts, without exposing the secret key
+        endpoint, access_key, _, *settings = key
+        return hashlib.sha256(repr((access_key, *settings)).encode()).hexdigest()[:8]
+
+    @classmethod
+    def _register_pool_metrics(cls, client, key: tuple, max_pool_connections: int):
+        labels = {"endpoint": key[0], "pool": cls._pool_id(key)}
+        s3_pool_size_gauge.labels(**labels).set(max_pool_connections)
+        cls._in_flight.setdefault(key, 0)
+
+        def before_call(context, **kwargs):
+            with cls._lock:
+                # The call ends on the counts it started on, even if clear() replaced them meanwhile
+                in_flight = cls._in_flight
+                count = in_flight.get(key, 0)
+                in_flight[key] = count + 1
+            context['sr_pool_in_flight'] = in_flight
+            s3_in_flight_gauge.labels(**labels).inc()
+            if count >= max_pool_connections:
+                s3_pool_saturated_counter.labels(**labels).inc()
+
+        def after_call(context, parsed=None, **kwargs):
+            in_flight = context.pop('sr_pool_in_flight', None)
+            if in_flight is None:
+                return
+
+            def release():
+                with cls._lock:
+                    in_flight[key] -= 1
+                s3_in_flight_gauge.labels(**labels).dec()
+
+            from botocore.response import StreamingBody
+
+            body = parsed.get('Body') if isinstance(parsed, dict) else None
+            if isinstance(body, StreamingBody):
+                # The pooled connection stays busy until the body is transferred
+                body._raw_stream = _TrackedStream(body._raw_stream, release)
+            else:
+                release()
+
+        client.meta.events.register('before-call.s3', before_call)
+        client.meta.events.register('after-call.s3', after_call)
+        client.meta.events.register('after-call-error.s3', after_call)
+
+    @classmethod
+    def get_in_flight(
+        cls,
+        endpoint_url: str,
+        access_key: str,
+        secret_key: str,
+        max_pool_connections: int = MAX_POOL_CONNECTIONS,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        tcp_keepalive: bool = TCP_KEEPALIVE,
+    ) -> int:
+        """
+        Return the number of calls in flight on the shared client of the
+        endpoint, credentials and settings, as given to get_client().
+        """
+
+        key = cls._key(endpoint_url, access_key, secret_key, max_pool_connections, connect_timeout, read_timeout, tcp_keepalive)
+        with cls._lock:
+            return cls._in_flight.get(key, 0)
+
+    @classmethod
+    def clear(cls):
+        """
+        Forget every shared client and its calls in flight, e.g. after a fork or in tests.
+        """
+
+        with cls._lock:
+            cls._clients.clear()
+            cls._in_flight = {}
+
+    @classmethod
+    def _after_fork(cls):
+        # The child must not share pooled sockets with the parent, nor wait on
+        # a lock that one of the parent's threads held when forking
+        cls._lock = Lock()
+        cls.clear()
+
+os.register_at_fork(after_in_child=S3ClientFactory._after_fork)
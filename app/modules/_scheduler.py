@@ -0,0 +1,123 @@
+from models.faas import ExecPriority
+from modules._logger import CognitLogger
+
+from contextlib import contextmanager
+from threading import Condition
+from typing import Optional
+import heapq
+import itertools
+import math
+import time
+
+cognit_logger = CognitLogger()
+
+# Lower rank is dispatched first
+PRIORITY_RANK = {
+    ExecPriority.CRITICAL: 0,
+    ExecPriority.HIGH: 1,
+    ExecPriority.NORMAL: 2,
+    ExecPriority.BATCH: 3,
+}
+
+def deadline_from_ms(deadline_ms: int) -> Optional[float]:
+    """
+    Convert a relative request deadline in milliseconds into an absolute
+    time.monotonic() deadline, None meaning no deadline.
+    """
+
+    if deadline_ms is None or deadline_ms <= 0:
+        return None
+
+    return time.monotonic() + deadline_ms / 1000
+
+class DeadlineExceededError(Exception):
+    """
+    Raised when a pending execution reaches its deadline before being dispatched.
+    """
+
+class ExecutionScheduler:
+    """
+    Dispatches pending executions onto a fixed number of execution slots.
+
+    Waiting executions are served by priority class first and, within a class,
+    earliest deadline first (executions without deadline go last, in arrival
+    order). An execution whose deadline passes while it is still waiting is
+    shed instead of being run late.
+    """
+
+    def __init__(self, slots: int = 1):
+        """
+        Args:
+            slots (int): Number of executions allowed to run at the same time.
+        """
+
+        self.slots = slots
+        self.running = 0
+        self._waiting: list = []
+        self._seq = itertools.count()
+        self._cond = Condition()
+
+    @property
+    def queue_depth(self) -> int:
+        with self._cond:
+            return sum(1 for entry in self._waiting if not entry[3]["cancelled"])
+
+    def acquire(self, priority: ExecPriority = ExecPriority.NORMAL, deadline: Optional[float] = None):
+        """
+        Block until an execution slot is granted to the caller.
+
+        Args:
+            priority (ExecPriority): Priority class of the execution.
+            deadline (float, optional): Absolute time.monotonic() deadline for being dispatched.
+
+        Raises:
+            DeadlineExceededError: If the deadline passes before a slot is granted.
+        """
+
+        state = {"cancelled": False}
+        entry = [PRIORITY_RANK[priority], deadline if deadline is not None else math.inf, next(self._seq), state]
+
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+
+            while True:
+                self._drop_cancelled()
+
+                if self._waiting[0] is entry and self.running < self.slots:
+                    heapq.heappop(self._waiting)
+                    if deadline is not None and time.monotonic() >= deadline:
+                        # Let the next waiter have a go at the slot
+                        self._cond.notify_all()
+                        raise DeadlineExceededError("Deadline exceeded before dispatch")
+                    self.running += 1
+                    return
+
+                timeout = None if deadline is None else deadline - time.monotonic()
+
+                if timeout is not None and timeout <= 0:
+                    state["cancelled"] = True
+                    self._cond.notify_all()
+                    raise DeadlineExceededError("Deadline exceeded while queued")
+
+                self._cond.wait(timeout)
+
+    def release(self):
+        with self._cond:
+            self.running -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: ExecPriority = ExecPriority.NORMAL, deadline: Optional[float] = None):
+        """
+        Context manager holding an execution slot, see acquire().
+        """
+
+        self.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _drop_cancelled(self):
+        while self._waiting and self._waiting[0][3]["cancelled"]:
+            heapq.heappop(self._waiting)
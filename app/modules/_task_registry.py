@@ -0,0 +1,144 @@
+from models.faas import AsyncExecProgress, AsyncExecState
+from modules._logger import CognitLogger
+
+from typing import Callable, Optional
+from threading import Event, Lock, Thread
+import sqlite3
+import time
+import os
+
+cognit_logger = CognitLogger()
+
+class SharedTaskRegistry:
+    """
+    Async tasks in flight in any worker process of a multi-worker deployment.
+
+    Each uvicorn worker runs the tasks it accepted on its own FaasManager and
+    records their lifecycle here, in a SQLite database shared by all workers,
+    so a status request reaching another worker can still report progress
+    and cancellations reach the owner. Finished outcomes live in the shared
+    result store instead.
+
+    Times are time.monotonic() values, comparable across processes of a host.
+    """
+
+    TASK_DB_PATH = "/var/lib/cognit/results/tasks.db"
+    CANCEL_POLL_INTERVAL = 0.25
+
+    def __init__(self, path: str = TASK_DB_PATH):
+        """
+        Args:
+            path (str): Path of the SQLite database, the same for every worker.
+        """
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.owner = os.getpid()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "task_uuid TEXT PRIMARY KEY, owner INTEGER, submitted REAL, started REAL, "
+            "finished REAL, cancel_requested INTEGER DEFAULT 0)"
+        )
+        self._db.commit()
+        self._lock = Lock()
+        self._stop = Event()
+
+    def add(self, task_uuid: str, submitted: float):
+        self._execute("INSERT OR REPLACE INTO tasks (task_uuid, owner, submitted) VALUES (?, ?, ?)", (task_uuid, self.owner, submitted))
+
+    def started(self, task_uuid: str, started: float):
+        self._execute("UPDATE tasks SET started = ? WHERE task_uuid = ?", (started, task_uuid))
+
+    def finished(self, task_uuid: str, finished: float):
+        self._execute("UPDATE tasks SET finished = ? WHERE task_uuid = ?", (finished, task_uuid))
+
+    def remove(self, task_uuid: str):
+        self._execute("DELETE FROM tasks WHERE task_uuid = ?", (task_uuid,))
+
+    def contains(self, task_uuid: str) -> bool:
+        return self._times(task_uuid) is not None
+
+    def get_progress(self, task_uuid: str) -> Optional[AsyncExecProgress]:
+        """
+        Return where a task of any worker is in its lifecycle, None if unknown.
+        """
+
+        times = self._times(task_uuid)
+        if times is None:
+            return None
+
+        now = time.monotonic()
+        submitted, started, finished = times
+
+        if started is None:
+            return AsyncExecProgress(state=AsyncExecState.QUEUED, time_in_state_s=now - submitted, queued_s=now - submitted)
+        if finished is None:
+            return AsyncExecProgress(state=AsyncExecState.RUNNING, time_in_state_s=now - started, queued_s=started - submitted, running_s=now - started)
+
+        return AsyncExecProgress(state=AsyncExecState.FINISHED, time_in_state_s=now - finished, queued_s=started - submitted, running_s=finished - started)
+
+    def request_cancel(self, task_uuid: str) -> bool:
+        """
+        Ask the worker owning a task to cancel it.
+
+        Returns:
+            bool: False if the task is unknown or already finished.
+        """
+
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE tasks SET cancel_requested = 1 WHERE task_uuid = ? AND finished IS NULL", (task_uuid,)
+            )
+            self._db.commit()
+        return cursor.rowcount > 0
+
+    def take_cancel_requests(self) -> list:
+        """
+        Return the tasks of this worker whose cancellation was requested, clearing the requests.
+        """
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT task_uuid FROM tasks WHERE owner = ? AND cancel_requested = 1", (self.owner,)
+            ).fetchall()
+            if rows:
+                self._db.executemany("UPDATE tasks SET cancel_requested = 0 WHERE task_uuid = ?", rows)
+                self._db.commit()
+        return [row[0] for row in rows]
+
+    def watch_cancel_requests(self, cancel: Callable[[str], None], interval: float = CANCEL_POLL_INTERVAL) -> Thread:
+        """
+        Poll the cancellation requests of this worker's tasks in a daemon thread.
+        """
+
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    for task_uuid in self.take_cancel_requests():
+                        cancel(task_uuid)
+                except Exception as e:
+                    cognit_logger.error(f"Error polling cancellation requests: {e}")
+
+        thread = Thread(target=poll, name="cancel-requests", daemon=True)
+        thread.start()
+
+        return thread
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._db.close()
+
+    def _times(self, task_uuid: str) -> Optional[tuple]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT submitted, started, finished FROM tasks WHERE task_uuid = ?", (task_uuid,)
+            ).fetchone()
+
+    def _execute(self, statement: str, params: tuple):
+        with self._lock:
+            self._db.execute(statement, params)
+            self._db.commit()
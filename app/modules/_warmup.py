@@ -0,0 +1,93 @@
+from modules._blob_cache import BlobCache
+from modules._faas_manager import FaasManager
+from modules._faas_parser import FaasParser
+from modules._worker_process import WorkerProcess
+from modules._logger import CognitLogger
+
+from typing import Optional, Tuple
+import base64
+import json
+
+cognit_logger = CognitLogger()
+
+class WarmUp:
+    """
+    Start-up hook bringing the runtime to full speed before it reports ready.
+
+    It starts the worker zygote, spawns the workers of the async pool, imports
+    common libraries in the server and its workers, and declares frequently used functions: their
+    payloads are stored in the blob cache, keyed by the digest the server
+    computes, and Python ones are unpickled once so the modules they reference
+    get imported too. Clients then send "sha256:<digest>" instead of the payload.
+    """
+
+    DEFAULT_MODULES = ("numpy",)
+
+    def __init__(self, modules: Tuple[str, ...] = DEFAULT_MODULES, functions_path: Optional[str] = None):
+        """
+        Args:
+            modules (tuple): Modules to import ahead of the first execution.
+            functions_path (str, optional): JSON file with a list of {"lang", "fc"}
+                objects, the functions to declare.
+        """
+
+        self.modules = tuple(modules)
+        self.functions_path = functions_path
+        self.declared: dict[str, str] = {}
+        self.done = False
+
+    def configure(self, modules: Optional[Tuple[str, ...]] = None, functions_path: Optional[str] = None):
+        if modules is not None:
+            self.modules = tuple(modules)
+        if functions_path is not None:
+            self.functions_path = functions_path
+
+    def run(self, faas_manager: FaasManager, blob_cache: BlobCache):
+        # Before the pool, whose processes are forked from the zygote if enabled
+        WorkerProcess.start_zygote()
+
+        missing = faas_manager.warm_up(self.modules)
+        if missing:
+            cognit_logger.warning(f"Warm-up modules not available: {', '.join(missing)}")
+
+        if self.functions_path is not None:
+            with open(self.functions_path) as f:
+                for function in json.load(f):
+                    self.declare(function.get("lang", "PY"), function["fc"], blob_cache)
+
+        self.done = True
+        cognit_logger.info(f"Warm-up done: {len(self.modules) - len(missing)} modules imported, {len(self.declared)} functions declared")
+
+    def declare(self, lang: str, fc: str, blob_cache: BlobCache) -> str:
+        """
+        Store a base64 function payload in the blob cache.
+
+        Returns:
+            str: Digest of the function, to reference it as "sha256:<digest>".
+        """
+
+        data = base64.b64decode(fc)
+        digest = blob_cache.put(data)
+
+        if lang == "PY":
+            FaasParser().deserialize_bytes(data)
+
+        self.declared[digest] = lang
+        cognit_logger.info(f"Declared {lang} function sha256:{digest}")
+
+        return digest
+
+    def health(self, blob_cache: BlobCache) -> Tuple[bool, str]:
+        """
+        Tell whether the warm-up finished and how many declared functions are still cached.
+        """
+
+        if not self.done:
+            return False, "warm-up in progress"
+
+        # Evicted functions are uploaded again by the clients, so they only slow it down
+        evicted = blob_cache.missing(list(self.declared))
+        if evicted:
+            return True, f"{len(evicted)} of {len(self.declared)} declared functions evicted"
+
+        return True, f"{len(self.declared)} functions declared"
@@ -0,0 +1,280 @@
+from modules._logger import CognitLogger
+
+from typing import Any, Callable, Iterable, Optional, Tuple, Union
+import multiprocessing
+import multiprocessing.forkserver
+import cloudpickle
+import resource
+import signal
+import os
+
+cognit_logger = CognitLogger()
+
+class WorkerTimeoutError(Exception):
+    """
+    Raised when the function does not finish within its timeout.
+    """
+
+class WorkerCancelledError(Exception):
+    """
+    Raised when the worker was killed by a cancellation request.
+    """
+
+class WorkerCrashedError(Exception):
+    """
+    Raised when the worker process dies without returning a result.
+    """
+
+    def __init__(self, exitcode: Optional[int]):
+        super().__init__(f"Worker process died with exit code {exitcode}")
+        self.exitcode = exitcode
+
+class WorkerLimitExceededError(Exception):
+    """
+    Raised when the function breaches its CPU time or memory limit.
+    """
+
+class WorkerFunctionError(Exception):
+    """
+    Raised when the function itself raised inside the worker.
+    """
+
+class ResourceLimits:
+    """
+    CPU time and memory limits of an execution, enforced with rlimits in the
+    process running it. None means unlimited.
+    """
+
+    def __init__(self, cpu_seconds: Optional[int] = None, memory_bytes: Optional[int] = None):
+        """
+        Args:
+            cpu_seconds (int, optional): CPU time the function may consume.
+            memory_bytes (int, optional): Address space the function may allocate.
+        """
+
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+
+    def configure(self, cpu_seconds: Optional[int] = None, memory_bytes: Optional[int] = None):
+        if cpu_seconds is not None:
+            self.cpu_seconds = cpu_seconds or None
+        if memory_bytes is not None:
+            self.memory_bytes = memory_bytes or None
+
+    def __bool__(self) -> bool:
+        return self.cpu_seconds is not None or self.memory_bytes is not None
+
+    def __repr__(self) -> str:
+        return f"ResourceLimits(cpu_seconds={self.cpu_seconds}, memory_bytes={self.memory_bytes})"
+
+    def capped(self, cpu_seconds: Optional[int] = None, memory_bytes: Optional[int] = None) -> "ResourceLimits":
+        """
+        Return the limits requested for one execution, never above these ones.
+        """
+
+        def lowest(requested, cap):
+            if not requested:
+                return cap
+            return requested if cap is None else min(requested, cap)
+
+        return ResourceLimits(lowest(cpu_seconds, self.cpu_seconds), lowest(memory_bytes, self.memory_bytes))
+
+    def apply(self, relative: bool = True, pid: int = 0):
+        """
+        Set the limits on a process.
+
+        Args:
+            relative (bool): Count the memory limit on top of the address space
+                already mapped, as a forked worker inherits the whole server's one.
+            pid (int): Process to limit, the current one by default.
+        """
+
+        if self.cpu_seconds is not None:
+            # SIGXCPU at the soft limit, SIGKILL one second later if ignored
+            self._lower(resource.RLIMIT_CPU, self.cpu_seconds, self.cpu_seconds + 1, pid)
+
+        if self.memory_bytes is not None:
+            limit = self.memory_bytes
+            if relative:
+                limit += self.current_address_space(pid)
+            self._lower(resource.RLIMIT_AS, limit, limit, pid)
+
+    def breach(self, exitcode: Optional[int], killed: bool = False) -> Optional[str]:
+        """
+        Describe the limit breached by a process that died with the given exit code, if any.
+
+        Args:
+            exitcode (int, optional): Exit code of the process, minus the signal that killed it.
+            killed (bool): Whether the runtime killed the process itself, on timeout or cancellation.
+        """
+
+        if exitcode == -signal.SIGXCPU and self.cpu_seconds is not None:
+            return f"CPU time limit of {self.cpu_seconds}s exceeded"
+        # Sent at the hard CPU limit if SIGXCPU is ignored, but also by the OOM killer
+        if exitcode == -signal.SIGKILL and not killed and self:
+            return f"Killed by the system while running with {self}"
+        return None
+
+    @staticmethod
+    def current_address_space(pid: int = 0) -> int:
+        with open(f"/proc/{pid or 'self'}/statm") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+
+    @staticmethod
+    def _lower(limit: int, soft: int, hard: int, pid: int = 0):
+        _, current_hard = resource.prlimit(pid, limit)
+        if current_hard != resource.RLIM_INFINITY:
+            soft = min(soft, current_hard)
+            hard = min(hard, current_hard)
+        resource.prlimit(pid, limit, (soft, hard))
+
+def _worker_main(conn, task: Union[Tuple[Callable, list], bytes], limits: Optional[ResourceLimits]):
+    try:
+        # Pickled with cloudpickle when not inherited through a plain fork
+        fc, params = cloudpickle.loads(task) if isinstance(task, bytes) else task
+        if limits:
+            limits.apply()
+        payload = ("ok", fc(*params))
+    except MemoryError as e:
+        payload = ("limit", f"Memory limit exceeded: {e}") if limits and limits.memory_bytes else ("error", str(e))
+    except BaseException as e:
+        payload = ("error", str(e))
+
+    try:
+        conn.send_bytes(cloudpickle.dumps(payload))
+    except Exception as e:
+        conn.send_bytes(cloudpickle.dumps(("error", f"Unable to serialize result: {e}")))
+    finally:
+        conn.close()
+
+class WorkerProcess:
+    """
+    Runs one function call in a child process that can be killed.
+
+    By default children are forked from a zygote process ("forkserver") that
+    imported the preload modules once, so workers start with those libraries
+    loaded and share their memory pages, and the multi-threaded server never
+    forks itself: its locks, broker and database handles and pooled sockets
+    stay out of user code. The function and parameters are then sent pickled.
+    With the "fork" start method the child is forked from the server instead,
+    inheriting them without pickling. Only the result travels back, through a pipe.
+    """
+
+    START_METHODS = ("fork", "forkserver")
+    START_METHOD = "forkserver"
+    PRELOAD_MODULES: Tuple[str, ...] = ()
+
+    @classmethod
+    def configure(cls, start_method: Optional[str] = None, preload: Optional[Iterable[str]] = None):
+        """
+        Args:
+            start_method (str, optional): "fork" or "forkserver".
+            preload (Iterable[str], optional): Modules the fork server imports
+                before forking workers. The server's __main__ is always preloaded.
+        """
+
+        if start_method is not None:
+            if start_method not in cls.START_METHODS:
+                raise ValueError(f"Unsupported start method {start_method}, expected one of {cls.START_METHODS}")
+            cls.START_METHOD = start_method
+
+        if preload is not None:
+            cls.PRELOAD_MODULES = tuple(preload)
+
+        if cls.START_METHOD == "forkserver":
+            # Importing __main__ once in the fork server spares every worker from doing it
+            multiprocessing.get_context("forkserver").set_forkserver_preload(["__main__", *cls.PRELOAD_MODULES])
+
+    @classmethod
+    def get_context(cls):
+        return multiprocessing.get_context(cls.START_METHOD)
+
+    @classmethod
+    def start_zygote(cls):
+        """
+        Start the fork server now instead of with the first worker, as it
+        imports the preload modules.
+        """
+
+        if cls.START_METHOD == "forkserver":
+            multiprocessing.forkserver.ensure_running()
+
+    def __init__(self, fc: Callable, params: list, limits: Optional[ResourceLimits] = None):
+        self.fc = fc
+        self.params = params
+        self.limits = limits
+        self.process: Optional[multiprocessing.Process] = None
+        self._cancelled = False
+        self._killed = False
+
+    def run(self, timeout: Optional[float] = None) -> Any:
+        """
+        Run the function and return its result.
+
+        Args:
+            timeout (float, optional): Seconds after which the worker is killed.
+
+        Raises:
+            WorkerTimeoutError: If the timeout expires.
+            WorkerCancelledError: If cancel() was called.
+            WorkerLimitExceededError: If the function breached its resource limits.
+            WorkerCrashedError: If the worker died without returning a result.
+            WorkerFunctionError: If the function raised an exception.
+        """
+
+        if self._cancelled:
+            raise WorkerCancelledError("Execution cancelled")
+
+        ctx = self.get_context()
+        task = (self.fc, self.params) if self.START_METHOD == "fork" else cloudpickle.dumps((self.fc, self.params))
+        recv_conn, send_conn = ctx.Pipe(duplex=False)
+        # Not a daemon, so user code may start its own processes
+        self.process = ctx.Process(target=_worker_main, args=(send_conn, task, self.limits))
+        self.process.start()
+        send_conn.close()
+
+        # cancel() may have run before the process existed
+        if self._cancelled:
+            self.kill()
+
+        try:
+            # Also returns when the child closes the pipe by dying
+            if not recv_conn.poll(timeout):
+                self.kill()
+                raise WorkerTimeoutError(f"Execution timed out after {timeout}s")
+
+            try:
+                status, value = cloudpickle.loads(recv_conn.recv_bytes())
+            except EOFError:
+                self.process.join()
+                if self._cancelled:
+                    raise WorkerCancelledError("Execution cancelled")
+                breach = self.limits.breach(self.process.exitcode, self._killed) if self.limits else None
+                if breach:
+                    raise WorkerLimitExceededError(breach)
+                raise WorkerCrashedError(self.process.exitcode)
+
+        finally:
+            recv_conn.close()
+            self.process.join()
+
+        if status == "limit":
+            raise WorkerLimitExceededError(value)
+        if status == "error":
+            raise WorkerFunctionError(value)
+
+        return value
+
+    def cancel(self):
+        """
+        Kill the worker, making run() raise WorkerCancelledError.
+        """
+
+        self._cancelled = True
+        self.kill()
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            cognit_logger.warning(f"Killing worker process {self.process.pid}")
+            self._killed = True
+            self.process.kill()
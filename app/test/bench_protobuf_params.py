@@ -0,0 +1,108 @@
+"""
+Microbenchmark of the decoding of Protobuf-encoded parameters.
+
+Compares the former if/elif chain on WhichOneof with the dispatch table of
+deserialize_protobuf_params(), and with deserialize_protobuf_param_list()
+decoding all parameters from one message. Not collected by pytest, run it
+from the app directory:
+
+    python -m test.bench_protobuf_params [--params 1000] [--values 1] [--rounds 5]
+"""
+
+from api.v1.faas import decode_payload, decode_protobuf_param, deserialize_protobuf_params, deserialize_protobuf_param_list
+from api.v1 import nano_pb2
+
+from typing import Callable
+import argparse
+import base64
+import time
+
+# Oneof fields in the order the former chain tested them
+CHAIN_FIELDS = (
+    "my_double", "my_float", "my_int32", "my_int64", "my_uint32", "my_uint64", "my_sint32",
+    "my_sint64", "my_fixed32", "my_fixed64", "my_sfixed32", "my_sfixed64", "my_bool",
+)
+
+def decode_chain(param):
+    # Former implementation, returning a view into the message
+    values = []
+    for field in CHAIN_FIELDS:
+        if param.WhichOneof('param') == field:
+            values = getattr(param, field).values
+            break
+    else:
+        if param.WhichOneof('param') == 'my_string':
+            values = [param.my_string]
+        elif param.WhichOneof('param') == 'my_bytes':
+            values = [param.my_bytes]
+
+    return values if len(values) > 1 else values[0]
+
+def deserialize_chain(params):
+    param = nano_pb2.MyParam()
+    args = []
+
+    for encoded_param in params:
+        param.ParseFromString(decode_payload(encoded_param))
+        args.append(decode_chain(param))
+
+    return args
+
+def build_params(n_params: int, n_values: int) -> list:
+    # Fields spread over the oneof, so the chain is walked halfway on average
+    params = []
+    param_list = nano_pb2.FaasResponse()
+
+    for i in range(n_params):
+        field = CHAIN_FIELDS[i % len(CHAIN_FIELDS)]
+        param = nano_pb2.MyParam()
+        values = [i % 2 == 0] * n_values if field == "my_bool" else [i] * n_values
+        getattr(param, field).values.extend(values)
+        params.append(base64.b64encode(param.SerializeToString()).decode())
+        param_list.my_faas_response.append(param)
+
+    return params, base64.b64encode(param_list.SerializeToString()).decode()
+
+def measure(decode: Callable, params, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        decode(params)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the decoding of Protobuf parameters")
+    parser.add_argument("--params", type=int, default=1000, help="Number of parameters")
+    parser.add_argument("--values", type=int, default=1, help="Values per parameter")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds per decoder, the best one is reported")
+    args = parser.parse_args()
+
+    params, param_list = build_params(args.params, args.values)
+
+    print(f"{args.params} parameters of {args.values} values")
+
+    # Oneof dispatch alone, on messages parsed beforehand
+    parsed = []
+    for encoded_param in params:
+        param = nano_pb2.MyParam()
+        param.ParseFromString(decode_payload(encoded_param))
+        parsed.append(param)
+
+    baseline = None
+    for name, decode in (("if/elif chain", decode_chain), ("dispatch table", decode_protobuf_param)):
+        elapsed = measure(lambda messages: [decode(param) for param in messages], parsed, args.rounds)
+        baseline = baseline or elapsed
+        print(f"dispatch {name:<16} {elapsed / args.params * 1e6:8.2f} us/param  x{baseline / elapsed:.2f}")
+
+    # Whole deserialization, base64 decoding and parsing included
+    baseline = None
+    for name, decode, data in (
+        ("if/elif chain", deserialize_chain, params),
+        ("dispatch table", deserialize_protobuf_params, params),
+        ("single message", deserialize_protobuf_param_list, param_list),
+    ):
+        elapsed = measure(decode, data, args.rounds)
+        baseline = baseline or elapsed
+        print(f"total    {name:<16} {elapsed / args.params * 1e6:8.2f} us/param  x{baseline / elapsed:.2f}")
@@ -0,0 +1,61 @@
+"""
+Benchmark of the parsing of a large execution request, 100 parameters of 1 MB each.
+
+Compares FastAPI's default body parsing (standard library decoding and full
+pydantic validation) with loads_large() and parse_envelope(). Not collected
+by pytest, run it from the app directory:
+
+    python -m test.bench_request_parsing [--params 100] [--size-mb 1] [--rounds 5]
+"""
+
+from modules._fast_json import loads, loads_large, parse_envelope
+from models.faas import PASSTHROUGH_FIELDS, ExecSyncParams
+
+from typing import Callable
+import argparse
+import base64
+import json
+import time
+import os
+
+def build_body(n_params: int, param_size: int) -> bytes:
+    # Parameters are base64 strings, as sent by the device runtime
+    params = [base64.b64encode(os.urandom(param_size * 3 // 4)).decode() for _ in range(n_params)]
+    fc = base64.b64encode(os.urandom(4096)).decode()
+
+    return json.dumps({"lang": "PY", "fc": fc, "params": params, "priority": "NORMAL"}).encode()
+
+def parse_default(body: bytes) -> ExecSyncParams:
+    return ExecSyncParams(**json.loads(body))
+
+def parse_orjson(body: bytes) -> ExecSyncParams:
+    return ExecSyncParams(**loads(body))
+
+def parse_fast(body: bytes) -> ExecSyncParams:
+    return parse_envelope(ExecSyncParams, loads_large(body), PASSTHROUGH_FIELDS)
+
+def measure(parse: Callable[[bytes], ExecSyncParams], body: bytes, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        offloaded_func = parse(body)
+        timings.append(time.perf_counter() - start)
+        del offloaded_func
+    return min(timings)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the parsing of large execution requests")
+    parser.add_argument("--params", type=int, default=100, help="Number of parameters")
+    parser.add_argument("--size-mb", type=float, default=1, help="Size of each parameter in MB")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds per parser, the best one is reported")
+    args = parser.parse_args()
+
+    body = build_body(args.params, int(args.size_mb * 1024 * 1024))
+    print(f"Request of {args.params} parameters, {len(body) / 1024 / 1024:.1f} MiB")
+
+    baseline = None
+    for name, parse in (("json + pydantic", parse_default), ("orjson + pydantic", parse_orjson), ("loads_large + envelope", parse_fast)):
+        elapsed = measure(parse, body, args.rounds)
+        baseline = baseline or elapsed
+        print(f"{name:<24} {elapsed * 1000:8.1f} ms  {len(body) / elapsed / 1024 / 1024:8.0f} MiB/s  x{baseline / elapsed:.1f}")
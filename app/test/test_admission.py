@@ -0,0 +1,77 @@
+from modules._admission import AdmissionController, AdmissionRejectedError
+from api.v1.faas import sync_admission
+from modules._faas_parser import FaasParser
+from models.faas import *
+from main import app
+
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+import pytest
+import time
+
+client = TestClient(app)
+parser = FaasParser()
+
+def test_admission_limits():
+
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1)
+
+    controller.admit()
+    controller.admit()
+    assert controller.queue_depth == 1
+
+    with pytest.raises(AdmissionRejectedError) as e:
+        controller.admit()
+
+    assert e.value.retry_after >= 1
+    assert controller.rejected == 1
+
+    controller.release()
+    controller.admit()
+
+def test_retry_after_follows_service_rate():
+
+    controller = AdmissionController("test", max_concurrency=1, max_queue=2)
+
+    # Unknown service rate
+    assert controller.retry_after() == 1
+
+    controller._departure_interval = 2.0
+    controller.in_flight = 3
+    # Two queued plus the new request, one completion every 2s
+    assert controller.retry_after() == 6
+
+    controller._departure_interval = 1000.0
+    assert controller.retry_after() == AdmissionController.MAX_RETRY_AFTER
+
+def test_service_rate_ignores_idle_time():
+
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1)
+
+    with controller.admitted():
+        time.sleep(0.05)
+
+    # Idle time between two busy periods is not counted
+    time.sleep(0.2)
+
+    with controller.admitted():
+        time.sleep(0.05)
+
+    assert controller._departure_interval < 0.2
+
+@patch("api.v1.faas.get_vmid")
+def test_exec_sync_rejected_with_429(mock_get_vmid):
+
+    mock_get_vmid.return_value = "test_vmid"
+
+    max_concurrency, max_queue = sync_admission.max_concurrency, sync_admission.max_queue
+    sync_admission.configure(max_concurrency=0, max_queue=0)
+
+    try:
+        sync_ctx = ExecSyncParams(lang="PY", fc=parser.serialize(len), params=[parser.serialize("ab")])
+        response = client.post("/v1/faas/execute-sync", json=sync_ctx.dict())
+    finally:
+        sync_admission.configure(max_concurrency=max_concurrency, max_queue=max_queue)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,62 @@
+from unittest.mock import Mock
+import asyncio
+import json
+
+from models.faas import ExecResponse, ExecReturnCode, ExecSyncParams, ExecutionMode
+from modules._async_rabbitmq_client import AsyncRabbitMQClient
+
+RABBITMQ_HOST = "amqp://localhost"
+REQUEST_QUEUE = "nature_flavour_request"
+
+def make_client(execute):
+    return AsyncRabbitMQClient(host=RABBITMQ_HOST, queue=REQUEST_QUEUE, execute=execute, max_in_flight=2)
+
+def test_process_message_executes_in_process():
+
+    executed = []
+
+    def execute(offloaded_func: ExecSyncParams) -> ExecResponse:
+        executed.append(offloaded_func)
+        return ExecResponse(res="gAVLBS4=", ret_code=ExecReturnCode.SUCCESS, err=None)
+
+    client = make_client(execute)
+    ch = Mock()
+    method = Mock()
+    body = {
+        "mode": ExecutionMode.SYNC,
+        "payload": {"lang": "PY", "fc": "", "fc_hash": "", "params": ["gAVLAi4="], "app_req_id": 1},
+        "request_id": "request_id"
+    }
+
+    asyncio.run(client._process_message(ch, method, json.dumps(body)))
+
+    assert executed[0].params == ["gAVLAi4="]
+    ch.basic_publish.assert_called_once()
+    published = json.loads(ch.basic_publish.call_args.kwargs["body"])
+    assert ch.basic_publish.call_args.kwargs["routing_key"] == "request_id"
+    assert published["code"] == 200
+    assert published["message"]["res"] == "gAVLBS4="
+    ch.basic_ack.assert_called_once_with(delivery_tag=method.delivery_tag)
+
+def test_process_message_invalid_payload():
+
+    execute = Mock()
+    client = make_client(execute)
+    ch = Mock()
+    method = Mock()
+    body = {"mode": ExecutionMode.SYNC, "payload": {"params": "not-a-list"}, "request_id": "request_id"}
+
+    asyncio.run(client._process_message(ch, method, json.dumps(body)))
+
+    execute.assert_not_called()
+    assert json.loads(ch.basic_publish.call_args.kwargs["body"])["code"] == 422
+    ch.basic_ack.assert_called_once()
+
+def test_reconnect_backoff():
+
+    client = make_client(Mock())
+    client.RECONNECT_MAX_DELAY = 5
+
+    delays = [client.next_reconnect_delay() for _ in range(5)]
+
+    assert delays == [1, 2, 4, 5, 5]
@@ -0,0 +1,109 @@
+from modules._blob_cache import BlobCache, BlobNotFoundError
+from modules._lru_store import DiskLRUStore, MemoryLRUStore
+from modules._faas_parser import FaasParser
+from models.faas import *
+from main import app
+
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+import cloudpickle
+import hashlib
+import base64
+import pytest
+
+client = TestClient(app)
+parser = FaasParser()
+
+def myfunction(a: int, b: int) -> int:
+    return a + b
+
+def test_memory_store_lru_eviction():
+
+    store = MemoryLRUStore(max_bytes=10)
+    store.put("a", b"1234")
+    store.put("b", b"1234")
+    # Touch "a" so "b" becomes the least recently used
+    store.get("a")
+    store.put("c", b"1234")
+
+    assert "a" in store
+    assert "b" not in store
+    assert "c" in store
+    assert store.total_bytes == 8
+    assert store.put("big", b"x" * 11) is False
+
+def test_disk_store_eviction_and_reload(tmp_path):
+
+    store = DiskLRUStore(str(tmp_path), max_bytes=10)
+    store.put("a", b"1234")
+    store.put("b", b"1234")
+    store.get_path("a")
+    store.put("c", b"1234")
+
+    assert store.read("a") == b"1234"
+    assert store.read("b") is None
+    assert not (tmp_path / "b").exists()
+
+    reloaded = DiskLRUStore(str(tmp_path), max_bytes=10)
+    assert "a" in reloaded and "c" in reloaded
+    assert reloaded.total_bytes == 8
+
+def test_blob_cache_tiers(tmp_path):
+
+    cache = BlobCache(directory=str(tmp_path), memory_max_bytes=4, disk_max_bytes=1024)
+    data = b"payload"
+    digest = cache.put(data)
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    # Too big for the memory tier, served from disk
+    assert digest not in cache.memory
+    assert cache.get(digest) == data
+    assert cache.missing([digest, "0" * 64]) == ["0" * 64]
+    assert cache.resolve(BlobCache.REF_PREFIX + digest) == data
+    assert cache.resolve(base64.b64encode(data).decode()) is None
+
+    with pytest.raises(BlobNotFoundError):
+        cache.resolve(BlobCache.REF_PREFIX + "0" * 64)
+
+    with pytest.raises(ValueError):
+        cache.put(data, digest="0" * 64)
+
+    # Digests are used as file names, reject anything else
+    assert cache.get("../../etc/passwd") is None
+
+@patch("api.v1.faas.get_vmid")
+def test_exec_sync_with_blob_refs(mock_get_vmid, tmp_path):
+
+    mock_get_vmid.return_value = "test_vmid"
+
+    with patch("api.v1.faas.blob_cache", BlobCache(directory=str(tmp_path))):
+        fc_blob = cloudpickle.dumps(myfunction)
+        param_blob = cloudpickle.dumps(40)
+        fc_digest = hashlib.sha256(fc_blob).hexdigest()
+        param_digest = hashlib.sha256(param_blob).hexdigest()
+
+        for blob, digest in [(fc_blob, fc_digest), (param_blob, param_digest)]:
+            response = client.put(f"/v1/faas/blobs/{digest}", json={"data": base64.b64encode(blob).decode()})
+            assert response.status_code == 200
+
+        response = client.post("/v1/faas/blobs/missing", json={"digests": [fc_digest, param_digest, "f" * 64]})
+        assert response.json()["missing"] == ["f" * 64]
+
+        sync_ctx = ExecSyncParams(
+            lang="PY",
+            fc=BlobCache.REF_PREFIX + fc_digest,
+            params=[BlobCache.REF_PREFIX + param_digest, parser.serialize(2)]
+        )
+        response = client.post("/v1/faas/execute-sync", json=sync_ctx.dict())
+        result = response.json()
+
+        assert result["ret_code"] == ExecReturnCode.SUCCESS.value
+        assert result["res"] == parser.serialize(42)
+
+    # Only the temporary disk tier was written to
+    assert len(list(tmp_path.iterdir())) == 2
+
+def test_upload_blob_digest_mismatch():
+
+    response = client.put(f"/v1/faas/blobs/{'0' * 64}", json={"data": base64.b64encode(b"data").decode()})
+    assert response.status_code == 400
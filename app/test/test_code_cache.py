@@ -0,0 +1,107 @@
+from modules._code_cache import CodeCache, code_cache_hits_counter, code_cache_evictions_counter
+from modules._faas_parser import FaasParser
+from modules._logger import CognitLogger
+from models.faas import ExecSyncParams
+import api.v1.faas
+
+from unittest.mock import patch
+import cloudpickle
+import base64
+import pytest
+
+cognit_logger = CognitLogger()
+
+ADD_SOURCE = """
+def add(a, b):
+    return a + b
+"""
+
+COUNTER_SOURCE = """
+calls = 0
+
+def count():
+    global calls
+    calls += 1
+    return calls
+"""
+
+def test_compiled_once():
+
+    cognit_logger.info("Code cache: compiled once")
+
+    cache = CodeCache()
+    hits = code_cache_hits_counter._value.get()
+
+    with patch("modules._code_cache.compile", side_effect=compile, create=True) as mock_compile:
+        assert cache.load(ADD_SOURCE)(2, 3) == 5
+        assert cache.load(ADD_SOURCE)(4, 5) == 9
+
+    assert mock_compile.call_count == 1
+    assert code_cache_hits_counter._value.get() == hits + 1
+    assert len(cache) == 1
+
+def test_isolated_namespaces():
+
+    cognit_logger.info("Code cache: isolated namespaces")
+
+    cache = CodeCache()
+
+    # Every load starts from a fresh namespace
+    assert cache.load(COUNTER_SOURCE)() == 1
+    assert cache.load(COUNTER_SOURCE)() == 1
+
+    # The runtime's globals can not be overwritten
+    fc = cache.load("faas_parser = None\ndef shadow():\n    return faas_parser\n")
+    assert fc() is None
+    assert isinstance(api.v1.faas.faas_parser, FaasParser)
+    assert not hasattr(api.v1.faas, "shadow")
+
+    # Functions are pickled by value, as needed by forkserver workers
+    assert cloudpickle.loads(cloudpickle.dumps(cache.load(ADD_SOURCE)))(1, 2) == 3
+
+def test_eviction():
+
+    cognit_logger.info("Code cache: eviction")
+
+    cache = CodeCache(max_entries=2)
+    evictions = code_cache_evictions_counter._value.get()
+
+    sources = [f"def f{i}():\n    return {i}\n" for i in range(3)]
+    for source in sources:
+        cache.load(source)
+
+    assert len(cache) == 2
+    assert code_cache_evictions_counter._value.get() == evictions + 1
+
+    cache.configure(max_entries=1)
+    assert len(cache) == 1
+    assert cache.load(sources[2])() == 2
+
+def test_no_function():
+
+    cognit_logger.info("Code cache: no function")
+
+    with pytest.raises(ValueError):
+        CodeCache().load("x = 1\n")
+
+    with pytest.raises(SyntaxError):
+        CodeCache().load("def broken(:\n")
+
+def test_protobuf_function():
+
+    cognit_logger.info("Code cache: Protobuf function")
+
+    from api.v1 import nano_pb2
+
+    my_func = nano_pb2.MyFunc(fc_code=ADD_SOURCE)
+    params = []
+    for value in (2, 3):
+        param = nano_pb2.MyParam()
+        param.my_int32.values.append(value)
+        params.append(base64.b64encode(param.SerializeToString()).decode())
+
+    offloaded_func = ExecSyncParams(lang="C", fc=base64.b64encode(my_func.SerializeToString()).decode(), params=params)
+    fc, args = api.v1.faas.deserialize_protobuf_fc(offloaded_func)
+
+    assert fc(*args) == 5
+    assert not hasattr(api.v1.faas, "add")
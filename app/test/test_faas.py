@@ -1,3 +1,7 @@
+from api.v1.faas import submit_async_execution, set_result_store, default_result_store, faas_manager
+from modules._result_store import DiskSpill, ResultStore
+from modules._task_registry import SharedTaskRegistry
+import api.v1.faas
 from modules._faas_parser import FaasParser
 from modules._logger import CognitLogger
 from models.faas import *
@@ -6,6 +10,10 @@ from main import app
 from fastapi.testclient import TestClient
 from unittest.mock import patch
 import cloudpickle
+import pytest
+import threading
+import time
+import json
 import base64
 
 cognit_logger = CognitLogger()
@@ -42,6 +50,27 @@ def test_exec_sync_ok(mock_get_vmid):
     assert result["res"] == parser.serialize(5)
     assert result["err"] == None
 
+@patch("api.v1.faas.get_vmid")
+def test_exec_sync_counters(mock_get_vmid):
+
+    cognit_logger.info("Execute Sync: execution counters")
+
+    mock_get_vmid.return_value = "test_vmid"
+
+    executed = api.v1.faas.func_executed_counter.labels(vm_id="test_vmid")._value.get()
+    succeeded = api.v1.faas.func_succeeded_counter.labels(vm_id="test_vmid")._value.get()
+
+    fc = base64.b64encode(cloudpickle.dumps(myfunction)).decode("utf-8")
+    sync_ctx = ExecSyncParams(lang="PY", fc=fc, params=[parser.serialize(2), parser.serialize(3)])
+    assert client.post("/v1/faas/execute-sync", json=sync_ctx.dict()).status_code == 200
+
+    assert api.v1.faas.func_executed_counter.labels(vm_id="test_vmid")._value.get() == executed + 1
+    assert api.v1.faas.func_succeeded_counter.labels(vm_id="test_vmid")._value.get() == succeeded + 1
+
+    # The counters are the only source of the sr_func_*_total families
+    families = [metric.name for metric in api.v1.faas.CognitFuncExecCollector().collect()]
+    assert not [name for name in families if name.startswith(("sr_func_executed", "sr_func_succeeded", "sr_func_failed"))]
+
 @patch("api.v1.faas.get_vmid")
 def test_exec_sync_wrong_function(mock_get_vmid):
 
@@ -125,3 +154,361 @@ def test_exec_sync_wrong_language(mock_get_vmid):
     assert result["ret_code"] == ExecReturnCode.ERROR.value
     assert parser.deserialize(result["res"]) is None
     assert result["err"] != ""
+
+@patch("api.v1.faas.get_vmid")
+def test_exec_sync_large_params(mock_get_vmid):
+
+    cognit_logger.info("Execute Sync: Large parameters")
+
+    mock_get_vmid.return_value = "test_vmid"
+
+    fc = base64.b64encode(cloudpickle.dumps(myfunction)).decode("utf-8")
+    param_list = [parser.serialize("a" * 512 * 1024), parser.serialize("b")]
+
+    sync_ctx = ExecSyncParams(lang="PY", fc=fc, params=param_list)
+    response = client.post("/v1/faas/execute-sync", json=sync_ctx.dict())
+
+    assert response.status_code == 200
+    assert parser.deserialize(response.json()["res"]) == "a" * 512 * 1024 + "b"
+
+    response = client.post("/v1/faas/execute-sync", json={"lang": "PY", "fc": fc, "params": param_list + [3]})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "params", 2]
+
+def test_submit_async_execution_callback():
+
+    cognit_logger.info("Submit Async: result callback")
+
+    fc = base64.b64encode(cloudpickle.dumps(myfunction)).decode("utf-8")
+    async_ctx = ExecAsyncParams(lang="PY", fc=fc, params=[parser.serialize(2), parser.serialize(3)])
+
+    done = threading.Event()
+    responses = []
+
+    def on_done(exec_response):
+        responses.append(exec_response)
+        done.set()
+
+    task_id = submit_async_execution(async_ctx, on_done)
+
+    assert task_id != ""
+    assert done.wait(timeout=10)
+    assert responses[0].ret_code == ExecReturnCode.SUCCESS
+    assert responses[0].res == parser.serialize(5)
+
+def test_async_result_not_delayed_by_sync_execution():
+
+    cognit_logger.info("Submit Async: result stored while a sync execution runs")
+
+    fc = base64.b64encode(cloudpickle.dumps(myfunction)).decode("utf-8")
+    async_ctx = ExecAsyncParams(lang="PY", fc=fc, params=[parser.serialize(2), parser.serialize(3)])
+
+    done = threading.Event()
+    task_id = submit_async_execution(async_ctx, lambda exec_response: done.set())
+
+    # A sync execution holds the executor lock for as long as it runs
+    with api.v1.faas.executor_lock:
+        assert done.wait(timeout=10)
+        assert api.v1.faas.result_store.get(task_id) is not None
+
+def slow_function(seconds: float) -> float:
+    import time
+    time.sleep(seconds)
+    return seconds
+
+def test_cancel_async_execution():
+
+    cognit_logger.info("Cancel Async: running task is killed")
+
+    fc = base64.b64encode(cloudpickle.dumps(slow_function)).decode("utf-8")
+    async_ctx = ExecAsyncParams(lang="PY", fc=fc, params=[parser.serialize(30)])
+
+    done = threading.Event()
+    responses = []
+
+    def on_done(exec_response):
+        responses.append(exec_response)
+        done.set()
+
+    task_id = submit_async_execution(async_ctx, on_done)
+
+    response = client.delete(f"/v1/faas/{task_id}")
+    assert response.status_code == 200
+    assert response.json()["cancelled"] is True
+
+    assert done.wait(timeout=10)
+    assert responses[0].ret_code == ExecReturnCode.CANCELLED
+
+    # Nothing left to cancel
+    assert client.delete(f"/v1/faas/{task_id}").json()["cancelled"] is False
+    assert client.delete("/v1/faas/unknown-task").status_code == 404
+
+def test_async_execution_timeout():
+
+    cognit_logger.info("Execute Async: timeout")
+
+    fc = base64.b64encode(cloudpickle.dumps(slow_function)).decode("utf-8")
+    async_ctx = ExecAsyncParams(lang="PY", fc=fc, params=[parser.serialize(30)], timeout_ms=300)
+
+    done = threading.Event()
+    responses = []
+
+    def on_done(exec_response):
+        responses.append(exec_response)
+        done.set()
+
+    submit_async_execution(async_ctx, on_done)
+
+    assert done.wait(timeout=10)
+    assert responses[0].ret_code == ExecReturnCode.TIMEOUT
+
+@patch("api.v1.faas.get_vmid")
+def test_async_execution_outcome_metrics(mock_get_vmid):
+
+    cognit_logger.info("Execute Async: failed outcome in the metrics")
+
+    mock_get_vmid.return_value = "test_outcome_vmid"
+
+    fc = base64.b64encode(cloudpickle.dumps(slow_function)).decode("utf-8")
+    async_ctx = ExecAsyncParams(lang="PY", fc=fc, params=[parser.serialize(30)], timeout_ms=300)
+    submit_async_execution(async_ctx)
+
+    def outcomes():
+        return {
+            sample.labels["function_outcome"]
+            for metric in api.v1.faas.execution_time_histogram.collect() for sample in metric.samples
+            if sample.labels.get("vmid") == "test_outcome_vmid"
+        }
+
+    # Metrics are recorded once the result is published
+    for _ in range(100):
+        if outcomes():
+            break
+        time.sleep(0.1)
+
+    assert outcomes() == {"error"}
+
+@patch("api.v1.faas.get_vmid")
+def test_async_status_long_poll(mock_get_vmid):
+
+    cognit_logger.info("Async Status: long-poll")
+
+    mock_get_vmid.return_value = "test_vmid"
+
+    fc = base64.b64encode(cloudpickle.dumps(slow_function)).decode("utf-8")
+    async_ctx = ExecAsyncParams(lang="PY", fc=fc, params=[parser.serialize(0.5)])
+
+    response = client.post("/v1/faas/execute-async", json=async_ctx.dict())
+    task_id = response.json()["exec_id"]["faas_task_uuid"]
+
+    status = client.get(f"/v1/faas/{task_id}/status").json()
+    assert status["status"] == "WORKING"
+    assert status["progress"]["state"] in ("QUEUED", "RUNNING")
+
+    response = client.get(f"/v1/faas/{task_id}/status", params={"wait": "20s"})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "READY"
+    assert parser.deserialize(response.json()["res"]["res"]) == 0.5
+
+    assert client.get(f"/v1/faas/{task_id}/status", params={"wait": "soon"}).status_code == 400
+    assert client.get("/v1/faas/unknown-task/status", params={"wait": "10ms"}).status_code == 404
+
+@patch("api.v1.faas.get_vmid")
+def test_async_status_events(mock_get_vmid):
+
+    cognit_logger.info("Async Status: server-sent events")
+
+    mock_get_vmid.return_value = "test_vmid"
+
+    fc = base64.b64encode(cloudpickle.dumps(slow_function)).decode("utf-8")
+    async_ctx = ExecAsyncParams(lang="PY", fc=fc, params=[parser.serialize(0.5)])
+
+    response = client.post("/v1/faas/execute-async", json=async_ctx.dict())
+    task_id = response.json()["exec_id"]["faas_task_uuid"]
+
+    with client.stream("GET", f"/v1/faas/{task_id}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line[len("data: "):] for line in response.iter_lines() if line.startswith("data: ")]
+
+    assert [json.loads(event)["status"] for event in events] == ["WORKING", "READY"]
+    assert client.get("/v1/faas/unknown-task/events").status_code == 404
+
+def large_result(size: int) -> bytes:
+    return b"x" * size
+
+@patch("api.v1.faas.get_vmid")
+def test_async_spilled_result(mock_get_vmid, tmp_path):
+
+    cognit_logger.info("Async Status: spilled result")
+
+    mock_get_vmid.return_value = "test_vmid"
+
+    set_result_store(ResultStore(spill=DiskSpill(str(tmp_path)), spill_threshold=1024))
+
+    try:
+        fc = base64.b64encode(cloudpickle.dumps(large_result)).decode("utf-8")
+        async_ctx = ExecAsyncParams(lang="PY", fc=fc, params=[parser.serialize(64 * 1024)])
+
+        response = client.post("/v1/faas/execute-async", json=async_ctx.dict())
+        task_id = response.json()["exec_id"]["faas_task_uuid"]
+
+        response = client.get(f"/v1/faas/{task_id}/status", params={"wait": "20s"})
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "READY"
+        assert parser.deserialize(response.json()["res"]["res"]) == b"x" * 64 * 1024
+
+        # The future is done slightly before its callback stores the result
+        for _ in range(100):
+            if (tmp_path / f"{task_id}.res").exists():
+                break
+            time.sleep(0.01)
+        assert list(tmp_path.iterdir()) == [tmp_path / f"{task_id}.res"]
+
+        # The outcome outlives the task in the manager
+        assert client.delete(f"/v1/faas/{task_id}").json()["cancelled"] is False
+    finally:
+        set_result_store(default_result_store())
+
+def test_async_task_of_another_worker(tmp_path):
+
+    cognit_logger.info("Async Status: task running in another worker process")
+
+    local = SharedTaskRegistry(str(tmp_path / "tasks.db"))
+    remote = SharedTaskRegistry(str(tmp_path / "tasks.db"))
+    remote.owner = -1
+    faas_manager.configure_shared_state(local)
+
+    try:
+        remote.add("remote-task", time.monotonic())
+
+        status = client.get("/v1/faas/remote-task/status").json()
+        assert status["status"] == "WORKING"
+        assert status["progress"]["state"] == "QUEUED"
+
+        assert client.delete("/v1/faas/remote-task").json()["cancelled"] is True
+        assert remote.take_cancel_requests() == ["remote-task"]
+
+        def finish():
+            time.sleep(0.3)
+            api.v1.faas.result_store.put("remote-task", ExecResponse(ret_code=ExecReturnCode.SUCCESS, res=parser.serialize(5), err=None))
+            remote.remove("remote-task")
+
+        threading.Thread(target=finish).start()
+        response = client.get("/v1/faas/remote-task/status", params={"wait": "10s"})
+
+        assert response.json()["status"] == "READY"
+        assert parser.deserialize(response.json()["res"]["res"]) == 5
+    finally:
+        faas_manager.configure_shared_state(None)
+        api.v1.faas.result_store.delete("remote-task")
+        local.close()
+        remote.close()
+
+def encode_pb_param(field: str, value) -> str:
+    from api.v1 import nano_pb2
+
+    param = nano_pb2.MyParam()
+    if field in ("my_string", "my_bytes"):
+        setattr(param, field, value)
+    else:
+        getattr(param, field).values.extend(value)
+    return base64.b64encode(param.SerializeToString()).decode()
+
+def test_deserialize_protobuf_params():
+
+    cognit_logger.info("Protobuf: parameters")
+
+    from api.v1 import nano_pb2
+
+    params = [
+        encode_pb_param("my_double", [1.5, 2.5]),
+        encode_pb_param("my_sint64", [-3, 4]),
+        encode_pb_param("my_bool", [True]),
+        encode_pb_param("my_string", "text"),
+        encode_pb_param("my_bytes", b"\x00\x01"),
+    ]
+
+    # Values are copied, not overwritten when the next parameter is parsed
+    assert api.v1.faas.deserialize_protobuf_params(params) == [[1.5, 2.5], [-3, 4], True, "text", b"\x00\x01"]
+
+    param_list = nano_pb2.FaasResponse()
+    for param in params:
+        param_list.my_faas_response.add().ParseFromString(base64.b64decode(param))
+    encoded_list = base64.b64encode(param_list.SerializeToString()).decode()
+
+    assert api.v1.faas.deserialize_protobuf_param_list(encoded_list) == [[1.5, 2.5], [-3, 4], True, "text", b"\x00\x01"]
+
+    my_func = nano_pb2.MyFunc(fc_code="def scale(values, factor):\n    return [v * factor for v in values]\n")
+    offloaded_func = ExecSyncParams(
+        lang="C",
+        fc=base64.b64encode(my_func.SerializeToString()).decode(),
+        params=[base64.b64encode(nano_pb2.FaasResponse(my_faas_response=[
+            nano_pb2.MyParam(my_double=nano_pb2.MyDouble(values=[1.0, 2.0])),
+            nano_pb2.MyParam(my_int32=nano_pb2.MyInt32(values=[3])),
+        ]).SerializeToString()).decode()],
+        pb_params_list=True,
+    )
+    fc, args = api.v1.faas.deserialize_protobuf_fc(offloaded_func)
+
+    assert fc(*args) == [3.0, 6.0]
+
+    with pytest.raises(ValueError):
+        api.v1.faas.deserialize_protobuf_params([base64.b64encode(nano_pb2.MyParam().SerializeToString()).decode()])
+
+def decode_pb_result(serialized: bytes) -> list:
+    from api.v1 import nano_pb2
+
+    faas_response = nano_pb2.FaasResponse()
+    faas_response.ParseFromString(serialized)
+    return [(param.WhichOneof("param"), api.v1.faas.decode_protobuf_param(param)) for param in faas_response.my_faas_response]
+
+def test_pb_serialize_result():
+
+    cognit_logger.info("Protobuf: result encoding")
+
+    from api.v1 import nano_pb2
+
+    # Same wire format as filling the messages through the Protobuf API
+    expected = nano_pb2.FaasResponse()
+    expected.my_faas_response.add().my_double.values.extend([1.5, -2.5])
+    expected.my_faas_response.add().my_bool.values.extend([True, False])
+    expected.my_faas_response.add().my_int64.values.extend([-1, 2 ** 40])
+    expected.my_faas_response.add().my_string = "tëxt"
+
+    assert api.v1.faas.pb_serialize_result([[1.5, -2.5], [True, False], [-1, 2 ** 40], "tëxt"]) == expected.SerializeToString()
+
+    # Lists of strings or bytes and nested results yield consecutive parameters
+    assert decode_pb_result(api.v1.faas.pb_serialize_result((["a", "b"], [b"x"], [[1, 2], [0.5, 3]]))) == [
+        ("my_string", "a"), ("my_string", "b"), ("my_bytes", b"x"), ("my_int64", [1, 2]), ("my_double", [0.5, 3.0]),
+    ]
+
+    with pytest.raises(TypeError):
+        api.v1.faas.pb_serialize_result([None])
+
+def test_pb_serialize_numpy_result():
+
+    cognit_logger.info("Protobuf: NumPy result encoding")
+
+    np = pytest.importorskip("numpy")
+
+    result = [
+        np.arange(6, dtype=np.int16).reshape(2, 3),
+        np.linspace(0, 1, 3),
+        np.float32(1.5),
+        np.array([True, False]),
+        np.arange(4, dtype=np.uint64)[::2],
+        np.array(["ab", "c"]),
+    ]
+
+    assert decode_pb_result(api.v1.faas.pb_serialize_result(result)) == [
+        ("my_sfixed32", [0, 1, 2, 3, 4, 5]),
+        ("my_double", [0.0, 0.5, 1.0]),
+        ("my_float", 1.5),
+        ("my_bool", [True, False]),
+        ("my_fixed64", [0, 2]),
+        ("my_string", "ab"),
+        ("my_string", "c"),
+    ]
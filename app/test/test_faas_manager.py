@@ -0,0 +1,161 @@
+from modules._faas_manager import FaasManager, TaskState
+from modules._executor import Executor
+from modules._pyexec import PyExec
+from models.faas import AsyncExecState, ExecPriority, ExecReturnCode
+
+import threading
+import time
+
+def add(a, b):
+    return a + b
+
+class BlockingExecutor(Executor):
+    """
+    Executor that runs until released, recording the order of execution.
+    """
+
+    def __init__(self, name, order, release):
+        self.name = name
+        self.order = order
+        self.release = release
+
+    def run(self):
+        self.order.append(self.name)
+        self.release.wait(timeout=10)
+        return self
+
+def wait_done(manager, task_id):
+    for _ in range(3000):
+        status, result = manager.get_task_status(task_id)
+        if status != TaskState.WORKING:
+            return status, result
+        time.sleep(0.01)
+    raise AssertionError("Task did not finish")
+
+def test_thread_pool_runs_task():
+
+    manager = FaasManager(pool="thread", max_workers=2)
+    task_id = manager.add_task(PyExec(fc=add, params=[2, 3]))
+
+    status, executor = wait_done(manager, task_id)
+
+    assert status == TaskState.OK
+    assert executor.get_result() == 5
+    assert manager.get_task_status("unknown") is None
+    manager.shutdown()
+
+def test_process_pool_runs_task():
+
+    manager = FaasManager(pool="process", max_workers=1)
+    done = threading.Event()
+    task_id = manager.add_task(PyExec(fc=lambda a: a * 2, params=[21]), on_done=lambda future: done.set())
+
+    assert done.wait(timeout=30)
+    status, executor = manager.get_task_status(task_id)
+
+    assert status == TaskState.OK
+    assert executor.get_result() == 42
+    manager.shutdown()
+
+def test_process_pool_runs_isolated_task():
+
+    # As submitted by the API, the function runs in a worker process of the pool process
+    manager = FaasManager(pool="process", max_workers=1)
+    done = threading.Event()
+    task_id = manager.add_task(PyExec(fc=add, params=[2, 3], isolated=True), on_done=lambda future: done.set())
+
+    assert done.wait(timeout=30)
+    status, executor = manager.get_task_status(task_id)
+
+    assert status == TaskState.OK
+    assert executor.get_ret_code() == ExecReturnCode.SUCCESS
+    assert executor.get_result() == 5
+    manager.shutdown()
+
+def test_queued_tasks_dispatched_by_priority():
+
+    manager = FaasManager(pool="thread", max_workers=1)
+    order = []
+    release = threading.Event()
+
+    first = manager.add_task(BlockingExecutor("first", order, release))
+    batch = manager.add_task(BlockingExecutor("batch", order, release), priority=ExecPriority.BATCH)
+    critical = manager.add_task(BlockingExecutor("critical", order, release), priority=ExecPriority.CRITICAL)
+
+    assert manager.get_task_status(batch) == (TaskState.WORKING, None)
+    assert manager.queue_depth == 2
+
+    release.set()
+    for task_id in (first, batch, critical):
+        wait_done(manager, task_id)
+
+    assert order == ["first", "critical", "batch"]
+    manager.shutdown()
+
+def test_cancel_queued_task():
+
+    manager = FaasManager(pool="thread", max_workers=1)
+    order = []
+    release = threading.Event()
+
+    running = manager.add_task(BlockingExecutor("running", order, release))
+    queued = manager.add_task(PyExec(fc=add, params=[2, 3]))
+
+    assert manager.cancel_task(queued) is True
+    release.set()
+
+    status, executor = wait_done(manager, queued)
+
+    assert status == TaskState.OK
+    assert executor.get_ret_code() == ExecReturnCode.CANCELLED
+    wait_done(manager, running)
+    assert manager.cancel_task(running) is False
+    assert manager.cancel_task("unknown") is None
+    manager.shutdown()
+
+def test_dask_pool_reuses_scattered_function():
+
+    manager = FaasManager(pool="dask")
+    manager.configure_dask(n_workers=1, threads_per_worker=2, memory_limit="512MB")
+
+    assert manager.max_workers == 2
+
+    # Isolated, as submitted by the API: the Dask worker forks a process per call
+    task_ids = [manager.add_task(PyExec(fc=add, params=[i, 1], isolated=True), fc_hash="add") for i in range(3)]
+    results = [wait_done(manager, task_id) for task_id in task_ids]
+
+    assert [executor.get_result() for _, executor in results] == [1, 2, 3]
+    assert all(status == TaskState.OK for status, _ in results)
+    assert list(manager._scattered_fcs) == ["add"]
+    manager.shutdown()
+
+def test_status_of_running_task_does_not_block():
+
+    manager = FaasManager(pool="thread", max_workers=1)
+    order = []
+    release = threading.Event()
+
+    running = manager.add_task(BlockingExecutor("running", order, release))
+    queued = manager.add_task(BlockingExecutor("queued", order, release))
+
+    start = time.monotonic()
+    assert manager.get_task_status(running) == (TaskState.WORKING, None)
+    assert time.monotonic() - start < 1
+
+    assert manager.get_task_progress(running).state == AsyncExecState.RUNNING
+    assert manager.get_task_progress(queued).state == AsyncExecState.QUEUED
+    assert manager.get_task_progress("unknown") is None
+
+    release.set()
+    wait_done(manager, running)
+    wait_done(manager, queued)
+
+    progress = manager.get_task_progress(running)
+    assert progress.state == AsyncExecState.FINISHED
+    assert progress.running_s >= 0
+
+    # Nothing is left of a task once its outcome was stored elsewhere
+    manager.release_task(running)
+    assert manager.get_task_progress(running) is None
+    assert running not in manager.task_times
+    manager.shutdown()
@@ -0,0 +1,75 @@
+from modules import _fast_json
+from modules._fast_json import SCAN_THRESHOLD, FastJSONResponse, dumps, loads_large, parse_envelope, result_message
+from modules._logger import CognitLogger
+from models.faas import PASSTHROUGH_FIELDS, ExecPriority, ExecResponse, ExecReturnCode, ExecSyncParams
+
+from pydantic import ValidationError
+import pytest
+import json
+
+cognit_logger = CognitLogger()
+
+def test_result_message():
+
+    cognit_logger.info("Fast JSON: result message")
+
+    response = ExecResponse(ret_code=ExecReturnCode.SUCCESS, res="gAVLBS4=", err=None)
+
+    expected = {"code": 200, "message": json.loads(response.json())}
+
+    assert json.loads(result_message(response, 200)) == expected
+    assert json.loads(result_message(response.json().encode(), 200)) == expected
+
+def test_stdlib_fallback(monkeypatch):
+
+    cognit_logger.info("Fast JSON: standard library fallback")
+
+    response = ExecResponse(ret_code=ExecReturnCode.ERROR, res=None, err="boom")
+    fast = dumps(response)
+
+    monkeypatch.setattr(_fast_json, "orjson", None)
+
+    assert dumps(response) == fast
+    assert FastJSONResponse(response).body == fast
+    assert FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
+
+def test_loads_large():
+
+    cognit_logger.info("Fast JSON: large document")
+
+    payload = {
+        "lang": "PY",
+        "fc": "A" * SCAN_THRESHOLD,
+        "params": ["B" * 1024, "C/+=" * 100, ""],
+        "app_req_id": 3,
+        "nested": {"values": [1.5, -2, True, False, None], "empty": {}, "list": []},
+    }
+
+    for body in (json.dumps(payload).encode(), json.dumps(payload, indent=2).encode()):
+        assert loads_large(body) == payload
+
+    # Escaped strings fall back to the full decoder
+    escaped = {"fc": "a\"b\\c" + "x" * SCAN_THRESHOLD, "params": ["é"]}
+    assert loads_large(json.dumps(escaped).encode()) == escaped
+    assert loads_large(json.dumps(escaped, ensure_ascii=False).encode()) == escaped
+
+    with pytest.raises(ValueError):
+        loads_large(b'{"fc": "' + b"x" * SCAN_THRESHOLD)
+
+def test_parse_envelope():
+
+    cognit_logger.info("Fast JSON: envelope validation")
+
+    params = ["gAVLBS4=", "gAVLBi4="]
+    offloaded_func = parse_envelope(ExecSyncParams, {"lang": "PY", "fc": "gAVLBS4=", "params": params, "priority": "HIGH"}, PASSTHROUGH_FIELDS)
+
+    assert offloaded_func.params is params
+    assert offloaded_func.priority == ExecPriority.HIGH
+    assert offloaded_func.fc == "gAVLBS4="
+
+    with pytest.raises(ValidationError) as e:
+        parse_envelope(ExecSyncParams, {"fc": 1, "params": ["gAVLBS4=", 2]}, PASSTHROUGH_FIELDS)
+    assert [error["loc"] for error in e.value.errors()] == [("fc",), ("params", 1)]
+
+    with pytest.raises(ValidationError):
+        parse_envelope(ExecSyncParams, {"params": [], "deadline_ms": "soon"}, PASSTHROUGH_FIELDS)
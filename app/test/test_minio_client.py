@@ -0,0 +1,322 @@
+from modules._s3_client_factory import S3ClientFactory, s3_pool_size_gauge
+from modules._minio_cache import MinioObjectCache
+from modules._minio_client import MinioClient
+
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from unittest.mock import Mock, patch
+from io import BytesIO
+import threading
+import pytest
+import boto3
+import time
+import os
+
+@pytest.fixture(autouse=True)
+def clear_shared_clients():
+    # Mocked boto3 clients must not leak between tests through the factory
+    S3ClientFactory.clear()
+    yield
+    S3ClientFactory.clear()
+
+def not_modified():
+    return ClientError(
+        {"Error": {"Code": "304", "Message": "Not Modified"}, "ResponseMetadata": {"HTTPStatusCode": 304}},
+        "GetObject",
+    )
+
+def object_response(data: bytes, etag: str = '"etag-1"'):
+    return {"Body": BytesIO(data), "ContentLength": len(data), "ETag": etag}
+
+@patch("boto3.client")
+def test_download_object_through_cache(mock_boto_client, tmp_path):
+
+    s3 = Mock()
+    mock_boto_client.return_value = s3
+    cache = MinioObjectCache(directory=str(tmp_path), max_bytes=1024)
+    client = MinioClient("http://localhost:9000", "key", "secret", cache=cache)
+
+    s3.get_object.return_value = object_response(b"dataset")
+    assert client.download_object("bucket", "data.csv") == b"dataset"
+    s3.get_object.assert_called_once_with(Bucket="bucket", Key="data.csv")
+
+    # Second download is revalidated with the cached ETag and served locally
+    s3.get_object.reset_mock()
+    s3.get_object.return_value = None
+    s3.get_object.side_effect = not_modified()
+    download_path = str(tmp_path / "copy.csv")
+    assert client.download_object("bucket", "data.csv", download_path) == download_path
+    s3.get_object.assert_called_once_with(Bucket="bucket", Key="data.csv", IfNoneMatch='"etag-1"')
+    with open(download_path, "rb") as f:
+        assert f.read() == b"dataset"
+
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+    # ETags survive a restart
+    name = cache.entry_name("bucket", "data.csv")
+    assert MinioObjectCache(directory=str(tmp_path), max_bytes=1024).etag(name) == '"etag-1"'
+
+def test_cache_refetches_changed_object(tmp_path):
+
+    s3 = Mock()
+    cache = MinioObjectCache(directory=str(tmp_path), max_bytes=1024)
+
+    s3.get_object.return_value = object_response(b"v1")
+    assert cache.read(s3, "bucket", "key") == b"v1"
+
+    s3.get_object.return_value = object_response(b"v2", etag='"etag-2"')
+    assert cache.read(s3, "bucket", "key") == b"v2"
+    assert cache.etag(cache.entry_name("bucket", "key")) == '"etag-2"'
+
+def test_cache_etags_per_entry(tmp_path):
+
+    s3 = Mock()
+    cache = MinioObjectCache(directory=str(tmp_path), max_bytes=4)
+    first, second = cache.entry_name("bucket", "first"), cache.entry_name("bucket", "second")
+
+    s3.get_object.return_value = object_response(b"abc")
+    cache.read(s3, "bucket", "first")
+    s3.get_object.return_value = object_response(b"def", etag='"etag-2"')
+    cache.read(s3, "bucket", "second")
+
+    # Only the evicted entry loses its ETag
+    assert cache.etag(first) is None
+    assert not (tmp_path / "etags" / first).exists()
+    assert cache.etag(second) == '"etag-2"'
+
+    # An object file replaced by another writer is not revalidated with this ETag
+    replacement = tmp_path / "replacement"
+    replacement.write_bytes(b"xyz")
+    os.replace(replacement, cache.store.path(second))
+    assert cache.etag(second) is None
+
+def test_cache_skips_objects_over_budget(tmp_path):
+
+    s3 = Mock()
+    cache = MinioObjectCache(directory=str(tmp_path), max_bytes=4)
+
+    # Served from the response of the single GET, without storing it
+    s3.get_object.return_value = object_response(b"too large")
+    assert cache.read(s3, "bucket", "key") == b"too large"
+    assert len(cache.store) == 0
+
+    s3.get_object.return_value = object_response(b"too large")
+    download_path = str(tmp_path / "copy.bin")
+    assert cache.copy_to(s3, "bucket", "key", download_path)
+    with open(download_path, "rb") as f:
+        assert f.read() == b"too large"
+
+    assert s3.get_object.call_count == 2
+    assert len(cache.store) == 0
+
+def test_cache_single_flight(tmp_path):
+
+    s3 = Mock()
+    cache = MinioObjectCache(directory=str(tmp_path), max_bytes=1024)
+
+    def slow_get_object(**kwargs):
+        time.sleep(0.2)
+        return object_response(b"shared")
+
+    s3.get_object.side_effect = slow_get_object
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.read(s3, "bucket", "key"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [b"shared"] * 5
+    assert s3.get_object.call_count == 1
+
+@patch("boto3.client")
+def test_download_objects_with_prefix_paginated(mock_boto_client, tmp_path):
+
+    s3 = Mock()
+    mock_boto_client.return_value = s3
+    client = MinioClient("http://localhost:9000", "key", "secret")
+    client.DOWNLOAD_RETRY_BACKOFF = 0
+
+    pages = [
+        {"Contents": [{"Key": "project1/data/"}, {"Key": "project1/data/record1.txt"}]},
+        {"Contents": [{"Key": "project1/data/sub/record2.txt"}]},
+    ]
+    s3.get_paginator.return_value.paginate.return_value = pages
+
+    attempts = {}
+    def download_file(bucket, key, path, Config=None):
+        attempts[key] = attempts.get(key, 0) + 1
+        # First attempt of record1 fails, the retry succeeds
+        if key.endswith("record1.txt") and attempts[key] == 1:
+            raise OSError("connection reset")
+        with open(path, "w") as f:
+            f.write(key)
+
+    s3.download_file.side_effect = download_file
+    progress = []
+
+    downloaded = client.download_objects_with_prefix_to_sr_disk(
+        "bucket", "project1/data", str(tmp_path), max_workers=4,
+        progress_callback=lambda done, listed, name: progress.append(done)
+    )
+
+    s3.get_paginator.assert_called_once_with("list_objects_v2")
+    s3.get_paginator.return_value.paginate.assert_called_once_with(Bucket="bucket", Prefix="project1/data")
+    assert sorted(downloaded) == [str(tmp_path / "record1.txt"), str(tmp_path / "sub" / "record2.txt")]
+    assert attempts["project1/data/record1.txt"] == 2
+    assert sorted(progress) == [1, 2]
+    assert (tmp_path / "sub" / "record2.txt").read_text() == "project1/data/sub/record2.txt"
+
+class FakeBody:
+    def __init__(self, data: bytes):
+        self.stream = BytesIO(data)
+
+    def read(self):
+        return self.stream.read()
+
+    def iter_chunks(self, chunk_size):
+        while chunk := self.stream.read(chunk_size):
+            yield chunk
+
+    def close(self):
+        pass
+
+def ranged_get_object(data: bytes, etag: str = '"etag-1"'):
+    def get_object(Bucket, Key, Range=None, IfMatch=None):
+        if IfMatch is not None and IfMatch != etag:
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}, "ResponseMetadata": {"HTTPStatusCode": 412}}, "GetObject")
+        start, end = (int(v) for v in Range[len("bytes="):].split("-"))
+        part = data[start:end + 1]
+        return {
+            "Body": FakeBody(part),
+            "ContentLength": len(part),
+            "ContentRange": f"bytes {start}-{start + len(part) - 1}/{len(data)}",
+            "ETag": etag,
+        }
+    return get_object
+
+@patch("boto3.client")
+def test_download_object_single_get(mock_boto_client):
+
+    s3 = Mock()
+    mock_boto_client.return_value = s3
+    client = MinioClient("http://localhost:9000", "key", "secret", multipart_threshold=10, multipart_chunksize=4)
+
+    s3.get_object.side_effect = ranged_get_object(b"small")
+
+    assert client.download_object("bucket", "small.bin") == b"small"
+    s3.get_object.assert_called_once_with(Bucket="bucket", Key="small.bin", Range="bytes=0-9")
+    s3.head_object.assert_not_called()
+
+@patch("boto3.client")
+def test_download_object_ranged(mock_boto_client):
+
+    s3 = Mock()
+    mock_boto_client.return_value = s3
+    client = MinioClient("http://localhost:9000", "key", "secret", multipart_threshold=10, multipart_chunksize=4, max_concurrency=3)
+
+    data = bytes(range(26))
+    s3.get_object.side_effect = ranged_get_object(data)
+
+    result = client.download_object("bucket", "big.bin")
+
+    assert bytes(result) == data
+    s3.head_object.assert_not_called()
+    # First 10 bytes, then the remaining 16 in parts of 4 pinned to the ETag
+    assert s3.get_object.call_count == 5
+    assert all(call.kwargs["IfMatch"] == '"etag-1"' for call in s3.get_object.call_args_list[1:])
+
+    # An object replaced after the first GET fails the download of its parts
+    before, after = ranged_get_object(data), ranged_get_object(data, etag='"etag-2"')
+    s3.get_object.side_effect = lambda **kwargs: after(**kwargs) if "IfMatch" in kwargs else before(**kwargs)
+    assert isinstance(client.download_object("bucket", "big.bin"), ClientError)
+
+@patch("boto3.client")
+def test_iter_object_and_upload_config(mock_boto_client):
+
+    s3 = Mock()
+    mock_boto_client.return_value = s3
+    client = MinioClient("http://localhost:9000", "key", "secret")
+
+    s3.get_object.return_value = {"Body": FakeBody(b"abcdefgh")}
+    assert list(client.iter_object("bucket", "key", chunk_size=3)) == [b"abc", b"def", b"gh"]
+
+    client.upload_object("bucket", "key", b"payload")
+    kwargs = s3.upload_fileobj.call_args.kwargs
+    assert kwargs["Config"] is client.transfer_config
+    assert kwargs["Fileobj"].read() == b"payload"
+
+def test_shared_client_and_pool_metrics():
+
+    client_a = MinioClient("http://minio-test:9000", "key", "secret", max_pool_connections=1)
+    client_b = MinioClient("http://minio-test:9000", "key", "secret", max_pool_connections=1)
+    client_c = MinioClient("http://minio-test:9000", "other", "secret", max_pool_connections=1)
+
+    assert client_a.s3_client is client_b.s3_client
+    assert client_a.s3_client is not client_c.s3_client
+    assert client_a.s3_client.meta.config.max_pool_connections == 1
+    assert client_a.s3_client.meta.config.tcp_keepalive is True
+
+    # Observe the in-flight counts from inside a call by short-circuiting the HTTP request
+    observed = []
+    def fake_response(**kwargs):
+        observed.append(S3ClientFactory.get_in_flight("http://minio-test:9000", "key", "secret", max_pool_connections=1))
+        observed.append(S3ClientFactory.get_in_flight("http://minio-test:9000", "other", "secret", max_pool_connections=1))
+        return (Mock(status_code=200), {"Buckets": []})
+
+    client_a.s3_client.meta.events.register_last("before-call.s3", fake_response)
+    assert client_a.list_buckets() == []
+    # Counted on the pool of the call only, not on the other client of the endpoint
+    assert observed == [1, 0]
+    assert S3ClientFactory.get_in_flight("http://minio-test:9000", "key", "secret", max_pool_connections=1) == 0
+
+    # Each client of the endpoint is exported as a pool of its own
+    pools = {
+        sample.labels["pool"]
+        for metric in s3_pool_size_gauge.collect() for sample in metric.samples
+        if sample.labels["endpoint"] == "http://minio-test:9000"
+    }
+    assert len(pools) == 2
+
+def test_in_flight_until_body_transferred():
+
+    client = MinioClient("http://minio-test:9000", "key", "secret")
+
+    def in_flight():
+        return S3ClientFactory.get_in_flight("http://minio-test:9000", "key", "secret")
+
+    def fake_response(**kwargs):
+        return (Mock(status_code=200), {"Body": StreamingBody(BytesIO(b"abcdef"), 6), "ContentLength": 6})
+
+    client.s3_client.meta.events.register_last("before-call.s3", fake_response)
+
+    # The pooled connection is busy until the body is read to the end...
+    body = client.s3_client.get_object(Bucket="bucket", Key="key")["Body"]
+    assert in_flight() == 1
+    assert body.read(4) == b"abcd"
+    assert in_flight() == 1
+    assert list(body.iter_chunks(4)) == [b"ef"]
+    assert in_flight() == 0
+
+    # ...or closed
+    body = client.s3_client.get_object(Bucket="bucket", Key="key")["Body"]
+    assert in_flight() == 1
+    body.close()
+    body.close()
+    assert in_flight() == 0
+
+def test_shared_clients_forgotten_after_fork():
+
+    client = MinioClient("http://minio-test:9000", "key", "secret")
+
+    pid = os.fork()
+    if pid == 0:
+        # The child gets a client and connection pool of its own
+        child_client = S3ClientFactory.get_client("http://minio-test:9000", "key", "secret")
+        os._exit(0 if child_client is not client.s3_client else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert S3ClientFactory.get_client("http://minio-test:9000", "key", "secret") is client.s3_client
@@ -1,10 +1,15 @@
 from modules._faas_parser import FaasParser
 from modules._logger import CognitLogger
 from modules._pyexec import PyExec
+from modules._worker_process import ResourceLimits, WorkerProcess
 from models.faas import *
 from main import app
 
 from fastapi.testclient import TestClient
+import multiprocessing.forkserver
+import subprocess
+import resource
+import signal
 
 cognit_logger = CognitLogger()
 client = TestClient(app)
@@ -87,3 +92,152 @@ def test_error_param_number():
     
     # Close client
     client.close()
+
+def sleepy(seconds):
+    import time
+    time.sleep(seconds)
+    return seconds
+
+def test_timeout_kills_function():
+
+    print("Python function timeout test")
+
+    py_executor = PyExec(fc=sleepy, params=[30], timeout=0.5)
+    py_executor.run()
+
+    assert py_executor.get_result() == None
+    assert py_executor.ret_code == ExecReturnCode.TIMEOUT
+    assert not py_executor.worker.process.is_alive()
+    assert py_executor.end_pyexec_time - py_executor.start_pyexec_time < 10
+
+def test_isolated_ok_result():
+
+    print("Python isolated executor test")
+
+    py_executor = PyExec(fc=myfunction, params=[2, 3], timeout=10)
+    py_executor.run()
+
+    assert py_executor.get_result() == 5
+    assert py_executor.ret_code == ExecReturnCode.SUCCESS
+
+    py_executor = PyExec(fc=myfunction, params=[2, "wrong_param"], isolated=True)
+    py_executor.run()
+
+    assert py_executor.ret_code == ExecReturnCode.ERROR
+    assert py_executor.err.startswith("Error executing function: ")
+
+def test_cancel_running_function():
+
+    print("Python function cancellation test")
+
+    import threading, time
+
+    py_executor = PyExec(fc=sleepy, params=[30], isolated=True)
+    runner = threading.Thread(target=py_executor.run)
+    runner.start()
+
+    while py_executor.worker is None or py_executor.worker.process is None:
+        time.sleep(0.01)
+    py_executor.cancel()
+    runner.join(timeout=10)
+
+    assert not runner.is_alive()
+    assert py_executor.ret_code == ExecReturnCode.CANCELLED
+
+def allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+def spin():
+    while True:
+        pass
+
+def test_memory_limit_exceeded():
+
+    print("Python function memory limit test")
+
+    py_executor = PyExec(fc=allocate, params=[512], limits=ResourceLimits(memory_bytes=64 * 1024 * 1024))
+    py_executor.run()
+
+    assert py_executor.get_result() == None
+    assert py_executor.ret_code == ExecReturnCode.RESOURCE_LIMIT
+
+    py_executor = PyExec(fc=allocate, params=[8], limits=ResourceLimits(memory_bytes=64 * 1024 * 1024))
+    py_executor.run()
+
+    assert py_executor.get_result() == 8 * 1024 * 1024
+    assert py_executor.ret_code == ExecReturnCode.SUCCESS
+
+def test_cpu_limit_exceeded():
+
+    print("Python function CPU limit test")
+
+    py_executor = PyExec(fc=spin, params=[], timeout=30, limits=ResourceLimits(cpu_seconds=1))
+    py_executor.run()
+
+    assert py_executor.ret_code == ExecReturnCode.RESOURCE_LIMIT
+
+def test_limit_breach_classification():
+
+    limits = ResourceLimits(cpu_seconds=1)
+
+    assert limits.breach(-signal.SIGXCPU) == "CPU time limit of 1s exceeded"
+    # Kills by the runtime itself are timeouts or cancellations
+    assert limits.breach(-signal.SIGKILL, killed=True) is None
+    assert "CPU" not in limits.breach(-signal.SIGKILL)
+    assert limits.breach(1) is None
+    assert ResourceLimits().breach(-signal.SIGKILL) is None
+    assert ResourceLimits(memory_bytes=1024).breach(-signal.SIGXCPU) is None
+
+def test_requested_limits_capped_by_flavour():
+
+    flavour = ResourceLimits(cpu_seconds=10)
+
+    assert flavour.capped(cpu_seconds=5).cpu_seconds == 5
+    assert flavour.capped(cpu_seconds=50).cpu_seconds == 10
+    assert flavour.capped().cpu_seconds == 10
+    assert flavour.capped(memory_bytes=1024).memory_bytes == 1024
+    assert not ResourceLimits().capped()
+
+def test_limits_applied_to_spawned_process():
+
+    print("Resource limits set on another process")
+
+    child = subprocess.Popen(["sleep", "30"])
+    try:
+        ResourceLimits(cpu_seconds=5, memory_bytes=256 * 1024 * 1024).apply(relative=False, pid=child.pid)
+
+        assert resource.prlimit(child.pid, resource.RLIMIT_CPU) == (5, 6)
+        assert resource.prlimit(child.pid, resource.RLIMIT_AS) == (256 * 1024 * 1024,) * 2
+        # The runtime's own limits are left untouched
+        assert resource.getrlimit(resource.RLIMIT_CPU)[0] != 5
+    finally:
+        child.kill()
+        child.wait()
+
+def test_zygote_worker():
+
+    print("Python function in a worker forked from the zygote")
+
+    def preloaded(module):
+        import sys
+        return module in sys.modules
+
+    # Earlier tests started the default zygote, which only preloads __main__
+    multiprocessing.forkserver._forkserver._stop()
+    WorkerProcess.configure(start_method="forkserver", preload=["wave"])
+
+    try:
+        WorkerProcess.start_zygote()
+
+        py_executor = PyExec(fc=preloaded, params=["wave"], timeout=30)
+        py_executor.run()
+
+        assert py_executor.ret_code == ExecReturnCode.SUCCESS
+        assert py_executor.get_result() is True
+
+        py_executor = PyExec(fc=sleepy, params=[30], timeout=0.5)
+        py_executor.run()
+
+        assert py_executor.ret_code == ExecReturnCode.TIMEOUT
+    finally:
+        WorkerProcess.configure(start_method="forkserver", preload=[])
@@ -92,14 +92,61 @@ def test_execute_callback(mock_post, rabbitmq_client):
     with patch.object(rabbitmq_client, "_send_result") as mock_send_result:
         rabbitmq_client._execute_callback(ch, method, properties, json.dumps(body))
     
-    mock_post.assert_called_once_with("http://localhost:8000/v1/faas/execute-sync", json=body["payload"])
+    mock_post.assert_called_once()
+    assert mock_post.call_args.args == ("http://localhost:8000/v1/faas/execute-sync",)
+    assert json.loads(mock_post.call_args.kwargs["data"]) == body["payload"]
     mock_send_result.assert_called_once()
     ch.basic_ack.assert_called_once_with(delivery_tag=method.delivery_tag)
 
+@patch("requests.post")
+def test_process_async_message(mock_post):
+    submitted = []
+
+    def submit_async(offloaded_func, on_done):
+        submitted.append(offloaded_func)
+        # Complete right away to exercise the deferred publication
+        on_done(ExecResponse(res="gAVLBS4=", ret_code=ExecReturnCode.SUCCESS, err=None))
+        return "task-uuid"
+
+    client = RabbitMQClient(host=RABBITMQ_HOST, queue=REQUEST_QUEUE, submit_async=submit_async)
+    ch = Mock()
+    method = Mock()
+    body = {
+        "mode": ExecutionMode.ASYNC,
+        "payload": {"lang": "PY", "fc": "", "fc_hash": "", "params": ["gAVLAi4="]},
+        "request_id": "request_id"
+    }
+
+    with patch.object(client, "_send_result") as mock_send_result:
+        client._process_message(ch, method, json.dumps(body))
+
+    mock_post.assert_not_called()
+    assert submitted[0].params == ["gAVLAi4="]
+    mock_send_result.assert_called_once()
+    assert mock_send_result.call_args.args[1:] == (200, "request_id")
+    ch.basic_ack.assert_called_once_with(delivery_tag=method.delivery_tag)
+
+@patch("requests.post")
+def test_process_message_requeued_when_saturated(mock_post, rabbitmq_client):
+    ch = Mock()
+    method = Mock()
+    body = {"mode": ExecutionMode.SYNC, "payload": {"lang": "PY"}, "request_id": "request_id"}
+
+    mock_post.return_value.status_code = 429
+    rabbitmq_client.REQUEUE_DELAY = 0
+
+    with patch.object(rabbitmq_client, "_send_result") as mock_send_result:
+        rabbitmq_client._process_message(ch, method, json.dumps(body))
+
+    mock_send_result.assert_not_called()
+    ch.basic_ack.assert_not_called()
+    ch.basic_nack.assert_called_once_with(delivery_tag=method.delivery_tag, requeue=True)
+
+@patch("pika.URLParameters")
 @patch("pika.BlockingConnection")
-def test_send_result(mock_pika, rabbitmq_client):
-    mock_channel = Mock()
-    rabbitmq_client.channel = mock_channel
+def test_send_result(mock_pika, mock_url_params, rabbitmq_client):
+    # Channel of the short-lived publishing connection
+    mock_channel = mock_pika.return_value.__enter__.return_value.channel.return_value
     response = ExecResponse(res="success", ret_code=ExecReturnCode.SUCCESS, err="")
     status_code = 200
     
@@ -107,11 +154,21 @@ def test_send_result(mock_pika, rabbitmq_client):
 
     body = { "code": status_code, "message": json.loads(response.json()) }
     
-    mock_channel.basic_publish.assert_called_once_with(
-        exchange='results',
-        routing_key="request_id",
-        body=json.dumps(body)
-    )
+    mock_channel.basic_publish.assert_called_once()
+    assert mock_channel.basic_publish.call_args.kwargs["exchange"] == "results"
+    assert mock_channel.basic_publish.call_args.kwargs["routing_key"] == "request_id"
+    assert json.loads(mock_channel.basic_publish.call_args.kwargs["body"]) == body
+
+@patch("pika.URLParameters")
+@patch("pika.BlockingConnection")
+def test_send_result_forwards_api_response(mock_pika, mock_url_params, rabbitmq_client):
+    mock_channel = mock_pika.return_value.__enter__.return_value.channel.return_value
+    api_response = b'{"ret_code":0,"res":"gAVLBS4=","err":null}'
+
+    rabbitmq_client._send_result(api_response, 200, "request_id")
+
+    published = json.loads(mock_channel.basic_publish.call_args.kwargs["body"])
+    assert published == {"code": 200, "message": json.loads(api_response)}
 
 #####################
 # INTEGRATION TESTS #
@@ -0,0 +1,69 @@
+from modules._result_store import DiskSpill, ResultStore, SqliteResultStore
+from modules._logger import CognitLogger
+from models.faas import AsyncExecStatus, ExecResponse, ExecReturnCode
+
+cognit_logger = CognitLogger()
+
+def test_inline_result():
+
+    cognit_logger.info("Result store: inline result")
+
+    store = ResultStore()
+    store.put("task", ExecResponse(ret_code=ExecReturnCode.SUCCESS, res="gAVLBS4=", err=None))
+
+    record = store.get("task")
+
+    assert record.status == AsyncExecStatus.READY
+    assert not record.spilled
+    assert record.to_exec_response().res == "gAVLBS4="
+    assert store.get("unknown") is None
+
+def test_spilled_result(tmp_path):
+
+    cognit_logger.info("Result store: spilled result")
+
+    store = ResultStore(spill=DiskSpill(str(tmp_path)), spill_threshold=16)
+    res = "A" * 100
+    store.put("task", ExecResponse(ret_code=ExecReturnCode.SUCCESS, res=res, err=None))
+
+    record = store.get("task")
+
+    assert record.spilled
+    assert record.res is None
+    assert record.size == 100
+    assert list(store.iter_res(record, chunk_size=30)) == [b"A" * 30] * 3 + [b"A" * 10]
+    assert store.load_res(record) == res
+
+    store.delete("task")
+
+    assert store.get("task") is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_sqlite_survives_restart(tmp_path):
+
+    cognit_logger.info("Result store: SQLite persistence")
+
+    path = str(tmp_path / "results.db")
+    store = SqliteResultStore(path)
+    store.put("task", ExecResponse(ret_code=ExecReturnCode.ERROR, res=None, err="boom"), AsyncExecStatus.FAILED)
+    store.close()
+
+    store = SqliteResultStore(path)
+    record = store.get("task")
+
+    assert record.status == AsyncExecStatus.FAILED
+    assert record.ret_code == ExecReturnCode.ERROR
+    assert record.err == "boom"
+    store.close()
+
+def test_purge_expired(tmp_path):
+
+    cognit_logger.info("Result store: purge of expired results")
+
+    store = SqliteResultStore(str(tmp_path / "results.db"), spill=DiskSpill(str(tmp_path / "spill")), spill_threshold=16, ttl=-1)
+    store.put("task", ExecResponse(ret_code=ExecReturnCode.SUCCESS, res="A" * 100, err=None))
+    store.purge_expired()
+
+    assert store.get("task") is None
+    assert list((tmp_path / "spill").iterdir()) == []
+    store.close()
@@ -0,0 +1,91 @@
+from modules._scheduler import ExecutionScheduler, DeadlineExceededError, deadline_from_ms
+from models.faas import ExecPriority
+
+import threading
+import pytest
+import time
+
+def start_waiter(scheduler, name, order, priority, deadline_ms=0):
+    deadline = deadline_from_ms(deadline_ms)
+
+    def wait():
+        try:
+            with scheduler.slot(priority, deadline):
+                order.append(name)
+        except DeadlineExceededError:
+            order.append(f"shed:{name}")
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    # Let the waiter enqueue itself
+    while scheduler.queue_depth == 0 and thread.is_alive():
+        time.sleep(0.001)
+    return thread
+
+def test_priority_then_earliest_deadline_first():
+
+    scheduler = ExecutionScheduler(slots=1)
+    order = []
+
+    # Hold the only slot while the others queue up
+    scheduler.acquire()
+
+    threads = []
+    for name, priority, deadline_ms in [
+        ("batch", ExecPriority.BATCH, 0),
+        ("normal-late", ExecPriority.NORMAL, 60000),
+        ("normal-none", ExecPriority.NORMAL, 0),
+        ("normal-soon", ExecPriority.NORMAL, 30000),
+        ("critical", ExecPriority.CRITICAL, 0),
+    ]:
+        depth = scheduler.queue_depth
+        threads.append(start_waiter(scheduler, name, order, priority, deadline_ms))
+        while scheduler.queue_depth == depth:
+            time.sleep(0.001)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["critical", "normal-soon", "normal-late", "normal-none", "batch"]
+
+def test_expired_requests_are_shed():
+
+    scheduler = ExecutionScheduler(slots=1)
+    order = []
+
+    scheduler.acquire()
+    thread = start_waiter(scheduler, "urgent", order, ExecPriority.HIGH, deadline_ms=50)
+    thread.join(timeout=5)
+
+    assert order == ["shed:urgent"]
+    assert scheduler.queue_depth == 0
+
+    scheduler.release()
+
+    # Free slots are granted right away
+    with scheduler.slot(ExecPriority.NORMAL, deadline_from_ms(50)):
+        assert scheduler.running == 1
+
+def test_already_expired_deadline():
+
+    scheduler = ExecutionScheduler(slots=1)
+
+    with pytest.raises(DeadlineExceededError):
+        scheduler.acquire(ExecPriority.NORMAL, time.monotonic() - 1)
+
+    assert scheduler.running == 0
+
+def test_sync_execution_shed_while_queued():
+
+    from api.v1.faas import execution_scheduler, run_sync_execution
+    from models.faas import ExecReturnCode, ExecSyncParams
+
+    offloaded_func = ExecSyncParams(lang="PY", fc="", params=[], deadline_ms=50)
+
+    with execution_scheduler.slot():
+        response = run_sync_execution(offloaded_func)
+
+    assert response.ret_code == ExecReturnCode.ERROR
+    assert "Deadline exceeded" in response.err
+    assert execution_scheduler.running == 0
@@ -0,0 +1,126 @@
+from modules._readiness import Readiness
+from modules._faas_manager import FaasManager
+from modules._blob_cache import BlobCache
+from modules._warmup import WarmUp
+from modules._logger import CognitLogger
+from main import app
+
+from fastapi.testclient import TestClient
+import cloudpickle
+import subprocess
+import base64
+import threading
+import json
+import time
+import sys
+import os
+
+cognit_logger = CognitLogger()
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Subsystems initialized on first use instead of when the app is imported
+LAZY_MODULES = ["boto3", "botocore", "pika", "requests", "dask", "distributed", "google.protobuf"]
+
+def test_import_is_lazy():
+
+    cognit_logger.info("Start-up: heavy modules are not imported with the app")
+
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import main\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"imported = [module for module in {LAZY_MODULES!r} if module in sys.modules]\n"
+        "print(json.dumps({'elapsed': elapsed, 'imported': imported}))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", "import json\n" + script], cwd=APP_DIR, capture_output=True, text=True, check=True)
+    profile = json.loads(output.stdout.strip().splitlines()[-1])
+
+    cognit_logger.info(f"Importing the app took {profile['elapsed']:.3f}s")
+
+    assert profile["imported"] == []
+
+def test_readiness_steps():
+
+    cognit_logger.info("Start-up: readiness flips once every step completes")
+
+    readiness = Readiness()
+    readiness.expect("startup")
+    release = threading.Event()
+    thread = readiness.run_in_background("warmup", release.wait)
+    readiness.complete("startup")
+
+    assert not readiness.is_ready()
+    assert readiness.status()["pending"] == ["warmup"]
+
+    release.set()
+    thread.join()
+
+    assert readiness.is_ready()
+    assert set(readiness.status()["steps_s"]) == {"startup", "warmup"}
+
+def test_readyz():
+
+    cognit_logger.info("Start-up: readiness endpoint")
+
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 10
+        while (response := client.get("/readyz")).status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+
+def test_readiness_checks():
+
+    cognit_logger.info("Start-up: readiness and liveness checks")
+
+    readiness = Readiness()
+    readiness.complete("startup")
+    broker = {"connected": False}
+    readiness.add_check("broker", lambda: (broker["connected"], "broker"))
+    readiness.add_check("pool", lambda: (True, "pool"), liveness=True)
+
+    assert readiness.liveness()["alive"]
+    assert not readiness.is_ready()
+
+    broker["connected"] = True
+
+    assert readiness.is_ready()
+    assert set(readiness.status()["checks"]) == {"broker", "pool"}
+
+def test_warm_up_declares_functions(tmp_path):
+
+    cognit_logger.info("Start-up: warm-up declares functions")
+
+    fc = base64.b64encode(cloudpickle.dumps(len)).decode()
+    functions_path = tmp_path / "functions.json"
+    functions_path.write_text(json.dumps([{"lang": "PY", "fc": fc}]))
+
+    blob_cache = BlobCache(directory=str(tmp_path / "blobs"), memory_max_bytes=1024 * 1024)
+    faas_manager = FaasManager(pool="process", max_workers=2)
+    warm_up = WarmUp(modules=("json", "not_a_module"), functions_path=str(functions_path))
+
+    try:
+        assert warm_up.health(blob_cache) == (False, "warm-up in progress")
+
+        warm_up.run(faas_manager, blob_cache)
+
+        digest = BlobCache.digest(base64.b64decode(fc))
+        assert list(warm_up.declared) == [digest]
+        assert blob_cache.contains(digest)
+        assert warm_up.health(blob_cache)[0]
+        assert faas_manager.health()[0]
+    finally:
+        faas_manager.shutdown()
+
+def test_healthz():
+
+    cognit_logger.info("Start-up: liveness endpoint")
+
+    with TestClient(app) as client:
+        response = client.get("/healthz")
+
+    assert response.status_code == 200
+    assert response.json()["checks"]["pool"]["ok"] is True
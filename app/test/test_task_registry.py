@@ -0,0 +1,58 @@
+from modules._task_registry import SharedTaskRegistry
+from modules._logger import CognitLogger
+from models.faas import AsyncExecState
+
+import threading
+import time
+
+cognit_logger = CognitLogger()
+
+def test_lifecycle_shared_between_workers(tmp_path):
+
+    cognit_logger.info("Task registry: lifecycle seen by another worker")
+
+    path = str(tmp_path / "tasks.db")
+    owner = SharedTaskRegistry(path)
+    other = SharedTaskRegistry(path)
+
+    owner.add("task", time.monotonic())
+    assert other.get_progress("task").state == AsyncExecState.QUEUED
+
+    owner.started("task", time.monotonic())
+    assert other.get_progress("task").state == AsyncExecState.RUNNING
+
+    owner.finished("task", time.monotonic())
+    assert other.get_progress("task").state == AsyncExecState.FINISHED
+    assert not other.request_cancel("task")
+
+    owner.remove("task")
+    assert not other.contains("task")
+    assert other.get_progress("task") is None
+
+    owner.close()
+    other.close()
+
+def test_cancel_request_reaches_owner(tmp_path):
+
+    cognit_logger.info("Task registry: cancellation requested by another worker")
+
+    path = str(tmp_path / "tasks.db")
+    owner = SharedTaskRegistry(path)
+    other = SharedTaskRegistry(path)
+    # Both live in this process, tell them apart
+    other.owner = -1
+
+    cancelled = []
+    requested = threading.Event()
+    owner.watch_cancel_requests(lambda task_uuid: (cancelled.append(task_uuid), requested.set()), interval=0.01)
+
+    owner.add("task", time.monotonic())
+
+    assert other.request_cancel("task")
+    assert not other.request_cancel("unknown")
+    assert requested.wait(timeout=5)
+    assert cancelled == ["task"]
+    assert owner.take_cancel_requests() == []
+
+    owner.close()
+    other.close()